@@ -28,6 +28,76 @@ CHANNELS = {
     "finder": "1388537786650333305",
 }
 
+# Discord ingestion (extrctor/discord_ingest.py)
+DISCORD_MESSAGE_LIMIT = 100
+DISCORD_CACHE_TTL_SECONDS = float(os.getenv("DISCORD_CACHE_TTL_SECONDS", "60"))  # reuse one refresh across flows
+DISCORD_POLL_SECONDS = float(os.getenv("DISCORD_POLL_SECONDS", "0"))             # >0 starts the background poller
+DISCORD_MAX_CONNECTIONS = 8
+
+# Background refresh of the summary endpoints, seconds per channel (0 = only on ?refresh=true)
+SUMMARY_REFRESH_SECONDS = {
+    "news": float(os.getenv("NEWS_SUMMARY_REFRESH_SECONDS", "900")),
+    "general": float(os.getenv("GENERAL_SUMMARY_REFRESH_SECONDS", "900")),
+    "focus": float(os.getenv("FOCUS_SUMMARY_REFRESH_SECONDS", "900")),
+}
+
+# Worker limits per class of blocking work run off the event loop (services/executors.py)
+EXECUTOR_LIMITS = {
+    "io": int(os.getenv("EXECUTOR_IO_WORKERS", "8")),
+    "cpu": int(os.getenv("EXECUTOR_CPU_WORKERS", "2")),
+    "plot": 1,
+    "process": int(os.getenv("EXECUTOR_PROCESS_WORKERS", "2")),
+}
+
+# Coin finder NER (models/coin_finder.py): tweets per forward pass, grouped by length
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", "16"))
+
+# FinBERT scoring of finder candidate names (models/coin_find_and_sentiment.py); results are
+# kept in the message store, so only unseen names count against the per-run cap
+FINBERT_CANDIDATE_BATCH_SIZE = int(os.getenv("FINBERT_CANDIDATE_BATCH_SIZE", "64"))
+FINBERT_CANDIDATE_CAP = int(os.getenv("FINBERT_CANDIDATE_CAP", "500"))
+
+# News/general sentiment handlers: texts are streamed from the input and scored this many at a
+# time, so memory does not grow with the input file
+PREDICT_CHUNK_SIZE = int(os.getenv("PREDICT_CHUNK_SIZE", "512"))
+
+# Time-bucketed coin flows (services/flow_series.py): buckets kept per coin and resolution
+FLOW_SERIES_CAPACITY = {
+    "1m": int(os.getenv("FLOW_SERIES_1M_BUCKETS", "1440")),   # 1 day
+    "1h": int(os.getenv("FLOW_SERIES_1H_BUCKETS", "720")),    # 30 days
+    "1d": int(os.getenv("FLOW_SERIES_1D_BUCKETS", "365")),
+}
+
+# Coin flow charts (services/chart_service.py): rendered on request and cached by flow hash;
+# after each analysis the N coins with the most flows are pre-rendered in the process pool
+CHART_CACHE_DIR = os.getenv(
+    "CHART_CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "test_data", "charts1"))
+)
+CHART_PRERENDER_TOP = int(os.getenv("CHART_PRERENDER_TOP", "20"))
+
+# Duplicate collapsing before scoring (services/dedup.py): texts whose SimHash fingerprints
+# differ in at most this many of 64 bits are scored once (-1 = exact duplicates only)
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "3"))
+
+# Single-pass preprocessing (services/tweet_converter.py): extracted texts kept in memory per
+# message id, and where flows dump their preprocessed JSON (unset = no files are written)
+PREPROCESS_TEXT_CACHE_MAX = int(os.getenv("PREPROCESS_TEXT_CACHE_MAX", "50000"))
+PREPROCESSED_DUMP_DIR = os.getenv("PREPROCESSED_DUMP_DIR", "")
+
+# Local NLTK data (services/nltk_resources.py); filled once by scripts/download_nltk_data.py,
+# nothing is downloaded at import time or per request
+NLTK_DATA_DIR = os.getenv(
+    "NLTK_DATA_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "nltk_data"))
+)
+
+# Embedded message/prediction store (services/message_store.py)
+MESSAGE_STORE_PATH = os.getenv(
+    "MESSAGE_STORE_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "test_data", "messages.db"))
+)
+
 headers = {
     "accept-language": "en-US,en;q=0.9",
     # ⚠️ Replace securely; prefer an environment variable for this token
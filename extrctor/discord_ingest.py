@@ -0,0 +1,197 @@
+# extrctor/discord_ingest.py
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import aiohttp
+
+from configurations.config import (
+    CHANNELS,
+    headers,
+    DISCORD_MESSAGE_LIMIT,
+    DISCORD_CACHE_TTL_SECONDS,
+    DISCORD_MAX_CONNECTIONS,
+)
+
+DISCORD_API_BASE = "https://discord.com/api/v9"
+
+# ----------------------------
+# Shared latest-refresh cache
+# ----------------------------
+# channel_id -> {"messages": [...], "fetched_at": unix ts}
+_LATEST: Dict[str, Dict[str, Any]] = {}
+_LATEST_LOCK = threading.Lock()
+
+# callbacks(channel_type, messages) invoked after every successful refresh
+_CONSUMERS: List[Callable[[str, list], None]] = []
+
+
+def subscribe(callback: Callable[[str, list], None]) -> None:
+    """Register a consumer that receives (channel_type, messages) after each refresh."""
+    if callback not in _CONSUMERS:
+        _CONSUMERS.append(callback)
+
+
+def _group_channels(channel_types: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+    """channel_id -> [channel_type, ...] so identical ids are fetched only once."""
+    by_id: Dict[str, List[str]] = {}
+    for ctype in (channel_types or CHANNELS.keys()):
+        cid = CHANNELS.get(ctype)
+        if cid:
+            by_id.setdefault(cid, []).append(ctype)
+    return by_id
+
+
+def _publish(channel_id: str, channel_types: List[str], messages: list) -> None:
+    with _LATEST_LOCK:
+        _LATEST[channel_id] = {"messages": messages, "fetched_at": time.time()}
+    for ctype in channel_types:
+        for cb in list(_CONSUMERS):
+            try:
+                cb(ctype, messages)
+            except Exception as e:
+                print(f"Discord consumer failed for '{ctype}': {type(e).__name__}: {e}")
+
+
+def get_cached_messages(channel_type: str, max_age: Optional[float] = None) -> Optional[list]:
+    """
+    Return the last fetched messages for a channel type if they are younger
+    than max_age seconds (defaults to DISCORD_CACHE_TTL_SECONDS), else None.
+    """
+    cid = CHANNELS.get(channel_type)
+    if not cid:
+        return None
+    max_age = DISCORD_CACHE_TTL_SECONDS if max_age is None else max_age
+    with _LATEST_LOCK:
+        entry = _LATEST.get(cid)
+    if not entry or time.time() - entry["fetched_at"] > max_age:
+        return None
+    return entry["messages"]
+
+
+# ----------------------------
+# Async fetching
+# ----------------------------
+def _new_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(limit=DISCORD_MAX_CONNECTIONS)
+    return aiohttp.ClientSession(
+        headers=headers,
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=30),
+    )
+
+
+async def _fetch_channel(session: aiohttp.ClientSession, channel_id: str, limit: int) -> Optional[list]:
+    url = f"{DISCORD_API_BASE}/channels/{channel_id}/messages"
+    async with session.get(url, params={"limit": str(limit)}) as resp:
+        if resp.status != 200:
+            body = await resp.text()
+            print(f"Failed: {resp.status} (channel {channel_id})")
+            print(body[:200])
+            return None
+        data = await resp.json()
+        return data if isinstance(data, list) else None
+
+
+async def fetch_all_channels(
+    channel_types: Optional[Iterable[str]] = None,
+    limit: int = DISCORD_MESSAGE_LIMIT,
+    session: Optional[aiohttp.ClientSession] = None,
+) -> Dict[str, list]:
+    """
+    Fetch every configured channel concurrently (deduplicating identical
+    channel ids) and return {channel_type: messages}. Failed channels are
+    left out of the result and keep their previous cached value.
+    """
+    by_id = _group_channels(channel_types)
+    if not by_id:
+        return {}
+
+    own_session = session is None
+    session = session or _new_session()
+    try:
+        results = await asyncio.gather(
+            *(_fetch_channel(session, cid, limit) for cid in by_id),
+            return_exceptions=True,
+        )
+    finally:
+        if own_session:
+            await session.close()
+
+    out: Dict[str, list] = {}
+    for (cid, ctypes), messages in zip(by_id.items(), results):
+        if isinstance(messages, Exception):
+            print(f"Failed: channel {cid}: {type(messages).__name__}: {messages}")
+            continue
+        if messages is None:
+            continue
+        _publish(cid, ctypes, messages)
+        for ctype in ctypes:
+            out[ctype] = messages
+    return out
+
+
+def refresh_all_channels(channel_types: Optional[Iterable[str]] = None) -> Dict[str, list]:
+    """Blocking wrapper for sync callers: one parallel refresh of all channels."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(fetch_all_channels(channel_types))
+    # called from inside an event loop: run the refresh on a helper thread
+    result: Dict[str, list] = {}
+    worker = threading.Thread(target=lambda: result.update(asyncio.run(fetch_all_channels(channel_types))))
+    worker.start()
+    worker.join()
+    return result
+
+
+# ----------------------------
+# Background poller
+# ----------------------------
+class DiscordPoller:
+    """
+    Refresh all configured channels every `interval` seconds on a dedicated
+    thread/event loop, reusing one pooled HTTP session between refreshes.
+    """
+
+    def __init__(self, interval: float, channel_types: Optional[Iterable[str]] = None):
+        self.interval = max(1.0, float(interval))
+        self.channel_types = list(channel_types) if channel_types else None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="discord-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        asyncio.run(self._loop())
+
+    async def _loop(self) -> None:
+        session = _new_session()
+        try:
+            while not self._stop.is_set():
+                try:
+                    await fetch_all_channels(self.channel_types, session=session)
+                except Exception as e:
+                    print(f"Discord poll failed: {type(e).__name__}: {e}")
+                # sleep in small steps so stop() is honoured quickly
+                deadline = time.time() + self.interval
+                while not self._stop.is_set() and time.time() < deadline:
+                    await asyncio.sleep(min(0.5, deadline - time.time()))
+        finally:
+            await session.close()
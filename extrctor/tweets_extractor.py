@@ -1,25 +1,42 @@
-import requests
 import json
-from configurations.config import CHANNELS, headers
+from typing import Optional
 
-limit = 100
+from configurations.config import CHANNELS, DISCORD_MESSAGE_LIMIT
+from extrctor.discord_ingest import get_cached_messages, refresh_all_channels, subscribe
+from services.message_store import get_store
 
-def fetch_discord_messages(channel_type: str, output_file: str):
+limit = DISCORD_MESSAGE_LIMIT
+
+
+def _store_messages(channel_type: str, messages: list):
+    channel_id = CHANNELS.get(channel_type)
+    if channel_id:
+        get_store().upsert_messages(channel_id, messages)
+
+# every refresh (on demand or from the poller) lands in the message store
+subscribe(_store_messages)
+
+
+def fetch_discord_messages(channel_type: str, output_file: Optional[str] = None):
     channel_id = CHANNELS.get(channel_type)
     if not channel_id:
         print(f"Channel type '{channel_type}' not found in configuration.")
         return
 
-    url = f"https://discord.com/api/v9/channels/{channel_id}/messages?limit={limit}"
+    # Reuse a recent refresh (poller or another flow in this request); otherwise
+    # refresh every configured channel in one parallel round trip.
+    messages = get_cached_messages(channel_type)
+    if messages is None:
+        refresh_all_channels()
+        messages = get_cached_messages(channel_type)
 
+    if messages is None:
+        print(f"Failed: no messages fetched for channel '{channel_type}'")
+        return
 
-    response = requests.get(url, headers=headers)
-
-    if response.status_code == 200:
-        messages = response.json()
+    # Raw JSON dump is only needed by file-based flows; store-backed flows pass no path.
+    if output_file:
         with open(output_file, "w", encoding="utf-8") as f:
             json.dump(messages, f, indent=2, ensure_ascii=False)
         print(f"{len(messages)} messages saved to '{output_file}'")
-    else:
-        print(f"Failed: {response.status_code}")
-        print(response.text)
+    return messages
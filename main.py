@@ -2,10 +2,11 @@
 #import json
 import os
 
-from fastapi import FastAPI,Query
+from fastapi import FastAPI,Query,HTTPException
+from fastapi.responses import FileResponse
 import uvicorn
 
-from configurations.config import USE_SCRAPER
+from configurations.config import USE_SCRAPER, DISCORD_POLL_SECONDS, SUMMARY_REFRESH_SECONDS
 from evaluation.general import general_router
 from models.Available_coin_analysis_scrape import available_coin_search
 
@@ -24,12 +25,19 @@ from models.coinflow_Analysis import analyze_coin_flow_analysis
 
 from models.coinflow_With_sentiment import analyze_coin_flow_and_sentiment
 from models.general_handler import analyze_general_tweet_sentiment
-from reponse_handler.focus_sentiment_response import get_focus_sentiment_summary
+from reponse_handler.focus_sentiment_response import get_focus_sentiment_summary, focus_sentiment_file
 
 # --- Response Handlers (Summaries) ---
-from reponse_handler.general_response import get_general_sentiment_summary
-from reponse_handler.news_response import get_news_sentiment_summary
-from weight_handler.rag_system import build_rag_index, rag_top, rag_explain, ingest_twitter_sentiment_cache
+from reponse_handler.general_response import get_general_sentiment_summary, general_sentiment_file
+from reponse_handler.news_response import get_news_sentiment_summary, news_sentiment_file
+from services.summary_scheduler import SummaryScheduler
+from services.executors import run_blocking, shutdown_executors
+from services.chart_service import get_chart_service
+from services.flow_series import RESOLUTIONS as FLOW_RESOLUTIONS, get_flow_series
+from weight_handler.rag_system import (
+    build_rag_index, ensure_rag_index, rag_top, rag_rank, rag_explain, ingest_twitter_sentiment_cache, update_rag_twitter
+)
+from extrctor.discord_ingest import DiscordPoller
 
 app = FastAPI(
     title="Crypto Sentiment Analysis API",
@@ -41,7 +49,29 @@ APP_ROOT = os.path.dirname(__file__)
 TEST_DATA_DIR = os.path.join(APP_ROOT, "test_data")
 os.makedirs(TEST_DATA_DIR, exist_ok=True)
 
+discord_poller = DiscordPoller(DISCORD_POLL_SECONDS) if DISCORD_POLL_SECONDS > 0 else None
+
+# Summary pipelines run in the background; GET endpoints serve the latest result
+summary_scheduler = SummaryScheduler()
+summary_scheduler.register("news", analyze_discord_news_sentiment, get_news_sentiment_summary,
+                           SUMMARY_REFRESH_SECONDS.get("news", 0), output_path=news_sentiment_file)
+summary_scheduler.register("general", analyze_general_tweet_sentiment, get_general_sentiment_summary,
+                           SUMMARY_REFRESH_SECONDS.get("general", 0), output_path=general_sentiment_file)
+summary_scheduler.register("focus", analyze_coin_flow_and_sentiment, get_focus_sentiment_summary,
+                           SUMMARY_REFRESH_SECONDS.get("focus", 0), output_path=focus_sentiment_file)
 
+@app.on_event("startup")
+def start_background_ingestion():
+    if discord_poller:
+        discord_poller.start()
+    summary_scheduler.start()
+
+@app.on_event("shutdown")
+def stop_background_ingestion():
+    if discord_poller:
+        discord_poller.stop()
+    summary_scheduler.stop()
+    shutdown_executors()
 
 
 # ============================
@@ -87,8 +117,35 @@ def run_coin_finder_and_evaluate():
 def run_coin_finder_and_flow_evaluate():
     analyze_coin_flow_analysis()
     return {
-        "message": "Coin flow analysis completed. Charts and results saved."
+        "message": "Coin flow analysis completed and results saved. Charts render on request (/flows/chart)."
     }
+
+@app.get("/flows/series", tags=["Coin Flow Analysis"])
+def flow_series(coin: str = Query(..., description="Coin as written in flow messages, e.g. BTC"),
+    resolution: str = Query("1h", description="1m, 1h or 1d"),
+    last: int = Query(24, ge=1, le=1440)
+):
+    if resolution not in FLOW_RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {list(FLOW_RESOLUTIONS)}")
+    return get_flow_series().series(coin.strip().lstrip("$"), resolution, last)
+
+@app.get("/flows/chart", tags=["Coin Flow Analysis"])
+async def flow_chart(coin: str = Query(..., description="Coin from the last coin flow analysis, e.g. BTC")):
+    # rendered on first request, then served from the cache until the coin's flows change
+    path = await run_blocking("io", get_chart_service().get, coin.strip().lstrip("$").upper())
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No flow chart for '{coin}'; run the coin flow analysis first")
+    return FileResponse(path, media_type="image/png")
+
+@app.get("/flows/rolling", tags=["Coin Flow Analysis"])
+def flow_rolling(resolution: str = Query("1h", description="1m, 1h or 1d"),
+    window: int = Query(24, ge=1, le=1440)
+):
+    if resolution not in FLOW_RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {list(FLOW_RESOLUTIONS)}")
+    series = get_flow_series()
+    return {"resolution": resolution, "window": window, "latest": series.latest,
+            "coins": series.window_totals(resolution, window)}
 @app.get("/coin-sentiment", tags=["Search Sentiment"])
 async def coin_sentiment(
     coin: str = Query(..., description="Coin or keyword to search, e.g., 'Bitcoin' or '$SOL'"),
@@ -108,19 +165,16 @@ async def coin_sentiment(
 # =======================
 
 @app.get("/news-sentiment-summary", tags=["Summary"])
-def get_news_summary():
-    analyze_discord_news_sentiment()
-    return get_news_sentiment_summary()
+def get_news_summary(refresh: bool = Query(False, description="Start a background refresh of this summary")):
+    return summary_scheduler.serve("news", refresh=refresh)
 app.include_router(eval_news_router)   # this adds POST /evaluate/news to Swagger
 app.include_router(general_router)
 @app.get("/general-sentiment-summary", tags=["Summary"])
-def get_general_summary():
-    analyze_general_tweet_sentiment()
-    return get_general_sentiment_summary()
+def get_general_summary(refresh: bool = Query(False, description="Start a background refresh of this summary")):
+    return summary_scheduler.serve("general", refresh=refresh)
 @app.get("/focus-sentiment-summary", tags=["Summary"])
-def get_focus_summary():
-    analyze_coin_flow_and_sentiment()
-    return get_focus_sentiment_summary()
+def get_focus_summary(refresh: bool = Query(False, description="Start a background refresh of this summary")):
+    return summary_scheduler.serve("focus", refresh=refresh)
 
 # =======================
 # RAG Endpoints
@@ -133,9 +187,22 @@ def rag_refresh():
 
 @app.get("/rag/top", tags=["RAG"])
 def rag_get_top(k: int = Query(10, ge=1, le=50)):
-    if not rag_top(1):  # empty -> build once
-        build_rag_index()
-    return {"top": rag_top(k)}
+    snap = ensure_rag_index()  # empty -> build once (concurrent callers share the build)
+    return {"top": rag_top(k, snap), "version": snap.version, "updated_at": snap.built_at}
+
+@app.get("/rag/rank", tags=["RAG"])
+def rag_get_rank(sort_by: str = Query("score", description="score, confidence, flow_z, twitter_sent or another numeric field"),
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: str = Query(None, description="next_cursor from the previous page"),
+    fields: str = Query(None, description="Comma-separated fields, e.g. score,score_breakdown.flow_z"),
+    min_evidence: int = Query(0, ge=0)
+):
+    snap = ensure_rag_index()
+    wanted = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    try:
+        return rag_rank(sort_by, limit, cursor, wanted, min_evidence, snap)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/rag/explain", tags=["RAG"])
 async def rag_get_explain(coin: str = Query(..., description="Coin or ticker e.g. BTC, $BTC, Bitcoin"),
@@ -143,13 +210,12 @@ async def rag_get_explain(coin: str = Query(..., description="Coin or ticker e.g
 ):
     result = await available_coin_search(coin.strip(), max_results=max_results)
 
-    # ✅ Save exact Available-coin tallies for RAG
-    ingest_twitter_sentiment_cache(result)
+    # ✅ Save exact Available-coin tallies for RAG (blocking work runs off the event loop)
+    await run_blocking("io", ingest_twitter_sentiment_cache, result)
 
-    # (optional) update RAG immediately so /rag/explain reflects this run
-    build_rag_index()
-    if not rag_top(1):
-        build_rag_index()
+    # Apply this run's tallies to the in-memory index (incremental; a full build
+    # only happens when no index exists yet; plots are rendered in the background)
+    await run_blocking("cpu", update_rag_twitter, result)
     explain = rag_explain(coin)
 
     # 5) Attach the raw texts from this sentiment run directly into the response
@@ -6,18 +6,33 @@ import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-
 import aiohttp
 from configurations import config
+from services.dedup import cluster_texts, exact_key
+from services.executors import run_blocking
+from services.nltk_resources import get_vader
 
 # ------------------------ utils ------------------------
-def _ensure_vader():
-    try:
-        SentimentIntensityAnalyzer()
-    except Exception:
-        nltk.download("vader_lexicon", quiet=True)
+def _score_texts(texts: List[str]):
+    """
+    VADER compound per text -> (pos, neg, positive_texts, negative_texts).
+    Near-duplicate texts are scored once and counted once per member, so
+    pos/neg still count every mention; the text lists hold one text per cluster.
+    """
+    sia = get_vader()
+    clusters = cluster_texts(texts)
+    pos = neg = 0
+    positive_texts: List[str] = []
+    negative_texts: List[str] = []
+    for s, n in zip(clusters.representatives, clusters.counts):
+        c = sia.polarity_scores(s)["compound"]
+        if c > 0.25:
+            pos += n
+            positive_texts.append(s)
+        elif c < -0.25:
+            neg += n
+            negative_texts.append(s)
+    return pos, neg, positive_texts, negative_texts
 
 async def _maybe_await(x):
     return await x if inspect.isawaitable(x) else x
@@ -120,7 +135,7 @@ async def _socialdata_search_texts(
                 s = (t.get("full_text") or t.get("text") or "").strip()
                 if not s:
                     continue
-                k = s.lower()
+                k = exact_key(s)   # reposts differing only in case, links or spacing
                 if k not in seen:
                     seen.add(k)
                     texts.append(s)
@@ -160,7 +175,7 @@ async def _socialdata_get_texts_from_ids(session: aiohttp.ClientSession, ids: Li
         s = (data.get("full_text") or data.get("text") or "").strip()
         if not s:
             continue
-        k = s.lower()
+        k = exact_key(s)
         if k not in seen:
             seen.add(k)
             texts.append(s)
@@ -241,7 +256,7 @@ async def available_coin_search(query: str, max_results: int = 300) -> Dict[str,
     Fetch tweets via SocialData Tools (by tweet IDs or keyword search), run VADER sentiment,
     and return summary + bar image (base64).
     """
-    _ensure_vader()
+    await run_blocking("io", get_vader)   # loads the lexicon on first use only
 
     async with aiohttp.ClientSession() as session:
         try:
@@ -259,26 +274,13 @@ async def available_coin_search(query: str, max_results: int = 300) -> Dict[str,
                 "sample_texts": [f"error: {e}"]
             }
     clean_texts = [t for t in texts if not str(t).startswith("[debug]")]
-    # --- sentiment ---
-    sia = SentimentIntensityAnalyzer()
-    pos = neg = 0
-
-    positive_texts: List[str] = []
-    negative_texts: List[str] = []
-
-    for s in texts:
-        c = sia.polarity_scores(s)["compound"]
-        if c > 0.25:
-            pos += 1
-            positive_texts.append(s)
-        elif c < -0.25:
-            neg += 1
-            negative_texts.append(s)
+    # --- sentiment (scored and plotted off the event loop) ---
+    pos, neg, positive_texts, negative_texts = await run_blocking("cpu", _score_texts, texts)
 
     total = pos + neg
     pos_pct = round(100 * pos / total, 2) if total else 0.0
     neg_pct = round(100 * neg / total, 2) if total else 0.0
-    bar_b64 = _mk_bar_b64(pos, neg, total)
+    bar_b64 = await run_blocking("plot", _mk_bar_b64, pos, neg, total)
 
     max_samples_per_class = 5
 
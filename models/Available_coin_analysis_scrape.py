@@ -1,5 +1,5 @@
 # models/Available_coin_analysis_scraper.py
-import os, io, base64, json, re
+import os, io, base64, json
 from typing import Dict, Any, List, Tuple
 
 import matplotlib
@@ -7,10 +7,11 @@ matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
 import aiohttp
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
 
 from configurations import config
+from services.dedup import cluster_texts, exact_key
+from services.executors import run_blocking
+from services.nltk_resources import get_vader, vader_available
 
 # ===================== CONFIG =====================
 # Base URL of your FastAPI wrapper around twitter-cli-scraper.js
@@ -21,18 +22,6 @@ POS_THRESH = float(getattr(config, "VADER_POS_THRESH", 0.25))
 NEG_THRESH = float(getattr(config, "VADER_NEG_THRESH", -0.25))
 
 # ===================== VADER & PLOTTING =====================
-def _ensure_vader() -> bool:
-    try:
-        SentimentIntensityAnalyzer()
-        return True
-    except Exception:
-        try:
-            nltk.download("vader_lexicon", quiet=True)
-            SentimentIntensityAnalyzer()
-            return True
-        except Exception:
-            return False
-
 def _mk_bar_b64(pos: int, neg: int, total: int) -> str:
     fig, ax = plt.subplots(figsize=(8, 0.9), dpi=100)
     ax.axis("off")
@@ -55,12 +44,28 @@ def _mk_bar_b64(pos: int, neg: int, total: int) -> str:
     fig.savefig(buf, format="png", bbox_inches="tight", facecolor=fig.get_facecolor()); plt.close(fig)
     return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("utf-8")
 
-# ===================== HELPERS =====================
-def _normalize_text_for_dedup(s: str) -> str:
-    s = s or ""
-    s = re.sub(r"https?://\S+", "", s)
-    s = re.sub(r"\s+", " ", s).strip().lower()
-    return s
+def _score_texts(texts: List[str]) -> Tuple[int, int, int, List[str], List[str]]:
+    """
+    VADER compound per text -> (pos, neg, neu, positive_texts, negative_texts).
+    Near-duplicates are scored once but counted per member; the text lists
+    hold one text per cluster.
+    """
+    sia = get_vader()
+    clusters = cluster_texts(texts)
+    pos = neg = neu = 0
+    positive_texts: List[str] = []
+    negative_texts: List[str] = []
+    for s, n in zip(clusters.representatives, clusters.counts):
+        c = sia.polarity_scores(s)["compound"]
+        if c > POS_THRESH:
+            pos += n
+            positive_texts.append(s)
+        elif c < NEG_THRESH:
+            neg += n
+            negative_texts.append(s)
+        else:
+            neu += n
+    return pos, neg, neu, positive_texts, negative_texts
 
 # ===================== LOCAL FASTAPI BACKEND =====================
 async def _fetch_texts_via_local_fastapi(session: aiohttp.ClientSession, query: str, cap: int) -> Tuple[List[str], Dict[str, Any]]:
@@ -97,7 +102,7 @@ async def _fetch_texts_via_local_fastapi(session: aiohttp.ClientSession, query:
     seen = set()
     for t in tweets:
         s = t.get("text", "") or ""
-        key = _normalize_text_for_dedup(s)
+        key = exact_key(s)
         if s and key not in seen:
             seen.add(key)
             out.append(s)
@@ -118,7 +123,7 @@ async def available_coin_search(query: str, max_results: int = 300) -> Dict[str,
     Fetch tweets via your local FastAPI (/scrape), run VADER sentiment,
     and return summary + base64 bar image.
     """
-    vader_ok = _ensure_vader()
+    vader_ok = await run_blocking("io", vader_available)
     errors: List[str] = []
     diagnostics: Dict[str, Any] = {}
 
@@ -137,21 +142,12 @@ async def available_coin_search(query: str, max_results: int = 300) -> Dict[str,
     negative_texts: List[str] = []
 
     if vader_ok:
-        sia = SentimentIntensityAnalyzer()
-        for s in real_texts:
-            c = sia.polarity_scores(s)["compound"]
-            if c > POS_THRESH:
-                 pos += 1
-                 positive_texts.append(s)
-            elif c < NEG_THRESH:
-                neg += 1
-                negative_texts.append(s)
-            else: neu += 1
+        pos, neg, neu, positive_texts, negative_texts = await run_blocking("cpu", _score_texts, real_texts)
     else:
         neu = total
         errors.append("VADER lexicon unavailable; marked all neutral.")
     total = pos + neg
-    bar_b64 = _mk_bar_b64(pos, neg, total)
+    bar_b64 = await run_blocking("plot", _mk_bar_b64, pos, neg, total)
     pos_pct = round(100 * pos / total, 2) if total else 0.0
     neg_pct = round(100 * neg / total, 2) if total else 0.0
 
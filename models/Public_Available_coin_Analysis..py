@@ -6,8 +6,8 @@ from bs4 import BeautifulSoup
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+from services.nltk_resources import get_vader
 
 NITTER_MIRRORS = [
     "https://nitter.net",
@@ -19,12 +19,6 @@ NITTER_MIRRORS = [
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
 
-def _ensure_vader():
-    try:
-        SentimentIntensityAnalyzer()
-    except Exception:
-        nltk.download("vader_lexicon", quiet=True)
-
 def _extract_texts(soup: BeautifulSoup) -> List[str]:
     texts = []
     # common selectors across mirrors
@@ -122,11 +116,10 @@ def _bar_image(pos_pct: float, neg_pct: float, pos: int, neg: int, total: int) -
     return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("utf-8")
 
 def public_available_coin_search(query: str, max_results: int = 300) -> Dict[str, Any]:
-    _ensure_vader()
+    sia = get_vader()
     texts = _scrape_nitter(query, max_results)
 
     # sentiment
-    sia = SentimentIntensityAnalyzer()
     pos = neg = 0
     for s in texts:
         c = sia.polarity_scores(s)["compound"]
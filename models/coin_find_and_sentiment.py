@@ -1,26 +1,90 @@
-import re
 import json
 import os
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from collections import defaultdict
+import threading
+from collections import Counter, defaultdict
 from transformers import pipeline
 
+from configurations.config import FINBERT_CANDIDATE_BATCH_SIZE, FINBERT_CANDIDATE_CAP
 from extrctor.tweets_extractor import fetch_discord_messages
 from models.coin_finder import extract_coin_keywords_from_ner
-from services.tweet_converter import run_preprocessing_focus
+from services.coin_matcher import CoinMatcher
+from services.flow_parser import iter_flows
+from services.message_store import get_store
+from services.nltk_resources import get_vader
+from services.tweet_converter import dump_path, iter_preprocessed
 
 base_dir = os.path.dirname(__file__)
-nltk.download('vader_lexicon')
 
 # === FinBERT Setup ===
-finbert = pipeline("sentiment-analysis", model="ProsusAI/finbert")
+# loaded on first use: importing this module (the API does, and so does every spawned
+# process-pool worker that re-imports main.py) must not load the model
+_FINBERT = None
+_FINBERT_LOCK = threading.Lock()
+
+def get_finbert():
+    global _FINBERT
+    if _FINBERT is None:
+        with _FINBERT_LOCK:
+            if _FINBERT is None:
+                _FINBERT = pipeline("sentiment-analysis", model="ProsusAI/finbert")
+    return _FINBERT
+
 known_coin_names = {
     "ethereum", "bitcoin", "xrp", "solana", "ondo", "cronos",
     "binance", "picoin", "cardano", "cryptonews", "crypto",
     "litecoin", "whale", "finance", "transfer"
 }
 
+# Candidate scores are memoized in the message store's predictions table
+CANDIDATE_MODEL_KEY = "prosusai-finbert:candidate"
+CANDIDATE_ID_PREFIX = "candidate:"
+
+def _finbert_batch(names):
+    """FinBERT top label per name; None for names the pipeline failed on."""
+    finbert = get_finbert()
+    try:
+        return finbert(names, batch_size=len(names), truncation=True)
+    except Exception as e:
+        print(f"[finder] FinBERT batch of {len(names)} failed ({e!r}); scoring one by one")
+    out = []
+    for name in names:
+        try:
+            out.append(finbert(name)[0])
+        except Exception as e:
+            print(f"[finder] FinBERT failed on candidate {name!r}: {e!r}")
+            out.append(None)
+    return out
+
+def score_candidates(names, cap=FINBERT_CANDIDATE_CAP, batch_size=FINBERT_CANDIDATE_BATCH_SIZE):
+    """
+    name -> {"label", "score"} for candidate names, most important first.
+    Names scored on an earlier run come from the message store; at most
+    `cap` unseen names are scored per run, in length-grouped batches.
+    Failed names are not stored and are retried on the next run.
+    """
+    store = get_store()
+    ids = [CANDIDATE_ID_PREFIX + n for n in names]
+    missing = set(store.missing_predictions(ids, CANDIDATE_MODEL_KEY))
+    todo = [n for n, i in zip(names, ids) if i in missing]
+    if len(todo) > cap:
+        print(f"[finder] scoring {cap} of {len(todo)} new candidate names this run")
+        todo = todo[:max(0, cap)]
+
+    todo.sort(key=len)
+    for start in range(0, len(todo), batch_size):
+        chunk = todo[start:start + batch_size]
+        rows = [
+            (CANDIDATE_ID_PREFIX + name, str(res["label"]), [float(res["score"])])
+            for name, res in zip(chunk, _finbert_batch(chunk)) if res
+        ]
+        store.upsert_predictions(CANDIDATE_MODEL_KEY, rows)
+
+    stored = store.get_predictions(ids, CANDIDATE_MODEL_KEY)
+    return {
+        n: {"label": stored[i]["label"], "score": (stored[i]["probs"] or [0.0])[0]}
+        for n, i in zip(names, ids) if i in stored
+    }
+
 def analyze_verified_coin_sentiment_flow():
     # === Step 1: Run coin extraction and get the path ===
     extract_coin_keywords_from_ner()
@@ -33,11 +97,13 @@ def analyze_verified_coin_sentiment_flow():
 
     # === Extract all coin-like names (excluding numbers and known coins) ===
     potential_names = set()
+    name_mentions = Counter()
     for section in raw_data.values():
-        for name in section:
+        for name, cnt in section.items():
             name_clean = name.strip().lower()
             if name_clean not in known_coin_names and not name_clean.isdigit():
                 potential_names.add(name.strip())
+                name_mentions[name.strip()] += cnt
 
     # === Step 2: Fetch and preprocess focused messages ===
     channel_type = "focus_based"
@@ -45,46 +111,27 @@ def analyze_verified_coin_sentiment_flow():
     output_json_file = os.path.join(base_dir, "..", "test_data", "verified_sentiment_output_focus_group.json")
 
     fetch_discord_messages(channel_type, raw_json_file)
-    preprocessed_path = run_preprocessing_focus(input_path=raw_json_file)
-
-    with open(preprocessed_path, 'r', encoding='utf-8') as f:
-        tweets = json.load(f)
+    tweets = iter_preprocessed(raw_json_file, output_path=dump_path("preprocessed_data_focus.json"))
 
     # === Step 3: Initialize tools ===
-    flow_pattern = r'\$(\w+)\s*([+-])\$(\d+(?:\.\d+)?[KM]?)'
-    analyzer = SentimentIntensityAnalyzer()
+    analyzer = get_vader()
 
     coin_flows = defaultdict(list)
     coin_sentiments = defaultdict(list)
     coin_sentiment_scores = {}
+    coin_matcher = CoinMatcher(potential_names.union(known_coin_names))  # built once per run
 
     # === Step 4: Analyze tweets ===
     for tweet in tweets:
-        tweet_lower = tweet.lower()
-
-        # --- Check if tweet contains any known or potential coin name ---
-        matched_coins = [name for name in potential_names.union(known_coin_names) if name.lower() in tweet_lower]
+        # --- Check if tweet contains any known or potential coin name (whole words) ---
+        matched_coins = coin_matcher.find(tweet)
         if not matched_coins:
             continue
 
         # --- Flow Extraction ---
-        for coin, sign, value_str in re.findall(flow_pattern, tweet):
-            if coin.lower() not in known_coin_names:
-                continue
-
-            if value_str.endswith('K'):
-                multiplier, numeric = 1_000, value_str[:-1]
-            elif value_str.endswith('M'):
-                multiplier, numeric = 1_000_000, value_str[:-1]
-            else:
-                multiplier, numeric = 1, value_str
-
-            try:
-                val = float(numeric) * multiplier
-                net = val if sign == '+' else -val
+        for coin, net in iter_flows(tweet):
+            if coin.lower() in known_coin_names:
                 coin_flows[coin].append(net)
-            except ValueError:
-                continue
 
         # --- Sentiment Analysis ---
         sentiment_score = analyzer.polarity_scores(tweet)['compound']
@@ -95,15 +142,12 @@ def analyze_verified_coin_sentiment_flow():
     aggregated_flows = {coin: sum(vals) for coin, vals in coin_flows.items()}
     averaged_sentiments = {coin: sum(scores) / len(scores) for coin, scores in coin_sentiments.items() if scores}
 
-    # === Step 6: Evaluate potential coin names using FinBERT ===
+    # === Step 6: Evaluate potential coin names using FinBERT (batched, memoized; most mentioned first) ===
+    ranked_names = sorted(potential_names, key=lambda n: (-name_mentions[n], n))
     finbert_potentials = {}
-    for name in potential_names:
-        try:
-            result = finbert(name)[0]
-            if result['label'].lower() == 'positive' and result['score'] > 0.85:
-                finbert_potentials[name] = result['score']
-        except Exception as e:
-            continue
+    for name, result in score_candidates(ranked_names).items():
+        if result['label'].lower() == 'positive' and result['score'] > 0.85:
+            finbert_potentials[name] = result['score']
 
     # === Step 7: Save Output ===
     output = {
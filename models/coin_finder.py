@@ -2,17 +2,12 @@ import json
 import os
 import re
 from collections import Counter, defaultdict
-import nltk
-from nltk.corpus import stopwords
-from nltk import word_tokenize, pos_tag
 
+from configurations.config import NER_BATCH_SIZE
 from extrctor.tweets_extractor import fetch_discord_messages
 from model_loader.berta_models import load_deberta_ner_model
-from services.tweet_converter import run_preprocessing_news
-
-nltk.download('punkt')
-nltk.download('averaged_perceptron_tagger')
-nltk.download('stopwords')
+from services.nltk_resources import get_stopwords, pos_tag_texts
+from services.tweet_converter import dump_path, iter_preprocessed
 
 base_dir = os.path.dirname(__file__)
 
@@ -32,22 +27,47 @@ known_coin_names = {
 # Normalize known names once (case-insensitive match)
 KNOWN_COIN_NAMES_LOWER = {n.lower() for n in known_coin_names}
 
+NER_GROUPS = ('ORG', 'PRODUCT', 'PER', 'MISC')
+NOUN_TAGS = ('NN', 'NNS', 'NNP', 'NNPS')
+
+def _ner_keywords_batched(ner_pipeline, texts, batch_size=NER_BATCH_SIZE):
+    """
+    NER keywords per text, in input order. Texts are sorted by length and run
+    through the pipeline batch_size at a time, so each forward pass pads to
+    similar lengths instead of one pass per tweet.
+    """
+    out = [[] for _ in texts]
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        results = ner_pipeline([texts[i] for i in idx], batch_size=len(idx))
+        if len(idx) == 1 and (not results or isinstance(results[0], dict)):
+            results = [results]   # some pipeline versions unwrap single-item batches
+        for i, ents in zip(idx, results):
+            out[i] = [ent['word'] for ent in ents if ent.get('entity_group') in NER_GROUPS]
+    return out
+
+def _pos_keywords_bulk(texts, stop_words):
+    """Noun-ish, non-stopword tokens per text; all texts tagged in one call with the shared tagger."""
+    tagged = pos_tag_texts(texts)
+    return [
+        [w for w, tag in tags if tag in NOUN_TAGS and w.lower() not in stop_words]
+        for tags in tagged
+    ]
+
 def extract_coin_keywords_from_ner():
     # === Load tools ===
     ner_pipeline = load_deberta_ner_model()
-    stop_words = set(stopwords.words('english'))
+    stop_words = get_stopwords()
 
     # === File paths ===
     channel_type = "finder"
     raw_json_file = os.path.join(base_dir, "..", "test_data", "raw_news_messages.json")
     output_json_file = os.path.join(base_dir, "..", "test_data", "coin_keywords_extracted.json")
 
-    # === Fetch and preprocess ===
+    # === Fetch and preprocess (texts cached per message id, no intermediate file) ===
     fetch_discord_messages(channel_type, raw_json_file)
-    preprocessed_path = run_preprocessing_news(input_path=raw_json_file)
-
-    with open(preprocessed_path, 'r', encoding='utf-8') as f:
-        tweets = [line.strip() for line in f if line.strip()]
+    tweets = iter_preprocessed(raw_json_file, output_path=dump_path("preprocessed_data_news.json"))
 
     # === Analyze per tweet ===
     coin_keyword_collector = defaultdict(list)  # coin -> [keywords...]
@@ -67,35 +87,25 @@ def extract_coin_keywords_from_ner():
             return ""
         return w
 
+    # only tweets carrying $TICKER-like tokens (alnum/underscore) are analyzed
+    candidates = []
     for tweet in tweets:
-        # capture $TICKER-like tokens (alnum/underscore)
         coins_found = re.findall(r'\$(\w+)', tweet)
-        if not coins_found:
-            continue
+        if coins_found:
+            candidates.append((tweet, coins_found))
+    texts = [t for t, _ in candidates]
+
+    # batched NER and bulk POS over the candidates, merged back per tweet
+    ner_keywords = _ner_keywords_batched(ner_pipeline, texts)
+    pos_keywords = _pos_keywords_bulk(texts, stop_words)
 
+    for (_, coins_found), ner_kws, pos_kws in zip(candidates, ner_keywords, pos_keywords):
         # count coins (normalized to UPPER for consistency)
         for c in coins_found:
             coin_counts[c.upper()] += 1
 
-        # NER keywords
-        ner_results = ner_pipeline(tweet)
-        ner_keywords = [
-            ent['word']
-            for ent in ner_results
-            if ent.get('entity_group') in ['ORG', 'PRODUCT', 'PER', 'MISC']
-        ]
-
-        # POS keywords (only noun-ish, not stopwords)
-        words = word_tokenize(tweet)
-        pos_tags = pos_tag(words)
-        pos_keywords = [
-            w for w, tag in pos_tags
-            if tag in ('NN', 'NNS', 'NNP', 'NNPS')
-            and w.lower() not in stop_words
-        ]
-
         # clean + filter noise
-        raw_keywords = ner_keywords + pos_keywords
+        raw_keywords = ner_kws + pos_kws
         filtered_keywords = []
         for w in raw_keywords:
             w = clean_kw(w)
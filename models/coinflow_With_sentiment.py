@@ -1,18 +1,18 @@
 import re
 import json
 import os
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
 from collections import Counter
 
 from extrctor.tweets_extractor import fetch_discord_messages
-from services.tweet_converter import run_preprocessing_general, run_preprocessing_focus
+from services.flow_series import get_flow_series
+from services.nltk_resources import get_vader
+from services.tweet_converter import dump_path, iter_preprocessed_rows
 
 base_dir = os.path.dirname(__file__)
 
 def analyze_coin_flow_and_sentiment():
-    # === Step 1: Ensure VADER is available ===
-    nltk.download('vader_lexicon')
+    # === Step 1: Shared VADER analyzer (local NLTK data; fails fast if missing) ===
+    analyzer = get_vader()
 
     # === Step 2: Define file paths and fetch messages ===
     channel_type = "focus_based"
@@ -20,47 +20,28 @@ def analyze_coin_flow_and_sentiment():
     output_json_file = os.path.join(base_dir, "..", "test_data", "sentiment_output_for_coin_finder.json")
 
     fetch_discord_messages(channel_type, raw_json_file)
-    preprocessed_path = run_preprocessing_focus(input_path=raw_json_file)
 
-    # === Step 3: Load preprocessed tweets ===
-    with open(preprocessed_path, 'r', encoding='utf-8') as f:
-        tweets = json.load(f)
-
-    # === Step 4: Initialize tools ===
-    flow_pattern = r'\$(\w+)\s*([+-])\$(\d+(?:\.\d+)?[KM]?)'
+    # === Step 3: Initialize tools ===
     coin_pattern = r'\$(\w+)'
-    analyzer = SentimentIntensityAnalyzer()
-
-    coin_data = {}
     sentiment_data = {}
 
-    # === Step 5: Process each tweet ===
-    for tweet in tweets:
-        # --- Coin Flow Extraction ---
-        for coin, sign, value_str in re.findall(flow_pattern, tweet):
-            if value_str.endswith('K'):
-                multiplier, numeric = 1_000, value_str[:-1]
-            elif value_str.endswith('M'):
-                multiplier, numeric = 1_000_000, value_str[:-1]
-            else:
-                multiplier, numeric = 1, value_str
-
-            try:
-                val = float(numeric) * multiplier
-            except ValueError:
-                continue
-
-            net = val if sign == '+' else -val
-            coin_data.setdefault(coin, []).append(net)
-
-        # --- Sentiment Analysis ---
+    def score_sentiment(tweet: str):
         coins = re.findall(coin_pattern, tweet)
         if coins:
             score = analyzer.polarity_scores(tweet)['compound']
             for coin in coins:
                 sentiment_data.setdefault(coin, []).append(score)
 
+    # === Step 4-5: One preprocessing pass feeds flows and sentiment ===
+    # (messages already in the flow series by id are skipped; no preprocessed file unless a dump dir is set)
+    flows = get_flow_series().collector()
+    rows = iter_preprocessed_rows(raw_json_file, output_path=dump_path("preprocessed_data_focus.json"))
+    for message_id, posted, tweet in rows:
+        flows(tweet, message_id, posted)
+        score_sentiment(tweet)
+
     # === Step 6: Aggregate results ===
+    coin_data = flows.batch.by_coin()
     aggregated_flows = {coin: sum(vals) for coin, vals in coin_data.items()}
     averaged_sentiment = {
         coin: sum(scores) / len(scores)
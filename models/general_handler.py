@@ -2,12 +2,17 @@
 import os
 import json
 import datetime
-from typing import List, Dict, Tuple, Optional, Union
+import functools
+from typing import List, Dict, Tuple, Optional, Union, Iterable, Iterator
 
 import pandas as pd
 from extrctor.tweets_extractor import fetch_discord_messages
 from model_loader.berta_models import load_deberta_sentiment_model
-from services.tweet_converter import run_preprocessing_general
+from services.tweet_converter import preprocess_channel
+from configurations.config import PREDICT_CHUNK_SIZE
+from services.dedup import cluster_texts, exact_key
+from services.message_store import get_store
+from services.json_stream import JsonArrayWriter, batched, iter_json_items, iter_texts
 
 from sklearn.metrics import (
     accuracy_score,
@@ -30,6 +35,9 @@ os.makedirs(TEST_DATA_DIR, exist_ok=True)
 # Canonical label order (twitter-roberta-base-sentiment)
 LABELS = ["negative", "neutral", "positive"]
 
+# Key for cached predictions in the message store
+MODEL_KEY = "cardiffnlp/twitter-roberta-base-sentiment"
+
 
 # -------------------------------
 # Visualization & summary outputs
@@ -192,6 +200,64 @@ def _predict_with_probs(hf_pipeline, texts: List[str]) -> Tuple[List[str], List[
     return preds, probs_all
 
 
+def _predict_deduped(load_model, texts: List[str],
+                     memo: Optional[Dict[bytes, Tuple[str, List[float]]]] = None
+                     ) -> Tuple[List[str], List[List[float]]]:
+    """
+    _predict_with_probs with exact and near-duplicate texts (reposts, bot
+    alerts) scored once; every member gets its cluster's prediction.
+    `memo` (exact text key -> prediction) carries results across calls, so
+    reposts in later chunks are not scored again. The model is loaded only
+    if something is left to score.
+    """
+    memo = {} if memo is None else memo
+    keys = [exact_key(t) for t in texts]
+    todo = [i for i, k in enumerate(keys) if k not in memo]
+    if todo:
+        clusters = cluster_texts(texts[i] for i in todo)
+        preds, probs = _predict_with_probs(load_model(), clusters.representatives)
+        for i, pred, pr in zip(todo, clusters.expand(preds), clusters.expand(probs)):
+            memo.setdefault(keys[i], (pred, pr))
+    return [memo[k][0] for k in keys], [memo[k][1] for k in keys]
+
+
+def _predict_incremental(message_ids: List[str], texts: List[str],
+                         load_model=load_deberta_sentiment_model,
+                         memo: Optional[Dict[bytes, Tuple[str, List[float]]]] = None
+                         ) -> Tuple[List[str], List[List[float]]]:
+    """
+    Score only messages without a stored prediction for MODEL_KEY and read
+    the rest back from the message store.
+    """
+    store = get_store()
+    todo = set(store.missing_predictions(message_ids, MODEL_KEY))
+    if todo:
+        idx = [i for i, mid in enumerate(message_ids) if mid in todo]
+        preds, probs = _predict_deduped(load_model, [texts[i] for i in idx], memo)
+        store.upsert_predictions(MODEL_KEY, [(message_ids[i], p, pr) for i, p, pr in zip(idx, preds, probs)])
+    cached = store.get_predictions(message_ids, MODEL_KEY)
+    return [cached[m]["label"] for m in message_ids], [cached[m]["probs"] for m in message_ids]
+
+
+def _iter_scored(chunks: Iterable[List[Tuple[Optional[str], str]]]) -> Iterator[Tuple[str, str, List[float]]]:
+    """
+    (text, label, probs) for chunks of (message_id, text) rows, scored one
+    chunk at a time. Chunks with message ids go through the message store;
+    the model is loaded once, when first needed. Predictions are shared by
+    exact text across chunks (and near-duplicates within a chunk).
+    """
+    load_model = functools.lru_cache(maxsize=1)(load_deberta_sentiment_model)
+    memo: Dict[bytes, Tuple[str, List[float]]] = {}
+    for rows in chunks:
+        message_ids = [mid for mid, _ in rows]
+        texts = [text for _, text in rows]
+        if all(message_ids):
+            preds, probs = _predict_incremental(message_ids, texts, load_model, memo)
+        else:
+            preds, probs = _predict_deduped(load_model, texts, memo)
+        yield from zip(texts, preds, probs)
+
+
 # -----------------------
 # Evaluation (classification)
 # -----------------------
@@ -252,52 +318,42 @@ def analyze_general_tweet_sentiment(
       - {output_dir}/sentiment_output_general.json  (per-text predictions)
       - {output_dir}/sentiment_metrics_general.json (when GT provided)
       - {output_dir}/evaluation_general/results/*   (CSV, HTML, Confusion Matrix PNG)
+    Without a preprocessed JSON path, texts and predictions go through the
+    message store and only unseen messages are preprocessed and scored.
     """
     os.makedirs(output_dir, exist_ok=True)
-    raw_json_file = os.path.join(output_dir, "raw_general_messages.json")
     preds_json_file = os.path.join(output_dir, "sentiment_output_general.json")
     metrics_json_file = os.path.join(output_dir, "sentiment_metrics_general.json")
 
-    # === Load preprocessed texts ===
+    # === Stream texts (dict or str items) → predict in chunks → save predictions ===
     if use_preprocessed_json_path:
-        with open(use_preprocessed_json_path, "r", encoding="utf-8") as f:
-            tweets = json.load(f)
+        texts = iter_texts(iter_json_items(use_preprocessed_json_path))
+        rows = ((None, text) for text in texts)
     else:
-        fetch_discord_messages(channel_type, raw_json_file)
-        preprocessed_path = run_preprocessing_general(input_path=raw_json_file)
-        with open(preprocessed_path, "r", encoding="utf-8") as f:
-            tweets = json.load(f)
+        fetch_discord_messages(channel_type)
+        rows = preprocess_channel(channel_type)
+    scored = _iter_scored(batched(rows, PREDICT_CHUNK_SIZE))
 
-    # Extract plain texts (handle dict or str)
+    # texts and predictions are only held in memory when needed for GT alignment
+    keep = bool(ground_truth_path)
     tweet_texts: List[str] = []
-    for item in tweets:
-        if isinstance(item, dict) and "text" in item:
-            tweet_texts.append(str(item["text"]))
-        elif isinstance(item, str):
-            tweet_texts.append(item)
-
-    if not tweet_texts:
-        raise ValueError("No texts found to analyze for general channel.")
-
-    # === Load sentiment model (DeBERTa/Twitter-RoBERTa sentiment) ===
-    sentiment_pipeline = load_deberta_sentiment_model()  # should create pipeline(..., top_k=None) internally if you updated it
-    # If not, we still pass top_k=None in _predict_with_probs when calling
-
-    # === Predict labels + probs ===
-    y_pred, probs = _predict_with_probs(sentiment_pipeline, tweet_texts)
-
-    # === Save predictions ===
-    pred_rows = []
-    for text, lab, pr in zip(tweet_texts, y_pred, probs):
-        pred_rows.append({
-            "text": text,
-            "predicted_label": lab.upper(),
-            "prob_negative": pr[0],
-            "prob_neutral": pr[1],
-            "prob_positive": pr[2],
-        })
-    with open(preds_json_file, "w", encoding="utf-8") as f:
-        json.dump(pred_rows, f, indent=2, ensure_ascii=False)
+    y_pred: List[str] = []
+    probs: List[List[float]] = []
+    with JsonArrayWriter(preds_json_file, indent=2, ensure_ascii=False) as out:
+        for text, lab, pr in scored:
+            out.write({
+                "text": text,
+                "predicted_label": lab.upper(),
+                "prob_negative": pr[0],
+                "prob_neutral": pr[1],
+                "prob_positive": pr[2],
+            })
+            if keep:
+                tweet_texts.append(text)
+                y_pred.append(lab)
+                probs.append(pr)
+        if out.count == 0:
+            raise ValueError("No texts found to analyze for general channel.")
 
     # === If no ground-truth → stop here ===
     if not ground_truth_path:
@@ -1,4 +1,4 @@
-import json
+from services.json_stream import iter_json_items, write_json_array
 
 def extract_text(tweet):
     text = tweet.get("content", "")
@@ -11,10 +11,6 @@ def extract_text(tweet):
     return text.strip()
 
 def preprocess_data(input_path, output_path):
-    with open(input_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    texts = [extract_text(tweet) for tweet in data]
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(texts, f, indent=2)
+    # streamed message by message; the output file is the same as json.dump(texts, f, indent=2)
+    texts = (extract_text(tweet) for tweet in iter_json_items(input_path))
+    write_json_array(output_path, texts, indent=2)
@@ -1,16 +1,15 @@
 import os
-import json
+from itertools import islice
+
+from services.json_stream import iter_json_items
 
 base_dir = os.path.dirname(__file__)
 general_sentiment_file = os.path.join(base_dir, "..", "test_data", "sentiment_output_general.json")
 
 def get_general_sentiment_summary():
     try:
-        with open(general_sentiment_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # Take last 8 messages
-        last_msgs = data[:20] if len(data) >= 8 else data
+        # Only the first 20 predictions are parsed, however large the file
+        last_msgs = list(islice(iter_json_items(general_sentiment_file), 20))
 
         # Sentiment to score mapping
         sentiment_scores = {
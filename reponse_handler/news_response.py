@@ -1,16 +1,15 @@
 import os
-import json
+from itertools import islice
+
+from services.json_stream import iter_json_items
 
 base_dir = os.path.dirname(__file__)
 news_sentiment_file = os.path.join(base_dir, "..", "test_data", "sentiment_output_for_news.json")
 
 def get_news_sentiment_summary():
     try:
-        with open(news_sentiment_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # Extract last 8 messages
-        last_msgs = data[:20] if len(data) >= 8 else data
+        # Only the first 20 predictions are parsed, however large the file
+        last_msgs = list(islice(iter_json_items(news_sentiment_file), 20))
 
         # Map sentiments to numerical scores
         sentiment_scores = {
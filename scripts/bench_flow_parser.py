@@ -0,0 +1,98 @@
+# scripts/bench_flow_parser.py
+"""
+Coin-flow parsing benchmark: the per-tweet re.findall + K/M loop the flow
+analyses used to copy vs services/flow_parser.parse_flows.
+
+Messages come from test_data/preprocessed_data1.json (objects are parsed as
+their JSON text, like scripts/deberta_model.py does), repeated --copies
+times. That file has no "$COIN +$1.5M" flows, so --inject adds one to that
+fraction of the messages to exercise the match path. Injected values only
+use K/M suffixes, so both parsers must return the same flows.
+
+Usage (from the repo root):
+    PYTHONPATH=. python scripts/bench_flow_parser.py --copies 1000 --inject 0.3
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import re
+import time
+
+from services.flow_parser import parse_flows
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), "..", "test_data", "preprocessed_data1.json")
+LEGACY_PATTERN = r'\$(\w+)\s*([+-])\$(\d+(?:\.\d+)?[KM]?)'
+
+
+def _load_texts(path: str, copies: int, inject: float, seed: int):
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    base = [t if isinstance(t, str) else json.dumps(t) for t in items]
+    rnd = random.Random(seed)
+    coins = ["BTC", "ETH", "SOL", "XRP", "ONDO", "PEPE", "ARB", "LINK"]
+    texts = []
+    for _ in range(copies):
+        for t in base:
+            if rnd.random() < inject:
+                value = f"{rnd.uniform(0.1, 999):.2f}{rnd.choice(['', 'K', 'M'])}"
+                t = f"{t} ${rnd.choice(coins)} {rnd.choice('+-')}${value}"
+            texts.append(t)
+    return texts
+
+
+def _legacy(texts):
+    coin_data = {}
+    for tweet in texts:
+        for coin, sign, value_str in re.findall(LEGACY_PATTERN, tweet):
+            if value_str.endswith('K'):
+                multiplier, numeric = 1_000, value_str[:-1]
+            elif value_str.endswith('M'):
+                multiplier, numeric = 1_000_000, value_str[:-1]
+            else:
+                multiplier, numeric = 1, value_str
+            try:
+                val = float(numeric) * multiplier
+            except ValueError:
+                continue
+            coin_data.setdefault(coin, []).append(val if sign == '+' else -val)
+    return coin_data
+
+
+def _engine(texts):
+    return parse_flows(texts).by_coin()
+
+
+def _time(fn, *args, repeat: int):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main(args) -> int:
+    texts = _load_texts(args.data, args.copies, args.inject, args.seed)
+    mb = sum(len(t) for t in texts) / 1e6
+    t_l, a = _time(_legacy, texts, repeat=args.repeat)
+    t_e, b = _time(_engine, texts, repeat=args.repeat)
+    flows = sum(len(v) for v in b.values())
+    ok = a == b
+    print(f"{len(texts)} messages, {mb:.1f}M chars, {flows} flows")
+    print(f"legacy   {t_l*1000:8.1f}ms  {len(texts)/t_l:12,.0f} msg/s  {mb/t_l:7.1f}M chars/s")
+    print(f"engine   {t_e*1000:8.1f}ms  {len(texts)/t_e:12,.0f} msg/s  {mb/t_e:7.1f}M chars/s  "
+          f"speedup x{t_l / t_e:4.1f}  {'OK' if ok else 'PARITY FAILED'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--data", default=DATA_FILE)
+    ap.add_argument("--copies", type=int, default=1000)
+    ap.add_argument("--inject", type=float, default=0.3)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    raise SystemExit(main(ap.parse_args()))
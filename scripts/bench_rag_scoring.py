@@ -0,0 +1,120 @@
+# scripts/bench_rag_scoring.py
+"""
+RAG scoring benchmark: scalar per-coin path vs the vectorized numpy engine.
+
+Builds synthetic raw profiles (arbitrary query keys, as indexed through
+_norm_query_key) and times robust scaling + scoring both ways, then checks
+that the two produce the same profiles. The "engine" column is the columnar
+part alone (packing, scaling, scoring) without building profile dicts. Scores must agree within --tol;
+every other profile field must match exactly.
+
+Usage (from the repo root):
+    PYTHONPATH=. python scripts/bench_rag_scoring.py --sizes 10000 100000
+"""
+import argparse
+import gc
+import random
+import time
+
+from weight_handler import rag_system as rs
+
+
+def _synthetic_raws(n: int, seed: int):
+    rnd = random.Random(seed)
+    raws = {}
+    for i in range(n):
+        r = rs._new_raw_profile()
+        if rnd.random() < 0.4:
+            r["news_sent"] = rnd.uniform(-1, 1)
+        if rnd.random() < 0.3:
+            r["general_sent"] = rnd.choice([-1.0, 0.0, 1.0, rnd.uniform(-1, 1)])
+        if rnd.random() < 0.2:
+            r["focus_sent"] = rnd.uniform(-1, 1)
+        r["flow"] = rnd.lognormvariate(8, 3) * rnd.choice([-1, 1]) if rnd.random() < 0.5 else 0.0
+        r["mentions"] = float(rnd.randint(0, 500)) if rnd.random() < 0.6 else 0.0
+        if rnd.random() < 0.5:
+            r["twitter_pos"] = rnd.randint(0, 300)
+            r["twitter_neg"] = rnd.randint(0, 300)
+            r["twitter_total"] = r["twitter_pos"] + r["twitter_neg"] + rnd.randint(0, 50)
+        r["sources"] = ["coin_flow"]
+        raws[f"Q{i:07d}_{rnd.randint(0, 1 << 30):X}"] = r
+    return raws
+
+
+def _scalar(raws, weights):
+    class _Stats:
+        def __init__(self, vals):
+            self.xs = sorted(vals)
+            self.params = rs._robust_params(self.xs)
+
+        def z(self, v):
+            lo, hi, med, mad = self.params
+            return (min(max(v, lo), hi) - med) / (1.4826 * mad)
+
+    fs = _Stats(v["flow"] for v in raws.values())
+    ms = _Stats(v["mentions"] for v in raws.values())
+    return {c: rs._score_profile(c, v, fs.z(v["flow"]), ms.z(v["mentions"]), weights) for c, v in raws.items()}
+
+
+def _vector(raws, weights):
+    fs = rs._RobustStats({c: v["flow"] for c, v in raws.items()})
+    ms = rs._RobustStats({c: v["mentions"] for c, v in raws.items()})
+    return rs._score_all(raws, fs, ms, weights)
+
+
+def _engine(raws, weights):
+    # columnar part only: packing, scaling and scoring, no profile dicts
+    fs = rs._RobustStats({c: v["flow"] for c, v in raws.items()})
+    ms = rs._RobustStats({c: v["mentions"] for c, v in raws.items()})
+    batch = rs.rag_scoring.pack_profiles(raws)
+    return rs.rag_scoring.score_batch(batch, fs.params, ms.params, weights)
+
+
+def _compare(a, b, tol: float):
+    worst = 0.0
+    mismatches = 0
+    for coin, va in a.items():
+        vb = b[coin]
+        worst = max(worst, abs(va["score"] - vb["score"]))
+        if {k: x for k, x in va.items() if k != "score"} != {k: x for k, x in vb.items() if k != "score"}:
+            mismatches += 1
+    return worst, mismatches, worst <= tol and mismatches == 0
+
+
+def _time(fn, *args, repeat: int):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main(args) -> int:
+    if not rs._HAS_NP:
+        print("numpy not available: only the scalar path can run")
+        return 1
+    rs._DYN_MODEL = None  # benchmark static-weight scoring
+    weights = rs.DEFAULT_WEIGHTS
+    ok_all = True
+    for n in args.sizes:
+        raws = _synthetic_raws(n, args.seed)
+        t_s, a = _time(_scalar, raws, weights, repeat=args.repeat)
+        t_v, b = _time(_vector, raws, weights, repeat=args.repeat)
+        t_e, _ = _time(_engine, raws, weights, repeat=args.repeat)
+        worst, mismatches, ok = _compare(a, b, args.tol)
+        ok_all &= ok
+        print(f"n={n:>7}: scalar {t_s*1000:8.1f}ms  vectorized {t_v*1000:8.1f}ms "
+              f"(engine {t_e*1000:6.1f}ms)  speedup x{t_s / t_v:4.1f}  max|dscore|={worst:.2e}  mismatches={mismatches}  "
+              f"{'OK' if ok else 'PARITY FAILED'}")
+    return 0 if ok_all else 1
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--tol", type=float, default=1e-9)
+    raise SystemExit(main(ap.parse_args()))
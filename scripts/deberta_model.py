@@ -3,6 +3,8 @@ import os
 import re
 from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
 
+from services.flow_parser import parse_flows
+
 # --- Step 1: Load the Tweets ---
 
 # Absolute path to your tweets JSON file.
@@ -14,45 +16,16 @@ with open(tweets_file, 'r', encoding='utf-8') as f:
 print("Loaded", len(tweets), "tweets successfully.")
 
 # --- Step 2: Extract Coin Flow Data ---
-# Define a regex pattern that extracts:
-#   1. The coin name (following a '$')
-#   2. The sign of the price change ([+-])
-#   3. The numeric value with an optional K (thousands) or M (millions) suffix.
-flow_pattern = r'\$(\w+)\s*([+-])\$(\d+(?:\.\d+)?[KM]?)'
-
-# Dictionaries to store detailed coin flows and aggregated texts for sentiment.
-coin_price_data = {}
+# Flows ($COIN +$1.5M style, see services/flow_parser.py) are parsed from each
+# whole tweet object (converted to string) in one pass.
+coin_price_data = parse_flows(json.dumps(tweet) for tweet in tweets).by_coin()
+
+# Aggregated texts per coin for sentiment.
 coin_texts = {}
 
 # Iterate through each tweet.
-# (Assuming each tweet is a JSON object. For coin flows, we search the tweet string.
-#  For sentiment analysis, we search within tweet embeds.)
+# (Assuming each tweet is a JSON object. For sentiment analysis, we search within tweet embeds.)
 for tweet in tweets:
-    # Extract coin flow information using the regex (from the tweet content if available).
-    # If your tweets are strings directly, use tweet. If they are objects, adjust accordingly.
-    # Here, we try to extract from the entire tweet (converted to string).
-    tweet_str = json.dumps(tweet)
-    flow_matches = re.findall(flow_pattern, tweet_str)
-    for coin, sign, value_str in flow_matches:
-        # Determine multiplier based on suffix.
-        multiplier = 1
-        if value_str.endswith('K'):
-            multiplier = 1_000
-            numeric_part = value_str[:-1]
-        elif value_str.endswith('M'):
-            multiplier = 1_000_000
-            numeric_part = value_str[:-1]
-        else:
-            numeric_part = value_str
-        try:
-            numeric_value = float(numeric_part) * multiplier
-        except ValueError:
-            continue  # Skip if conversion fails.
-        # Apply the sign.
-        numeric_value = numeric_value if sign == '+' else -numeric_value
-        # Append value to the coin's list.
-        coin_price_data.setdefault(coin, []).append(numeric_value)
-
     # Extract textual information from tweet embeds (if any).
     if 'embeds' in tweet and tweet['embeds']:
         for embed in tweet['embeds']:
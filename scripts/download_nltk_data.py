@@ -1,5 +1,25 @@
-import nltk
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('averaged_perceptron_tagger')
-nltk.download('vader_lexicon')
+# scripts/download_nltk_data.py
+"""
+One-time setup: fetch the NLTK data the app uses (tokenizer, stopwords,
+POS tagger, VADER lexicon) into NLTK_DATA_DIR (default: ./nltk_data).
+The app only reads that directory and never downloads at runtime.
+
+Usage (from the repo root):
+    PYTHONPATH=. python scripts/download_nltk_data.py [--dir PATH]
+"""
+import argparse
+
+from configurations.config import NLTK_DATA_DIR
+from services.nltk_resources import RESOURCES, download_all, has_resource
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dir", default=NLTK_DATA_DIR)
+    args = ap.parse_args()
+
+    failed = download_all(args.dir)
+    if failed:
+        print("Failed to download:", ", ".join(failed))
+    missing = [name for name in RESOURCES if not has_resource(name)]
+    print(f"NLTK data in {args.dir}: " + ("complete" if not missing else "missing " + ", ".join(missing)))
+    raise SystemExit(1 if missing else 0)
@@ -0,0 +1,90 @@
+# scripts/loadtest_event_loop.py
+"""
+Event-loop starvation load test.
+
+Fires concurrent /rag/explain (and /coin-sentiment) requests at a running API
+while probing a cheap endpoint that is served on the event loop
+(/openapi.json). If blocking work runs on the loop, probe latency climbs to
+the duration of the heavy requests; with the executor layer it stays flat.
+
+Usage (API started with `uvicorn main:app --port 8000`):
+    python scripts/loadtest_event_loop.py --base http://127.0.0.1:8000 --coin BTC --concurrency 8
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+
+async def _heavy(session: aiohttp.ClientSession, base: str, path: str, coin: str, rounds: int, durations: list):
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        try:
+            async with session.get(f"{base}{path}", params={"coin": coin, "max_results": 20}) as resp:
+                await resp.read()
+        except Exception as e:
+            print(f"heavy request failed: {type(e).__name__}: {e}")
+        durations.append(time.perf_counter() - t0)
+
+
+async def _probe(session: aiohttp.ClientSession, base: str, stop: asyncio.Event, latencies: list, interval: float):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        async with session.get(f"{base}/openapi.json") as resp:
+            await resp.read()
+        latencies.append(time.perf_counter() - t0)
+        await asyncio.sleep(interval)
+
+
+def _pct(xs, p):
+    if not xs:
+        return float("nan")
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+
+async def main(args):
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        # baseline probe latency with no load
+        idle: list = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(session, args.base, stop, idle, args.probe_interval))
+        await asyncio.sleep(2.0)
+        stop.set(); await probe
+
+        loaded: list = []
+        durations: list = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(session, args.base, stop, loaded, args.probe_interval))
+        t0 = time.perf_counter()
+        await asyncio.gather(*(
+            _heavy(session, args.base, args.path, args.coin, args.rounds, durations)
+            for _ in range(args.concurrency)
+        ))
+        wall = time.perf_counter() - t0
+        stop.set(); await probe
+
+    print(f"heavy requests: {len(durations)} in {wall:.1f}s "
+          f"(median {statistics.median(durations):.2f}s, max {max(durations):.2f}s)")
+    print(f"probe idle:   n={len(idle)} p50={_pct(idle, .5)*1000:.1f}ms p95={_pct(idle, .95)*1000:.1f}ms")
+    print(f"probe loaded: n={len(loaded)} p50={_pct(loaded, .5)*1000:.1f}ms "
+          f"p95={_pct(loaded, .95)*1000:.1f}ms max={max(loaded)*1000:.1f}ms")
+    starved = _pct(loaded, .95) > args.max_probe_p95
+    print("event loop STARVED" if starved else "event loop responsive")
+    return 1 if starved else 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base", default="http://127.0.0.1:8000")
+    ap.add_argument("--path", default="/rag/explain", help="heavy endpoint, e.g. /rag/explain or /coin-sentiment")
+    ap.add_argument("--coin", default="BTC")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rounds", type=int, default=3, help="heavy requests per worker")
+    ap.add_argument("--probe-interval", type=float, default=0.05)
+    ap.add_argument("--max-probe-p95", type=float, default=0.25, help="seconds; above this the loop is starved")
+    ap.add_argument("--timeout", type=float, default=600)
+    raise SystemExit(asyncio.run(main(ap.parse_args())))
@@ -1,7 +1,8 @@
 import os
-import json
 import re
 
+from services.json_stream import iter_json_items, write_json_array
+
 def extract_text(tweet):
     text = tweet.get("content", "")
     for embed in tweet.get("embeds", []):
@@ -14,10 +15,6 @@ def extract_text(tweet):
     return text.strip()
 
 def preprocess_flow(input_path, output_path):
-    with open(input_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    texts = [extract_text(tweet) for tweet in data]
-    with open(output_path, "w") as f:
-        json.dump(texts, f, indent=2)
+    texts = (extract_text(tweet) for tweet in iter_json_items(input_path))
+    write_json_array(output_path, texts, indent=2)
     print(f"Preprocessed data saved to {output_path}")
\ No newline at end of file
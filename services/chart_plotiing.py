@@ -1,8 +1,14 @@
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import os
 
 def save_coin_chart(coin, flows, save_dir):
+    os.makedirs(save_dir, exist_ok=True)
+    render_coin_chart(coin, flows, os.path.join(save_dir, f"{coin}.png"))
+
+def render_coin_chart(coin, flows, path):
     total_mentions = len(flows)
     pos_mentions = sum(1 for v in flows if v > 0)
     neg_mentions = sum(1 for v in flows if v < 0)
@@ -34,6 +40,5 @@ def save_coin_chart(coin, flows, save_dir):
     ax.set_ylim(0, 120)
 
     # Save
-    os.makedirs(save_dir, exist_ok=True)
-    plt.savefig(os.path.join(save_dir, f"{coin}.png"), facecolor=fig.get_facecolor())
-    plt.close()
+    plt.savefig(path, facecolor=fig.get_facecolor(), format="png")
+    plt.close(fig)
@@ -0,0 +1,128 @@
+# services/chart_service.py
+import glob
+import hashlib
+import os
+import threading
+from array import array
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from configurations.config import CHART_CACHE_DIR, CHART_PRERENDER_TOP
+from services.executors import get_executor
+
+
+def chart_key(coin: str, flows: Sequence[float]) -> str:
+    """Content hash of a coin's chart input; the chart file is named after it."""
+    h = hashlib.sha1(coin.encode("utf-8"))
+    h.update(array("d", flows).tobytes())
+    return h.hexdigest()[:16]
+
+
+def _render_chart(coin: str, flows: List[float], path: str) -> str:
+    # runs in a spawned worker of the process pool; imported here so the parent never loads matplotlib for this
+    from services.chart_plotiing import render_coin_chart
+    tmp = f"{path}.{os.getpid()}.tmp"
+    render_coin_chart(coin, flows, tmp)
+    os.replace(tmp, path)
+    # drop this coin's charts for older flow data
+    mtime = os.path.getmtime(path)
+    for old in glob.glob(os.path.join(os.path.dirname(path), f"{coin}-*.png")):
+        try:
+            if old != path and os.path.getmtime(old) <= mtime:
+                os.remove(old)
+        except OSError:
+            pass
+    return path
+
+
+class ChartService:
+    """
+    Coin flow charts, rendered when first requested (or pre-rendered in the
+    background) and cached on disk as <coin>-<flow hash>.png. A chart is
+    re-rendered only when the coin's flows change; concurrent requests for
+    the same chart share one render. Renders run in the "process" executor
+    (matplotlib is not thread-safe). Coins are keyed upper-cased, like the
+    flow series.
+    """
+    def __init__(self, cache_dir: str = CHART_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._flows: Dict[str, List[float]] = {}
+        self._keys: Dict[str, str] = {}
+        self._pending: Dict[str, Future] = {}
+
+    def publish(self, flows_by_coin: Dict[str, List[float]]) -> Dict[str, str]:
+        """
+        Make these flows the current chart input (replaces the previous set).
+        Spellings of one coin ("btc", "BTC") are merged. Returns coin -> key.
+        """
+        merged: Dict[str, List[float]] = {}
+        for coin, flows in flows_by_coin.items():
+            merged.setdefault(coin.upper(), []).extend(flows)
+        keys = {coin: chart_key(coin, flows) for coin, flows in merged.items()}
+        with self._lock:
+            self._flows = merged
+            self._keys = keys
+        return dict(keys)
+
+    def coins(self) -> List[str]:
+        with self._lock:
+            return list(self._keys)
+
+    def _path(self, coin: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{coin}-{key}.png")
+
+    def _submit(self, coin: str) -> Optional[Future]:
+        """Future of the coin's current chart (None if the coin is unknown); renders only if not cached."""
+        coin = coin.upper()
+        with self._lock:
+            key = self._keys.get(coin)
+            if key is None:
+                return None
+            path = self._path(coin, key)
+            fut = self._pending.get(key)
+            if fut is not None:
+                return fut
+            fut = Future()
+            if os.path.exists(path):
+                fut.set_result(path)
+                return fut
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fut = get_executor("process").submit(_render_chart, coin, self._flows[coin], path)
+            self._pending[key] = fut
+        fut.add_done_callback(lambda _f, k=key: self._done(k))
+        return fut
+
+    def _done(self, key: str):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def get(self, coin: str, timeout: Optional[float] = None) -> Optional[str]:
+        """Path of the coin's chart, rendering it first if needed (blocks). None if the coin is unknown."""
+        fut = self._submit(coin)
+        return fut.result(timeout) if fut is not None else None
+
+    def prerender(self, coins: Optional[Iterable[str]] = None, top: int = CHART_PRERENDER_TOP) -> int:
+        """
+        Queue renders without waiting: the given coins, else the `top`
+        coins with the most flows. Returns how many are queued or cached.
+        """
+        if coins is None:
+            with self._lock:
+                ranked = sorted(self._flows, key=lambda c: (-len(self._flows[c]), c))
+            coins = ranked[:max(0, top)]
+        return sum(1 for coin in coins if self._submit(coin) is not None)
+
+
+_SERVICE: Optional[ChartService] = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_chart_service() -> ChartService:
+    """Process-wide chart service (created on first use)."""
+    global _SERVICE
+    if _SERVICE is None:
+        with _SERVICE_LOCK:
+            if _SERVICE is None:
+                _SERVICE = ChartService()
+    return _SERVICE
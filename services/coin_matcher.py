@@ -0,0 +1,95 @@
+# services/coin_matcher.py
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+def _is_word(ch: str) -> bool:
+    # same notion of a word character as regex \w
+    return ch.isalnum() or ch == "_"
+
+
+def _fold(text: str) -> str:
+    """Lower-case without changing length, so match offsets index the original text."""
+    low = text.lower()
+    if len(low) == len(text):
+        return low
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+class CoinMatcher:
+    """
+    Case-insensitive multi-name matcher (Aho-Corasick automaton). One linear
+    scan of a text reports every name occurring as a whole word, i.e. not
+    preceded or followed by a word character. Names that differ only in
+    case share a pattern and are all reported.
+    Build once per name set and reuse across texts.
+    """
+    def __init__(self, names: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Tuple[str, ...]]]] = [[]]   # (pattern length, names)
+        by_pattern: Dict[str, List[str]] = {}
+        for name in names:
+            pat = _fold(name.strip())
+            if pat and name.strip() not in by_pattern.setdefault(pat, []):
+                by_pattern[pat].append(name.strip())
+        for pat, group in by_pattern.items():
+            self._add(pat, tuple(group))
+        self._link()
+        self.size = len(by_pattern)
+
+    def _add(self, pat: str, names: Tuple[str, ...]):
+        state = 0
+        for ch in pat:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pat), names))
+
+    def _link(self):
+        # breadth-first failure links; each state also inherits its fallback's outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """(start, end, name) for every whole-word hit, in order of end position."""
+        if not text or self.size == 0:
+            return
+        goto, fail, out = self._goto, self._fail, self._out
+        n = len(text)
+        state = 0
+        for i, ch in enumerate(_fold(text)):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            end = i + 1
+            if end < n and _is_word(text[end]):
+                continue
+            for length, names in out[state]:
+                start = end - length
+                if start > 0 and _is_word(text[start - 1]):
+                    continue
+                for name in names:
+                    yield start, end, name
+
+    def find(self, text: str) -> List[str]:
+        """Distinct names found in text, in order of first occurrence."""
+        seen: Dict[str, None] = {}
+        for _, _, name in self.finditer(text):
+            seen.setdefault(name, None)
+        return list(seen)
@@ -0,0 +1,148 @@
+# services/dedup.py
+import difflib
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, TypeVar
+
+from configurations.config import DEDUP_MAX_DISTANCE
+
+T = TypeVar("T")
+
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+_WS_RE = re.compile(r'\s+')
+_NUM_RE = re.compile(r'\d+(?:[.,]\d+)*')
+_TOKEN_RE = re.compile(r'[+-]?[$#@]?\w+')
+
+# texts with fewer tokens are only matched exactly ("gm" and "gn" are not near-duplicates)
+NEAR_MIN_TOKENS = 4
+
+
+def normalize(text: str) -> str:
+    """Lower-cased text without URLs, whitespace collapsed (reposts differ mostly in links/spacing)."""
+    return _WS_RE.sub(" ", _URL_RE.sub(" ", (text or "").lower())).strip()
+
+
+def exact_key(text: str) -> bytes:
+    return hashlib.blake2b(normalize(text).encode("utf-8"), digest_size=16).digest()
+
+
+def _tokens(norm: str) -> List[str]:
+    # numbers are masked so alert templates that differ only in amounts collapse;
+    # tokens keep a leading +/- and $/#/@ ("+$1.5M" and "-$1.5M" stay apart)
+    return _TOKEN_RE.findall(_NUM_RE.sub("0", norm))
+
+
+def _features(tokens: List[str]) -> List[str]:
+    if len(tokens) < NEAR_MIN_TOKENS:
+        return []
+    return tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]
+
+
+def _volatile(token: str) -> bool:
+    """Tokens near-duplicates may differ in: amounts (masked digits), @mentions, #tags."""
+    return "0" in token or token[0] in "@#"
+
+
+def same_template(a: List[str], b: List[str]) -> bool:
+    """
+    Token-level check of a SimHash match: the two token lists may differ
+    only in volatile tokens. Any added, dropped or changed word ("not",
+    "bullish" -> "bearish") keeps the texts apart, whatever their length.
+    """
+    if a == b:
+        return True
+    for op, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if op != "equal" and not all(_volatile(t) for t in a[i1:i2] + b[j1:j2]):
+            return False
+    return True
+
+
+def simhash(features: Iterable[str]) -> int:
+    """64-bit SimHash: each bit is the majority vote of that bit over the feature hashes."""
+    votes = [0] * 64
+    for f in set(features):
+        h = int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big")
+        for i in range(64):
+            if h >> i & 1:
+                votes[i] += 1
+            else:
+                votes[i] -= 1
+    fp = 0
+    for i, v in enumerate(votes):
+        if v > 0:
+            fp |= 1 << i
+    return fp
+
+
+class TextClusters:
+    """
+    Texts grouped into exact / near-duplicate clusters, in first-seen order:
+      - representatives: first text of each cluster (the one to score)
+      - counts:          members per cluster (duplicates included)
+      - assignment:      cluster index of each input text
+    """
+    __slots__ = ("representatives", "counts", "assignment")
+
+    def __init__(self):
+        self.representatives: List[str] = []
+        self.counts: List[int] = []
+        self.assignment: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.representatives)
+
+    def expand(self, values: Sequence[T]) -> List[T]:
+        """Per-input values from per-cluster values (each member gets its representative's value)."""
+        return [values[c] for c in self.assignment]
+
+
+def cluster_texts(texts: Iterable[str], max_distance: int = DEDUP_MAX_DISTANCE) -> TextClusters:
+    """
+    Group texts whose normalized form is identical, or whose SimHash
+    fingerprints are within `max_distance` bits of the representative's
+    and whose tokens pass same_template against it (negative max_distance
+    = exact only; SimHash alone merges e.g. a long text with its
+    negation). A text joins the first such cluster, so
+    clusters do not drift through chains of small edits. Candidates come
+    from a banded index: the fingerprint is split into max_distance + 1
+    bands, and two fingerprints within max_distance bits agree on at least
+    one band.
+    """
+    out = TextClusters()
+    by_key: Dict[bytes, int] = {}
+    fps: List[Optional[int]] = []
+    rep_tokens: List[List[str]] = []
+    n_bands = min(max_distance + 1, 64) if max_distance >= 0 else 0
+    bounds = [64 * b // n_bands for b in range(n_bands + 1)] if n_bands else []
+    bands: List[Dict[int, List[int]]] = [{} for _ in range(n_bands)]
+
+    for text in texts:
+        norm = normalize(text)
+        key = hashlib.blake2b(norm.encode("utf-8"), digest_size=16).digest()
+        cid = by_key.get(key)
+        if cid is None:
+            tokens = _tokens(norm) if n_bands else []
+            features = _features(tokens)
+            fp = simhash(features) if features else None
+            if fp is not None:
+                parts = [(fp >> lo) & ((1 << (hi - lo)) - 1) for lo, hi in zip(bounds, bounds[1:])]
+                candidates = set()
+                for b, part in enumerate(parts):
+                    candidates.update(bands[b].get(part, ()))
+                for c in sorted(candidates):
+                    if bin(fps[c] ^ fp).count("1") <= max_distance and same_template(rep_tokens[c], tokens):
+                        cid = c
+                        break
+            if cid is None:
+                cid = len(out.representatives)
+                out.representatives.append(text)
+                out.counts.append(0)
+                fps.append(fp)
+                rep_tokens.append(tokens if fp is not None else [])
+                if fp is not None:
+                    for b, part in enumerate(parts):
+                        bands[b].setdefault(part, []).append(cid)
+            by_key[key] = cid
+        out.counts[cid] += 1
+        out.assignment.append(cid)
+    return out
@@ -0,0 +1,58 @@
+# services/executors.py
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from configurations.config import EXECUTOR_LIMITS
+
+# Work classes:
+#   io      - blocking file / network I/O (JSON caches, downloads)
+#   cpu     - CPU-bound work that releases the GIL or is short (VADER, index builds)
+#   plot    - matplotlib; pyplot keeps global state, so keep this at 1 worker
+#   process - picklable CPU-bound functions that need a separate interpreter; workers are
+#             spawned, not forked, so they do not inherit the server's threads or loaded models.
+#             A spawned worker still re-imports the parent's __main__ (main.py under
+#             `python main.py`, and with it every model module), so modules must not load
+#             models at import time
+_POOLS: Dict[str, Executor] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_executor(kind: str) -> Executor:
+    """Bounded executor for a work class, created on first use."""
+    pool = _POOLS.get(kind)
+    if pool is not None:
+        return pool
+    with _POOLS_LOCK:
+        pool = _POOLS.get(kind)
+        if pool is None:
+            if kind not in EXECUTOR_LIMITS:
+                raise ValueError(f"Unknown executor class '{kind}'")
+            workers = max(1, int(EXECUTOR_LIMITS[kind]))
+            if kind == "process":
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"exec-{kind}")
+            _POOLS[kind] = pool
+    return pool
+
+
+async def run_blocking(kind: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run fn(*args, **kwargs) on the executor for `kind` without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(kind), functools.partial(fn, *args, **kwargs))
+
+
+def run_sync(kind: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Blocking variant for threads that must share a class limit (e.g. the plot lock)."""
+    return get_executor(kind).submit(fn, *args, **kwargs).result()
+
+
+def shutdown_executors(wait: bool = False) -> None:
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            pool.shutdown(wait=wait)
+        _POOLS.clear()
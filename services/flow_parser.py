@@ -0,0 +1,81 @@
+# services/flow_parser.py
+import re
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+# "$COIN +$1.5M" style net flows: coin, sign, number (optionally with thousands
+# separators), optional K/M/B/T suffix directly after the number
+FLOW_RE = re.compile(r'\$(\w+)\s*([+-])\$(\d+(?:,\d{3})*(?:\.\d+)?)([KMBT]?)')
+MULTIPLIERS = {"": 1, "K": 1_000, "M": 1_000_000, "B": 1_000_000_000, "T": 1_000_000_000_000}
+
+
+def parse_value(sign: str, number: str, suffix: str = "") -> float:
+    """Signed flow value of one match ("-", "1,250.5", "K" -> -1250500.0)."""
+    val = float(number.replace(",", "")) * MULTIPLIERS[suffix]
+    return val if sign == "+" else -val
+
+
+class FlowBatch:
+    """
+    Flows parsed from a sequence of texts, as parallel compact arrays (one
+    entry per flow, in text order):
+      - coin_id:   index into `coins` (first-seen order, coin spelled as in the text)
+      - value:     signed value
+      - msg_index: position of the source text in the input
+    """
+    __slots__ = ("coins", "coin_id", "value", "msg_index", "_ids")
+
+    def __init__(self):
+        self.coins: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.coin_id = array("i")
+        self.value = array("d")
+        self.msg_index = array("i")
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    def add_text(self, msg_index: int, text: str) -> int:
+        """Append the flows of one text. Returns how many it had."""
+        matches = FLOW_RE.findall(text if isinstance(text, str) else str(text))
+        for coin, sign, number, suffix in matches:
+            cid = self._ids.get(coin)
+            if cid is None:
+                cid = self._ids[coin] = len(self.coins)
+                self.coins.append(coin)
+            self.coin_id.append(cid)
+            self.value.append(parse_value(sign, number, suffix))
+            self.msg_index.append(msg_index)
+        return len(matches)
+
+    def by_coin(self) -> Dict[str, List[float]]:
+        """coin -> values in text order (coins in first-seen order)."""
+        out: Dict[str, List[float]] = {c: [] for c in self.coins}
+        for cid, val in zip(self.coin_id, self.value):
+            out[self.coins[cid]].append(val)
+        return out
+
+    def by_message(self) -> Dict[int, List[Tuple[str, float]]]:
+        """text index -> [(coin, value), ...] for texts that contain flows."""
+        out: Dict[int, List[Tuple[str, float]]] = {}
+        for cid, val, mi in zip(self.coin_id, self.value, self.msg_index):
+            out.setdefault(mi, []).append((self.coins[cid], val))
+        return out
+
+    def totals(self) -> Dict[str, float]:
+        """coin -> net flow (summed in text order)."""
+        return {c: sum(vals) for c, vals in self.by_coin().items()}
+
+
+def parse_flows(texts: Iterable[str]) -> FlowBatch:
+    """Parse every flow in `texts` (any iterable, consumed once)."""
+    batch = FlowBatch()
+    for i, text in enumerate(texts):
+        batch.add_text(i, text)
+    return batch
+
+
+def iter_flows(text: str) -> Iterable[Tuple[str, float]]:
+    """(coin, signed value) for each flow in a single text."""
+    for coin, sign, number, suffix in FLOW_RE.findall(text or ""):
+        yield coin, parse_value(sign, number, suffix)
@@ -0,0 +1,283 @@
+# services/flow_series.py
+import datetime
+import hashlib
+import math
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from configurations.config import FLOW_SERIES_CAPACITY
+from services.flow_parser import FlowBatch
+
+RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+
+# extract_text appends each embed's ISO timestamp to the message text
+_TS_RE = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?')
+
+# message keys remembered for de-duplication (re-running an analysis must not double count)
+SEEN_MESSAGES_MAX = 200_000
+
+
+def message_timestamp(text: str) -> Optional[float]:
+    """Epoch seconds of the last ISO timestamp in a preprocessed text (naive = UTC)."""
+    found = _TS_RE.findall(text or "")
+    if not found:
+        return None
+    try:
+        dt = datetime.datetime.fromisoformat(found[-1].replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.timestamp()
+
+
+class _Ring:
+    """
+    Fixed number of consecutive buckets for one coin at one resolution, as
+    arrays indexed by bucket number modulo capacity. Sum and sum of squares
+    of the bucket sums are kept up to date on every add/expiry, so mean and
+    z-score of a bucket cost O(1).
+    """
+    __slots__ = ("step", "cap", "sums", "counts", "head", "first", "s1", "s2")
+
+    def __init__(self, step: int, cap: int):
+        self.step = step
+        self.cap = cap
+        self.sums = array("d", bytes(8 * cap))
+        self.counts = array("l", [0]) * cap
+        self.head = -1     # newest bucket number held (-1 = empty)
+        self.first = -1    # oldest bucket number ever held
+        self.s1 = 0.0
+        self.s2 = 0.0
+
+    def _clear(self, i: int):
+        v = self.sums[i]
+        self.s1 -= v
+        self.s2 -= v * v
+        self.sums[i] = 0.0
+        self.counts[i] = 0
+
+    def _resum(self):
+        # limit float drift of the running sums
+        self.s1 = math.fsum(self.sums)
+        self.s2 = math.fsum(v * v for v in self.sums)
+
+    def advance(self, b: int):
+        """Make bucket b the newest, expiring buckets that fall out of the ring."""
+        if self.head < 0:
+            self.head = self.first = b
+            return
+        if b <= self.head:
+            return
+        if b - self.head >= self.cap:
+            for i in range(self.cap):
+                self.sums[i] = 0.0
+                self.counts[i] = 0
+            self.s1 = self.s2 = 0.0
+        else:
+            for nb in range(self.head + 1, b + 1):
+                self._clear(nb % self.cap)
+        wrapped = self.head // self.cap != b // self.cap
+        self.head = b
+        if wrapped:
+            self._resum()
+
+    def add(self, t: float, value: float) -> bool:
+        b = int(t // self.step)
+        if self.head >= 0 and b <= self.head - self.cap:
+            return False   # older than the ring holds
+        self.advance(b)
+        self.first = min(self.first, b)
+        i = b % self.cap
+        old = self.sums[i]
+        new = old + value
+        self.sums[i] = new
+        self.counts[i] += 1
+        self.s1 += value
+        self.s2 += new * new - old * old
+        return True
+
+    def window(self, n: int) -> Tuple[float, int]:
+        """(sum, count) over the newest n buckets."""
+        n = max(0, min(n, self.cap, self.head - self.first + 1 if self.head >= 0 else 0))
+        total, count = 0.0, 0
+        for b in range(self.head - n + 1, self.head + 1):
+            i = b % self.cap
+            total += self.sums[i]
+            count += self.counts[i]
+        return total, count
+
+    def zscore(self) -> Optional[float]:
+        """Newest bucket's sum against the mean/std of the held buckets (None if < 2 buckets or flat)."""
+        if self.head < 0:
+            return None
+        n = min(self.cap, self.head - self.first + 1)
+        if n < 2:
+            return None
+        mean = self.s1 / n
+        var = max(0.0, self.s2 / n - mean * mean)
+        if var <= 1e-12 * max(1.0, mean * mean):
+            return None
+        return (self.sums[self.head % self.cap] - mean) / math.sqrt(var)
+
+    def buckets(self, n: int) -> List[Dict[str, Any]]:
+        n = max(0, min(n, self.cap, self.head - self.first + 1 if self.head >= 0 else 0))
+        return [
+            {"t": b * self.step, "sum": self.sums[b % self.cap], "count": self.counts[b % self.cap]}
+            for b in range(self.head - n + 1, self.head + 1)
+        ]
+
+
+class FlowSeries:
+    """
+    Signed coin flows bucketed per coin into 1m/1h/1d intervals (see
+    FLOW_SERIES_CAPACITY for how many buckets each keeps). Messages are
+    added as they arrive; a message seen before (same id, or for messages
+    without an id the same text and timestamp) is skipped, so an analysis
+    can feed its whole input on every run. Messages with no timestamp are
+    not added. Reads are relative to the newest message time seen (data
+    time), not the wall clock. Coins are keyed upper-cased.
+    """
+    def __init__(self, capacity: Optional[Dict[str, int]] = None):
+        self.capacity = dict(capacity or FLOW_SERIES_CAPACITY)
+        self._lock = threading.Lock()
+        self._rings: Dict[str, Dict[str, _Ring]] = {}
+        self._seen: "OrderedDict[Any, None]" = OrderedDict()
+        self.latest: Optional[float] = None
+
+    def _ring(self, coin: str, res: str) -> _Ring:
+        rings = self._rings.get(coin)
+        if rings is None:
+            rings = self._rings[coin] = {
+                r: _Ring(RESOLUTIONS[r], max(1, int(self.capacity.get(r, 1)))) for r in RESOLUTIONS
+            }
+        return rings[res]
+
+    def _now_ring(self, coin: str, res: str) -> Optional[_Ring]:
+        rings = self._rings.get(coin.upper())
+        if rings is None:
+            return None
+        ring = rings[res]
+        if self.latest is not None:
+            ring.advance(int(self.latest // ring.step))   # quiet coins roll forward with time
+        return ring
+
+    def add(self, coin: str, ts: float, value: float) -> bool:
+        with self._lock:
+            return self._add_locked(coin.upper(), ts, value)
+
+    def _add_locked(self, coin: str, ts: float, value: float) -> bool:
+        # False if the flow is older than every ring of the coin holds
+        accepted = False
+        for res in RESOLUTIONS:
+            accepted = self._ring(coin, res).add(ts, value) or accepted
+        if accepted and (self.latest is None or ts > self.latest):
+            self.latest = ts
+        return accepted
+
+    def collector(self) -> "FlowCollector":
+        """Per-text consumer for streaming pipelines (see FlowCollector)."""
+        return FlowCollector(self)
+
+    def ingest(self, rows: Iterable[Tuple[Optional[str], Optional[str], str]]) -> FlowBatch:
+        """
+        Add the flows of new messages, given as (message id, message
+        timestamp, text) rows like tweet_converter.iter_preprocessed_rows
+        yields (any iterable, consumed once). Returns every flow parsed.
+        """
+        collect = self.collector()
+        for message_id, posted, text in rows:
+            collect(text, message_id, posted)
+        return collect.batch
+
+    def _ingest_text(self, text: str, flows: List[Tuple[str, float]],
+                     message_id: Optional[str] = None, posted: Optional[str] = None) -> int:
+        ts = message_timestamp(text) or message_timestamp(posted)
+        if ts is None:
+            return 0   # no message time: nothing to bucket by, and no way to tell a re-feed apart
+        # messages are told apart by id, else by text and time
+        # (identical plain alerts posted at different times are separate flows)
+        if message_id:
+            key: Any = "id:" + message_id
+        else:
+            key = hashlib.sha1(f"{ts!r}\n{text}".encode("utf-8")).digest()
+        with self._lock:
+            if key in self._seen:
+                return 0
+            self._seen[key] = None
+            if len(self._seen) > SEEN_MESSAGES_MAX:
+                self._seen.popitem(last=False)
+            return sum(self._add_locked(coin.upper(), ts, val) for coin, val in flows)
+
+    # ----------------------------
+    # Reads
+    # ----------------------------
+    def coins(self) -> List[str]:
+        with self._lock:
+            return list(self._rings)
+
+    def series(self, coin: str, res: str, last: int) -> Dict[str, Any]:
+        """Newest `last` buckets of a coin plus rolling sum/count over them and the newest bucket's z-score."""
+        with self._lock:
+            ring = self._now_ring(coin, res)
+            if ring is None:
+                return {"coin": coin.upper(), "resolution": res, "buckets": [], "rolling": None}
+            total, count = ring.window(last)
+            return {
+                "coin": coin.upper(),
+                "resolution": res,
+                "buckets": ring.buckets(last),
+                "rolling": {"sum": total, "count": count, "z": ring.zscore()},
+            }
+
+    def window_totals(self, res: str, last: int) -> Dict[str, Dict[str, Any]]:
+        """coin -> {"sum", "count", "z"} over the newest `last` buckets, for every coin."""
+        with self._lock:
+            out: Dict[str, Dict[str, Any]] = {}
+            for coin in self._rings:
+                ring = self._now_ring(coin, res)
+                total, count = ring.window(last)
+                out[coin] = {"sum": total, "count": count, "z": ring.zscore()}
+            return out
+
+
+class FlowCollector:
+    """
+    Called once per text, in order: parses its flows into `batch` (every
+    flow, as parse_flows would) and adds those of messages not seen before
+    to the series, timed by the text's embedded timestamp, else the
+    message's own `posted` timestamp; texts with neither only go to
+    `batch`. Pass the message id where known so repeated alerts are told
+    apart from re-fed messages. `added` counts the flows the series took
+    (flows older than its rings hold are dropped).
+    """
+    def __init__(self, series: FlowSeries):
+        self.series = series
+        self.batch = FlowBatch()
+        self.added = 0
+        self._n = 0
+
+    def __call__(self, text: str, message_id: Optional[str] = None, posted: Optional[str] = None):
+        start = len(self.batch)
+        if self.batch.add_text(self._n, text):
+            flows = [(self.batch.coins[self.batch.coin_id[j]], self.batch.value[j])
+                     for j in range(start, len(self.batch))]
+            self.added += self.series._ingest_text(text, flows, message_id, posted)
+        self._n += 1
+
+
+_SERIES: Optional[FlowSeries] = None
+_SERIES_LOCK = threading.Lock()
+
+
+def get_flow_series() -> FlowSeries:
+    """Process-wide flow series (created on first use)."""
+    global _SERIES
+    if _SERIES is None:
+        with _SERIES_LOCK:
+            if _SERIES is None:
+                _SERIES = FlowSeries()
+    return _SERIES
@@ -0,0 +1,175 @@
+# services/json_stream.py
+import json
+import os
+import re
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+# characters read per step; a single item larger than this grows the read size
+CHUNK_SIZE = 1 << 16
+
+_WS = re.compile(r'[ \t\r\n]*')
+_DECODER = json.JSONDecoder()
+_NUM_TAIL = re.compile(r'[0-9eE+\-.]*\Z')
+
+
+class _Reader:
+    """Text buffer over a file that is refilled on demand and trimmed as it is consumed."""
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at end of file), without consuming it."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return ""
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+                # a value followed only by number characters up to the end of the
+                # buffer may be cut short (e.g. "1.5" of "1.5e3"): read on first
+                if self.eof or not _NUM_TAIL.match(self.buf, end):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self.more():
+                continue   # at EOF: decode once more and succeed or raise
+            self.chunk_size = max(self.chunk_size, len(self.buf))   # grow for large items
+
+
+def iter_json_items(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Items of a JSON file, parsed incrementally: each value of a .ndjson /
+    .jsonl file, else the elements of a top-level array one at a time (any
+    other top-level value is yielded as the single item). Memory stays
+    bounded by the largest single item, not the file.
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        r = _Reader(f, chunk_size)
+        if path.endswith((".ndjson", ".jsonl")) or r.peek() != "[":
+            while r.peek():
+                yield r.value()
+            return
+        r.pos += 1
+        if r.peek() == "]":
+            return
+        while True:
+            yield r.value()
+            sep = r.peek()
+            if sep == ",":
+                r.pos += 1
+            elif sep == "]":
+                return
+            else:
+                raise ValueError(f"Malformed JSON array in {path}: expected ',' or ']', got {sep!r}")
+
+
+def iter_texts(items: Iterable[Any]) -> Iterator[str]:
+    """Plain texts from preprocessed items: strings, or dicts with a "text" field."""
+    for item in items:
+        if isinstance(item, str):
+            yield item
+        elif isinstance(item, dict) and "text" in item:
+            yield str(item["text"])
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Consecutive lists of up to `size` items."""
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, max(1, size)))
+        if not chunk:
+            return
+        yield chunk
+
+
+def tap(items: Iterable[Any], *consumers: Callable[[Any], Any]) -> Iterator[Any]:
+    """Pass items through, handing each one to every consumer first (fan-out within one pass)."""
+    for item in items:
+        for consume in consumers:
+            consume(item)
+        yield item
+
+
+class JsonArrayWriter:
+    """
+    Writes a JSON array item by item. The file matches
+    json.dump(items, f, indent=indent, ensure_ascii=ensure_ascii) and is
+    swapped in atomically on close (readers never see a partial file; an
+    exception inside the `with` block leaves the previous file in place).
+    """
+    def __init__(self, path: str, indent: Optional[int] = 2, ensure_ascii: bool = True):
+        self.path = path
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
+        self.count = 0
+        self._tmp = f"{path}.{os.getpid()}.tmp"
+        self._f = None
+
+    def __enter__(self) -> "JsonArrayWriter":
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._f = open(self._tmp, "w", encoding="utf-8")
+        return self
+
+    def write(self, item: Any):
+        text = json.dumps(item, indent=self.indent, ensure_ascii=self.ensure_ascii)
+        if self.indent is None:
+            self._f.write(("[" if self.count == 0 else ", ") + text)
+        else:
+            pad = " " * self.indent
+            self._f.write(("[\n" if self.count == 0 else ",\n") + pad + text.replace("\n", "\n" + pad))
+        self.count += 1
+
+    def write_all(self, items: Iterable[Any]) -> int:
+        for item in items:
+            self.write(item)
+        return self.count
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                if self.count == 0:
+                    self._f.write("[]")
+                elif self.indent is None:
+                    self._f.write("]")
+                else:
+                    self._f.write("\n]")
+        finally:
+            self._f.close()
+        if exc_type is None:
+            os.replace(self._tmp, self.path)
+        else:
+            try:
+                os.remove(self._tmp)
+            except OSError:
+                pass
+        return False
+
+
+def write_json_array(path: str, items: Iterable[Any], indent: Optional[int] = 2, ensure_ascii: bool = True) -> int:
+    """Stream `items` into `path` as a JSON array. Returns the number written."""
+    with JsonArrayWriter(path, indent=indent, ensure_ascii=ensure_ascii) as w:
+        return w.write_all(items)
@@ -0,0 +1,228 @@
+# services/message_store.py
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from configurations.config import MESSAGE_STORE_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id         TEXT PRIMARY KEY,
+    channel_id TEXT NOT NULL,
+    ts         REAL,
+    raw        TEXT NOT NULL,
+    text       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_messages_channel_ts ON messages(channel_id, ts);
+CREATE INDEX IF NOT EXISTS idx_messages_ts ON messages(ts);
+
+CREATE TABLE IF NOT EXISTS predictions (
+    id     TEXT NOT NULL,
+    model  TEXT NOT NULL,
+    label  TEXT NOT NULL,
+    probs  TEXT,
+    PRIMARY KEY (id, model)
+);
+"""
+
+
+def _parse_ts(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class MessageStore:
+    """
+    Embedded SQLite store for Discord messages, their preprocessed text and
+    per-model predictions, keyed by message id.
+      - messages:    raw JSON + extracted text (NULL until preprocessed)
+      - predictions: (message id, model) -> label + class probabilities
+    Connections are per-thread; the database runs in WAL mode so readers do
+    not block the writer.
+    """
+
+    def __init__(self, path: str = MESSAGE_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ----------------------------
+    # Messages
+    # ----------------------------
+    def upsert_messages(self, channel_id: str, messages: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert new messages and replace edited ones. An edited message loses
+        its preprocessed text and predictions so they are recomputed.
+        Returns the number of new or changed messages.
+        """
+        rows = []
+        for m in messages:
+            if not isinstance(m, dict) or not m.get("id"):
+                continue
+            rows.append((str(m["id"]), json.dumps(m, ensure_ascii=False, sort_keys=True), _parse_ts(m.get("timestamp"))))
+        if not rows:
+            return 0
+
+        conn = self._conn()
+        with self._write_lock, conn:
+            existing = {}
+            ids = [r[0] for r in rows]
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                q = f"SELECT id, raw FROM messages WHERE id IN ({','.join('?' * len(chunk))})"
+                existing.update(conn.execute(q, chunk).fetchall())
+
+            changed = [(mid, raw, ts) for mid, raw, ts in rows if existing.get(mid) != raw]
+            if not changed:
+                return 0
+            conn.executemany(
+                "INSERT INTO messages (id, channel_id, ts, raw, text) VALUES (?, ?, ?, ?, NULL) "
+                "ON CONFLICT(id) DO UPDATE SET raw = excluded.raw, ts = excluded.ts, text = NULL",
+                [(mid, str(channel_id), ts, raw) for mid, raw, ts in changed],
+            )
+            edited = [(mid,) for mid, _, _ in changed if mid in existing]
+            if edited:
+                conn.executemany("DELETE FROM predictions WHERE id = ?", edited)
+        return len(changed)
+
+    def pending_preprocess(self, channel_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Messages of a channel that have no extracted text yet."""
+        cur = self._conn().execute(
+            "SELECT id, raw FROM messages WHERE channel_id = ? AND text IS NULL", (str(channel_id),)
+        )
+        return [(mid, json.loads(raw)) for mid, raw in cur.fetchall()]
+
+    def set_texts(self, texts: Dict[str, str]) -> None:
+        if not texts:
+            return
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.executemany("UPDATE messages SET text = ? WHERE id = ?", [(t, mid) for mid, t in texts.items()])
+
+    def get_texts(
+        self,
+        channel_id: str,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[str, str]]:
+        """[(message id, text)] newest first, optionally bounded to a [since, until) window."""
+        sql = "SELECT id, text FROM messages WHERE channel_id = ? AND text IS NOT NULL"
+        args: List[Any] = [str(channel_id)]
+        if since is not None:
+            sql += " AND ts >= ?"
+            args.append(since)
+        if until is not None:
+            sql += " AND ts < ?"
+            args.append(until)
+        sql += " ORDER BY ts DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        return self._conn().execute(sql, args).fetchall()
+
+    def get_texts_by_id(self, ids: Sequence[str]) -> Dict[str, str]:
+        """id -> extracted text, for the given ids that are stored and preprocessed."""
+        out: Dict[str, str] = {}
+        conn = self._conn()
+        for i in range(0, len(ids), 500):
+            chunk = list(ids[i:i + 500])
+            q = f"SELECT id, text FROM messages WHERE text IS NOT NULL AND id IN ({','.join('?' * len(chunk))})"
+            out.update(conn.execute(q, chunk).fetchall())
+        return out
+
+    # ----------------------------
+    # Predictions
+    # ----------------------------
+    def missing_predictions(self, ids: Sequence[str], model: str) -> List[str]:
+        """Subset of ids that have no prediction for `model` yet (order kept)."""
+        have = set()
+        conn = self._conn()
+        for i in range(0, len(ids), 500):
+            chunk = list(ids[i:i + 500])
+            q = f"SELECT id FROM predictions WHERE model = ? AND id IN ({','.join('?' * len(chunk))})"
+            have.update(r[0] for r in conn.execute(q, [model] + chunk).fetchall())
+        return [i for i in ids if i not in have]
+
+    def upsert_predictions(self, model: str, rows: Iterable[Tuple[str, str, Optional[List[float]]]]) -> None:
+        """rows: (message id, label, probs)"""
+        data = [(mid, model, label, json.dumps(probs) if probs is not None else None) for mid, label, probs in rows]
+        if not data:
+            return
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO predictions (id, model, label, probs) VALUES (?, ?, ?, ?)", data
+            )
+
+    def get_predictions(self, ids: Sequence[str], model: str) -> Dict[str, Dict[str, Any]]:
+        """id -> {"label", "probs"} for the given ids."""
+        out: Dict[str, Dict[str, Any]] = {}
+        conn = self._conn()
+        for i in range(0, len(ids), 500):
+            chunk = list(ids[i:i + 500])
+            q = (f"SELECT id, label, probs FROM predictions "
+                 f"WHERE model = ? AND id IN ({','.join('?' * len(chunk))})")
+            for mid, label, probs in conn.execute(q, [model] + chunk).fetchall():
+                out[mid] = {"label": label, "probs": json.loads(probs) if probs else None}
+        return out
+
+    def get_window_predictions(
+        self,
+        channel_id: str,
+        model: str,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Predictions joined with text/ts for a channel and time window, newest first."""
+        sql = ("SELECT m.id, m.ts, m.text, p.label, p.probs FROM messages m "
+               "JOIN predictions p ON p.id = m.id AND p.model = ? WHERE m.channel_id = ?")
+        args: List[Any] = [model, str(channel_id)]
+        if since is not None:
+            sql += " AND m.ts >= ?"
+            args.append(since)
+        if until is not None:
+            sql += " AND m.ts < ?"
+            args.append(until)
+        sql += " ORDER BY m.ts DESC, m.id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        return [
+            {"id": mid, "ts": ts, "text": text, "label": label, "probs": json.loads(probs) if probs else None}
+            for mid, ts, text, label, probs in self._conn().execute(sql, args).fetchall()
+        ]
+
+
+_STORE: Optional[MessageStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> MessageStore:
+    """Process-wide store instance (created on first use)."""
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = MessageStore()
+    return _STORE
@@ -0,0 +1,141 @@
+# services/nltk_resources.py
+import os
+import threading
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+import nltk
+from nltk import word_tokenize
+from nltk.corpus import stopwords
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from nltk.tag.perceptron import PerceptronTagger
+
+from configurations.config import NLTK_DATA_DIR
+
+
+def _nltk_version() -> Tuple[int, ...]:
+    parts = []
+    for part in nltk.__version__.split(".")[:3]:
+        digits = "".join(ch for ch in part if ch.isdigit())
+        if not digits:
+            break
+        parts.append(int(digits))
+    return tuple(parts)
+
+
+# resource id -> (nltk.download package, path nltk.data.find must resolve) for the
+# installed NLTK: word_tokenize reads punkt_tab from 3.8.2 on, PerceptronTagger
+# reads averaged_perceptron_tagger_eng from 3.9 on (the old packages are ignored)
+_PUNKT = (("punkt_tab", "tokenizers/punkt_tab/english/") if _nltk_version() >= (3, 8, 2)
+          else ("punkt", "tokenizers/punkt/english.pickle"))
+_TAGGER = (("averaged_perceptron_tagger_eng", "taggers/averaged_perceptron_tagger_eng/") if _nltk_version() >= (3, 9)
+           else ("averaged_perceptron_tagger", "taggers/averaged_perceptron_tagger/averaged_perceptron_tagger.pickle"))
+RESOURCES: Dict[str, Tuple[str, str]] = {
+    "punkt": _PUNKT,
+    "stopwords": ("stopwords", "corpora/stopwords"),
+    "averaged_perceptron_tagger": _TAGGER,
+    "vader_lexicon": ("vader_lexicon", "sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt"),
+}
+
+# what scripts/download_nltk_data.py fetches
+DOWNLOAD_PACKAGES = tuple(package for package, _ in RESOURCES.values())
+
+_LOCK = threading.Lock()
+_DATA_DIR_READY = False
+_FOUND: Set[str] = set()
+_SINGLETONS: Dict[str, Any] = {}
+
+
+def _use_data_dir():
+    """Put the local NLTK data dir first on nltk's search path (once per process)."""
+    global _DATA_DIR_READY
+    if _DATA_DIR_READY:
+        return
+    if NLTK_DATA_DIR and NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    _DATA_DIR_READY = True
+
+
+def has_resource(name: str) -> bool:
+    """
+    Whether a resource is available locally (NLTK_DATA_DIR or nltk's
+    default paths), in the form the installed NLTK loads.
+    """
+    if name in _FOUND:
+        return True
+    _use_data_dir()
+    try:
+        nltk.data.find(RESOURCES[name][1])
+    except LookupError:
+        return False
+    _FOUND.add(name)
+    return True
+
+
+def _require(*names: str):
+    missing = [n for n in names if not has_resource(n)]
+    if missing:
+        raise LookupError(
+            f"NLTK {nltk.__version__} data missing: {', '.join(RESOURCES[n][0] for n in missing)} (looked in {NLTK_DATA_DIR} and nltk's default paths). "
+            f"Run `python scripts/download_nltk_data.py` once to fetch it."
+        )
+
+
+def _singleton(key: str, build):
+    obj = _SINGLETONS.get(key)
+    if obj is None:
+        with _LOCK:
+            obj = _SINGLETONS.get(key)
+            if obj is None:
+                obj = _SINGLETONS[key] = build()
+    return obj
+
+
+# ----------------------------
+# Process-wide resources
+# ----------------------------
+def get_stopwords(lang: str = "english") -> FrozenSet[str]:
+    def build():
+        _require("stopwords")
+        return frozenset(stopwords.words(lang))
+    return _singleton("stopwords:" + lang, build)
+
+
+def get_pos_tagger():
+    """Shared averaged perceptron tagger (nltk.pos_tag / pos_tag_sents load a new one per call in most releases)."""
+    def build():
+        _require("averaged_perceptron_tagger")
+        return PerceptronTagger()
+    return _singleton("pos_tagger", build)
+
+
+def get_vader():
+    """Shared VADER analyzer (lexicon parsed once; polarity_scores keeps no state)."""
+    def build():
+        _require("vader_lexicon")
+        return SentimentIntensityAnalyzer()
+    return _singleton("vader", build)
+
+
+def vader_available() -> bool:
+    try:
+        get_vader()
+        return True
+    except LookupError:
+        return False
+
+
+def pos_tag_texts(texts: Sequence[str]) -> List[List[Tuple[str, str]]]:
+    """word_tokenize + POS tags per text, with the shared tagger."""
+    _require("punkt")
+    tagger = get_pos_tagger()
+    return tagger.tag_sents([word_tokenize(t) for t in texts])
+
+
+def download_all(target_dir: Optional[str] = None) -> List[str]:
+    """Fetch every resource into the local data dir (network; setup only). Returns failed packages."""
+    target_dir = target_dir or NLTK_DATA_DIR
+    os.makedirs(target_dir, exist_ok=True)
+    if target_dir not in nltk.data.path:
+        nltk.data.path.insert(0, target_dir)
+    failed = [p for p in DOWNLOAD_PACKAGES if not nltk.download(p, download_dir=target_dir, quiet=True)]
+    return failed
@@ -0,0 +1,120 @@
+# services/summary_scheduler.py
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class _Job:
+    def __init__(self, name: str, pipeline: Callable[[], Any], summary: Callable[[], Dict[str, Any]],
+                 interval: float, output_path: Optional[str] = None):
+        self.name = name
+        self.pipeline = pipeline          # fetch -> preprocess -> model -> write
+        self.summary = summary            # cheap read of the written output
+        self.interval = float(interval)   # seconds between refreshes (<= 0: manual only)
+        self.output_path = output_path    # used to date a summary computed before any refresh
+        self.lock = threading.Lock()      # one refresh per job at a time
+        self.latest: Optional[Dict[str, Any]] = None
+        self.updated_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.next_run: float = 0.0
+
+
+class SummaryScheduler:
+    """
+    Periodically runs each registered summary pipeline on a background thread
+    and keeps the latest summary in memory, so GET endpoints can answer from
+    the precomputed result instead of running the pipeline inline.
+    """
+
+    def __init__(self, tick: float = 1.0):
+        self._jobs: Dict[str, _Job] = {}
+        self._tick = tick
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register(self, name: str, pipeline: Callable[[], Any], summary: Callable[[], Dict[str, Any]],
+                 interval: float, output_path: Optional[str] = None) -> None:
+        self._jobs[name] = _Job(name, pipeline, summary, interval, output_path)
+
+    # ----------------------------
+    # Refresh
+    # ----------------------------
+    def refresh(self, name: str) -> bool:
+        """Run one job now (blocking). Returns False if it was already running."""
+        job = self._jobs[name]
+        if not job.lock.acquire(blocking=False):
+            return False
+        try:
+            job.pipeline()
+            job.latest = job.summary()
+            job.updated_at = time.time()
+            job.last_error = None
+        except Exception as e:
+            job.last_error = f"{type(e).__name__}: {e}"
+            print(f"Summary refresh '{name}' failed: {job.last_error}")
+        finally:
+            if job.interval > 0:
+                job.next_run = time.time() + job.interval
+            job.lock.release()
+        return True
+
+    def trigger(self, name: str) -> bool:
+        """Start a refresh in the background. Returns False if one is already running."""
+        job = self._jobs[name]
+        if job.lock.locked():
+            return False
+        threading.Thread(target=self.refresh, args=(name,), name=f"summary-{name}", daemon=True).start()
+        return True
+
+    # ----------------------------
+    # Read
+    # ----------------------------
+    def serve(self, name: str, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Latest summary plus its age. Before the first refresh the summary is
+        read from the last output on disk and dated by the file's mtime.
+        """
+        job = self._jobs[name]
+        triggered = self.trigger(name) if refresh else False
+
+        summary, updated_at = job.latest, job.updated_at
+        if summary is None:
+            summary = job.summary()
+            if job.output_path and os.path.exists(job.output_path):
+                updated_at = os.path.getmtime(job.output_path)
+
+        return {
+            **summary,
+            "updated_at": updated_at,
+            "age_seconds": round(time.time() - updated_at, 1) if updated_at else None,
+            "refreshing": job.lock.locked(),
+            "refresh_triggered": triggered,
+            "last_error": job.last_error,
+        }
+
+    # ----------------------------
+    # Background loop
+    # ----------------------------
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="summary-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.time()
+            for job in list(self._jobs.values()):
+                if self._stop.is_set():
+                    break
+                if job.interval > 0 and now >= job.next_run:
+                    self.refresh(job.name)
+            self._stop.wait(self._tick)
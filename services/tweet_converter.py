@@ -1,40 +1,174 @@
 import os
-from preprocessing.preprocess import preprocess_data
-from services.analysis_cleaning import  preprocess_flow
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from configurations.config import (
+    CHANNELS,
+    DISCORD_MESSAGE_LIMIT,
+    PREPROCESS_TEXT_CACHE_MAX,
+    PREPROCESSED_DUMP_DIR,
+)
+from preprocessing.preprocess import extract_text
+from services.json_stream import JsonArrayWriter, batched, iter_json_items, tap
+from services.message_store import get_store
+
+# raw messages looked up in the message store per round trip
+_LOOKUP_CHUNK = 500
+
+_TEXT_CACHE: "OrderedDict[Tuple[str, Any], str]" = OrderedDict()
+_TEXT_CACHE_LOCK = threading.Lock()
+
+
+# ----------------------------
+# Single-pass preprocessing
+# ----------------------------
+def _cache_key(msg: Dict[str, Any]) -> Tuple[str, Any]:
+    # an edit changes the text, so it is part of the key
+    return str(msg["id"]), msg.get("edited_timestamp")
+
+
+def _texts_for(messages: List[Any]) -> List[str]:
+    """
+    extract_text of each message, reusing texts already extracted for the
+    same message id: from this process first, then from the message store.
+    """
+    out: List[Optional[str]] = [None] * len(messages)
+    lookup: Dict[str, List[int]] = {}
+    with _TEXT_CACHE_LOCK:
+        for i, msg in enumerate(messages):
+            if not isinstance(msg, dict) or not msg.get("id"):
+                continue
+            key = _cache_key(msg)
+            text = _TEXT_CACHE.get(key)
+            if text is None:
+                lookup.setdefault(key[0], []).append(i)
+            else:
+                _TEXT_CACHE.move_to_end(key)
+                out[i] = text
+    stored = get_store().get_texts_by_id(list(lookup)) if lookup else {}
+    fresh: Dict[str, str] = {}
+    for mid, idx in lookup.items():
+        text = stored.get(mid)
+        if text is None:
+            text = fresh[mid] = extract_text(messages[idx[0]])
+        for i in idx:
+            out[i] = text
+    if fresh:
+        get_store().set_texts(fresh)   # only rows the store holds are updated
+    with _TEXT_CACHE_LOCK:
+        for mid, idx in lookup.items():
+            _TEXT_CACHE[_cache_key(messages[idx[0]])] = out[idx[0]]
+        while len(_TEXT_CACHE) > PREPROCESS_TEXT_CACHE_MAX:
+            _TEXT_CACHE.popitem(last=False)
+    # messages without an id are not cached
+    return [extract_text(msg) if text is None else text for msg, text in zip(messages, out)]
+
+
+def iter_preprocessed_rows(input_path: str, output_path: Optional[str] = None
+                           ) -> Iterator[Tuple[Optional[str], Optional[str], str]]:
+    """
+    (message id, message timestamp, preprocessed text) for each message of a
+    raw message file, streamed in file order (id/timestamp are None when the
+    message has none). extract_text runs at most once per message id (see
+    _texts_for). With `output_path` the texts are also written there as a
+    JSON array (same file preprocess_data writes); it is swapped in once the
+    iteration completes.
+    """
+    with ExitStack() as stack:
+        out = stack.enter_context(JsonArrayWriter(output_path, indent=2)) if output_path else None
+        for chunk in batched(iter_json_items(input_path), _LOOKUP_CHUNK):
+            for msg, text in zip(chunk, _texts_for(chunk)):
+                if out is not None:
+                    out.write(text)
+                if isinstance(msg, dict):
+                    yield (str(msg["id"]) if msg.get("id") else None), msg.get("timestamp"), text
+                else:
+                    yield None, None, text
+
+
+def iter_preprocessed(input_path: str, output_path: Optional[str] = None) -> Iterator[str]:
+    """Preprocessed texts only (see iter_preprocessed_rows)."""
+    for _, _, text in iter_preprocessed_rows(input_path, output_path):
+        yield text
+
+
+def run_preprocessing(input_path: str, *consumers: Callable[[str], Any],
+                      output_path: Optional[str] = None) -> int:
+    """
+    One pass over a raw message file: each text goes to every consumer in
+    order (e.g. a FlowCollector and a sentiment step), in memory. The
+    preprocessed JSON is written only when `output_path` is given.
+    Returns the number of texts.
+    """
+    count = 0
+    for _ in tap(iter_preprocessed(input_path, output_path), *consumers):
+        count += 1
+    return count
+
+
+def dump_path(filename: str) -> Optional[str]:
+    """Where a flow should write its preprocessed JSON, or None when PREPROCESSED_DUMP_DIR is unset."""
+    return os.path.abspath(os.path.join(PREPROCESSED_DUMP_DIR, filename)) if PREPROCESSED_DUMP_DIR else None
+
+
+# ----------------------------
+# Preprocessed JSON files
+# ----------------------------
 
 
 def run_preprocessing_news(input_path: str) -> str:
     base_dir = os.path.dirname(__file__)
     output_path = os.path.join(base_dir, "..", "test_data", "preprocessed_data_news.json")
     output_path = os.path.abspath(output_path)
-    preprocess_data(input_path, output_path)
+    run_preprocessing(input_path, output_path=output_path)
     return output_path
 
 def run_preprocessing_general(input_path: str) -> str:
     base_dir = os.path.dirname(__file__)
     output_path = os.path.join(base_dir, "..", "test_data", "preprocessed_data_general.json")
     output_path = os.path.abspath(output_path)
-    preprocess_data(input_path, output_path)
+    run_preprocessing(input_path, output_path=output_path)
     return output_path
 
 def run_preprocessing_focus(input_path: str) -> str:
     base_dir = os.path.dirname(__file__)
     output_path = os.path.join(base_dir, "..", "test_data", "preprocessed_data_focus.json")
     output_path = os.path.abspath(output_path)
-    preprocess_data(input_path, output_path)
+    run_preprocessing(input_path, output_path=output_path)
     return output_path
 
 def run_coinfinder_focus(input_path: str) -> str:
     base_dir = os.path.dirname(__file__)
     output_path = os.path.join(base_dir, "..", "test_data", "preprocessed_data_run_coinfinder_focus.json")
     output_path = os.path.abspath(output_path)
-    preprocess_data(input_path, output_path)
+    run_preprocessing(input_path, output_path=output_path)
     return output_path
 
 def run_coinflow_focus(input_path: str) -> str:
     base_dir = os.path.dirname(__file__)
     output_path = os.path.join(base_dir, "..", "test_data", "preprocessed_data_run_coinflow_focus.json")
     output_path = os.path.abspath(output_path)
-    preprocess_flow(input_path, output_path)
+    run_preprocessing(input_path, output_path=output_path)
     return output_path
 
+
+# ----------------------------
+# Store-backed preprocessing
+# ----------------------------
+def preprocess_channel(channel_type: str, limit: Optional[int] = DISCORD_MESSAGE_LIMIT,
+                       since: Optional[float] = None) -> List[Tuple[str, str]]:
+    """
+    Store-backed preprocessing: extract text only for messages of the channel
+    that have not been preprocessed yet, then return [(message id, text)]
+    newest first (bounded by `limit` and optionally by a `since` timestamp).
+    """
+    channel_id = CHANNELS.get(channel_type)
+    if not channel_id:
+        return []
+    store = get_store()
+    pending = store.pending_preprocess(channel_id)
+    if pending:
+        store.set_texts({mid: extract_text(msg) for mid, msg in pending})
+    return store.get_texts(channel_id, since=since, limit=limit)
@@ -0,0 +1,87 @@
+# models/rag_artifacts.py
+import os, re, shutil, threading, time
+from typing import Any, Callable, Dict, List, Optional
+
+RUN_DIR_RE = re.compile(r"^\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}$")
+
+class ArtifactWriter:
+    """
+    Background writer for RAG artifacts. submit() only records the latest
+    (index, ts); a daemon thread renders it, at most once per `min_interval`
+    seconds. Submissions arriving in between are coalesced into one render
+    of the newest index.
+    """
+    def __init__(self, render: Callable[[Dict[str, Dict[str, Any]], float], None], min_interval: float = 60.0):
+        self._render = render
+        self.min_interval = max(0.0, float(min_interval))
+        self._cond = threading.Condition()
+        self._pending: Optional[tuple] = None
+        self._busy = False
+        self._last_render = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self.renders = 0
+        self.coalesced = 0
+
+    def submit(self, index: Dict[str, Dict[str, Any]], ts: float):
+        with self._cond:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = (index, ts)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="rag-artifacts", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Render any pending index now (ignoring the interval) and wait. False on timeout."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            self._last_render = 0.0
+            self._cond.notify_all()
+            while self._pending is not None or self._busy:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    if not self._cond.wait(timeout=300):
+                        self._thread = None   # idle: let the thread exit, submit() restarts it
+                        return
+                wait = self._last_render + self.min_interval - time.time()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                index, ts = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                self._render(index, ts)
+            except Exception as e:
+                print(f"RAG artifact render failed: {type(e).__name__}: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._last_render = time.time()
+                    self.renders += 1
+                    self._cond.notify_all()
+
+def prune_run_dirs(vis_dir: str, keep: int) -> List[str]:
+    """Delete timestamped visualization run dirs beyond the newest `keep`. Returns removed paths."""
+    if keep <= 0 or not os.path.isdir(vis_dir):
+        return []
+    runs = sorted(d for d in os.listdir(vis_dir)
+                  if RUN_DIR_RE.match(d) and os.path.isdir(os.path.join(vis_dir, d)))
+    removed = []
+    for d in runs[:-keep]:
+        path = os.path.join(vis_dir, d)
+        try:
+            shutil.rmtree(path)
+            removed.append(path)
+        except OSError:
+            pass
+    return removed
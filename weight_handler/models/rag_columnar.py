@@ -0,0 +1,336 @@
+# models/rag_columnar.py
+import datetime, json, os, re, threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# One record per (snapshot, coin). Raw little-endian records without a header,
+# so a partition grows by plain appends and is read with np.memmap.
+SNAP_DTYPE = np.dtype([
+    ("ts", "<f8"),
+    ("coin", "<i4"),          # id into coins.json
+    ("feats", "<f4", (6,)),   # news, general, focus, flow_z, mentions_z, twitter
+    ("mask", "i1", (6,)),
+    ("label", "<f4"),         # NaN until make_labels fills it
+])
+FORMAT_VERSION = 1
+
+# Partitions:
+#   daily-YYYY-MM-DD.rec             one UTC day, appended in time order
+#   month-YYYY-MM-through-DD.rec     compacted days 01..DD of a month, sorted by ts
+# A monthly file supersedes the daily files of the days it covers; of two
+# monthly files for one month the one reaching further wins. Compaction only
+# writes new files and then deletes superseded ones, so a crash at any point
+# leaves a readable store.
+R_DAILY = re.compile(r"^daily-(\d{4}-\d{2})-(\d{2})\.rec$")
+R_MONTHLY = re.compile(r"^month-(\d{4}-\d{2})-through-(\d{2})\.rec$")
+
+COMPACT_AFTER_DAYS = int(os.getenv("RAG_SNAPSHOT_COMPACT_AFTER_DAYS", "7"))
+
+def _day(ts: float) -> str:
+    return datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc).strftime("%Y-%m-%d")
+
+def snapshot_row(v: Dict[str, Any]) -> Tuple[List[float], List[int]]:
+    """(feats, mask) logged for one scored profile."""
+    sb = v["score_breakdown"]
+    feats = [
+        sb.get("news_sent", 0.0),
+        sb.get("general_sent", 0.0),
+        sb.get("focus_sent", 0.0),
+        sb.get("flow_z", 0.0),
+        sb.get("mentions_z", 0.0),
+        sb.get("twitter_sent", 0.0),
+    ]
+    mask = [1 if v.get("news_sent") is not None else 0,
+            1 if v.get("general_sent") is not None else 0,
+            1 if v.get("focus_sent") is not None else 0,
+            1 if sb.get("flow_z") else 0,
+            1 if sb.get("mentions_z") else 0,
+            1 if v.get("twitter_sent") is not None else 0]
+    return feats, mask
+
+class SnapshotStore:
+    """
+    Columnar, day-partitioned snapshot log in a directory:
+      meta.json    format version + dtype
+      coins.json   coin names; a record's `coin` is an index into it
+      *.rec        partitions (see above)
+    Appends and compaction are serialized within the process; readers only
+    memory-map files and can run from other processes (e.g. training).
+    """
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.RLock()
+        self._coins: Optional[List[str]] = None
+        self._coin_ids: Dict[str, int] = {}
+
+    # ----------------------------
+    # Layout
+    # ----------------------------
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _ensure_root(self):
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root, exist_ok=True)
+        meta = self._path("meta.json")
+        if not os.path.exists(meta):
+            self._write_json(meta, {"version": FORMAT_VERSION, "dtype": SNAP_DTYPE.descr})
+
+    def _write_json(self, path: str, obj: Any):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def partitions(self) -> List[Tuple[str, int]]:
+        """Live partitions in chronological order as (file name, record count)."""
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return []
+        monthly: Dict[str, Tuple[str, str]] = {}   # month -> (through day, name)
+        daily: List[Tuple[str, str, str]] = []     # (month, day, name)
+        for n in names:
+            m = R_MONTHLY.match(n)
+            if m:
+                if m.group(1) not in monthly or m.group(2) > monthly[m.group(1)][0]:
+                    monthly[m.group(1)] = (m.group(2), n)
+                continue
+            d = R_DAILY.match(n)
+            if d:
+                daily.append((d.group(1), d.group(2), n))
+        keyed = [((month, "00"), name) for month, (_, name) in monthly.items()]
+        for month, day, name in daily:
+            if month in monthly and day <= monthly[month][0]:
+                continue   # already compacted
+            keyed.append(((month, day), name))
+        keyed.sort()
+        out = []
+        for _, name in keyed:
+            try:
+                size = os.path.getsize(self._path(name))
+            except OSError:
+                continue
+            out.append((name, size // SNAP_DTYPE.itemsize))
+        return out
+
+    def open_partition(self, name: str, mode: str = "r", rows: Optional[int] = None) -> np.ndarray:
+        """Memory-mapped records of one partition (whole records only)."""
+        n = rows if rows is not None else os.path.getsize(self._path(name)) // SNAP_DTYPE.itemsize
+        if n <= 0:
+            return np.empty(0, dtype=SNAP_DTYPE)
+        return np.memmap(self._path(name), dtype=SNAP_DTYPE, mode=mode, shape=(n,))
+
+    # ----------------------------
+    # Coins
+    # ----------------------------
+    def coin_names(self, refresh: bool = False) -> List[str]:
+        """Coin names by id. refresh re-reads coins.json (ids written by another process)."""
+        with self._lock:
+            if self._coins is None or refresh:
+                try:
+                    with open(self._path("coins.json"), "r", encoding="utf-8") as f:
+                        self._coins = list(json.load(f))
+                except (OSError, ValueError):
+                    self._coins = []
+                self._coin_ids = {c: i for i, c in enumerate(self._coins)}
+            return self._coins
+
+    def _coin_id_many(self, coins: Sequence[str]) -> np.ndarray:
+        names = self.coin_names()
+        added = False
+        ids = np.empty(len(coins), dtype=np.int32)
+        for i, c in enumerate(coins):
+            cid = self._coin_ids.get(c)
+            if cid is None:
+                cid = self._coin_ids[c] = len(names)
+                names.append(c)
+                added = True
+            ids[i] = cid
+        if added:
+            self._write_json(self._path("coins.json"), names)
+        return ids
+
+    # ----------------------------
+    # Writes
+    # ----------------------------
+    def append(self, ts: float, rows: Sequence[Tuple[str, List[float], List[int]]]) -> Tuple[str, int, int]:
+        """
+        Append one snapshot (coin, feats, mask per row) to its day's partition.
+        Returns (partition, first record, end record). Starting a new day
+        compacts partitions older than COMPACT_AFTER_DAYS.
+        """
+        with self._lock:
+            self._ensure_root()
+            name = f"daily-{_day(ts)}.rec"
+            path = self._path(name)
+            new_day = not os.path.exists(path)
+            rec = np.zeros(len(rows), dtype=SNAP_DTYPE)
+            rec["ts"] = ts
+            rec["coin"] = self._coin_id_many([r[0] for r in rows])
+            rec["feats"] = np.asarray([r[1] for r in rows], dtype=np.float32).reshape(-1, 6)
+            rec["mask"] = np.asarray([r[2] for r in rows], dtype=np.int8).reshape(-1, 6)
+            rec["label"] = np.nan
+            with open(path, "ab") as f:
+                size = f.tell()
+                if size % SNAP_DTYPE.itemsize:   # drop a torn record from a crashed write
+                    f.truncate(size - size % SNAP_DTYPE.itemsize)
+                    f.seek(0, os.SEEK_END)
+                start = f.tell() // SNAP_DTYPE.itemsize
+                f.write(rec.tobytes())
+            if new_day and COMPACT_AFTER_DAYS > 0:
+                cutoff = datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc) - datetime.timedelta(days=COMPACT_AFTER_DAYS)
+                self.compact(before_day=cutoff.strftime("%Y-%m-%d"))
+            return name, start, start + len(rows)
+
+    def compact(self, before_day: str) -> List[str]:
+        """
+        Merge daily partitions of days < before_day (YYYY-MM-DD) into their
+        month's file, sorted by ts. Returns the monthly files written.
+        """
+        with self._lock:
+            by_month: Dict[str, List[Tuple[str, str]]] = {}
+            monthly: Dict[str, str] = {}
+            for name, _ in self.partitions():
+                m = R_MONTHLY.match(name)
+                if m:
+                    monthly[m.group(1)] = name
+                    continue
+                d = R_DAILY.match(name)
+                if d and f"{d.group(1)}-{d.group(2)}" < before_day:
+                    by_month.setdefault(d.group(1), []).append((d.group(2), name))
+
+            written = []
+            for month, days in sorted(by_month.items()):
+                parts = [self.open_partition(monthly[month])] if month in monthly else []
+                parts += [self.open_partition(name) for _, name in sorted(days)]
+                merged = np.concatenate(parts) if parts else np.empty(0, dtype=SNAP_DTYPE)
+                merged = merged[np.argsort(merged["ts"], kind="stable")]
+                through = max(d for d, _ in days)
+                if month in monthly:
+                    through = max(through, R_MONTHLY.match(monthly[month]).group(2))
+                out_name = f"month-{month}-through-{through}.rec"
+                tmp = self._path(out_name + ".tmp")
+                merged.tofile(tmp)
+                del parts, merged
+                os.replace(tmp, self._path(out_name))
+                written.append(out_name)
+                # superseded files: older monthly of this month, covered dailies
+                stale = [name for _, name in days]
+                if month in monthly and monthly[month] != out_name:
+                    stale.append(monthly[month])
+                for name in stale:
+                    try:
+                        os.remove(self._path(name))
+                    except OSError:
+                        pass
+            return written
+
+    def import_jsonl(self, path: str) -> int:
+        """One-time import of a legacy rag_snapshots(.labeled).jsonl. Returns rows imported."""
+        batches: Dict[float, List[Tuple[str, List[float], List[int], Optional[float]]]] = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue
+                if not (isinstance(r, dict) and r.get("coin") and r.get("feats") and r.get("mask")):
+                    continue
+                batches.setdefault(float(r.get("ts") or 0.0), []).append(
+                    (r["coin"], r["feats"], r["mask"], r.get("label")))
+        n = 0
+        with self._lock:
+            for ts in sorted(batches):
+                rows = batches[ts]
+                name, start, end = self.append(ts, [(c, fe, m) for c, fe, m, _ in rows])
+                labels = np.array([np.nan if y is None else y for _, _, _, y in rows], dtype=np.float32)
+                if not np.isnan(labels).all():
+                    mm = self.open_partition(name, mode="r+", rows=end)
+                    mm["label"][start:end] = labels
+                    mm.flush()
+                    del mm
+                n += len(rows)
+        return n
+
+    # ----------------------------
+    # Reads
+    # ----------------------------
+    def iter_partitions(self, mode: str = "r") -> Iterator[Tuple[str, np.ndarray]]:
+        for name, rows in self.partitions():
+            yield name, self.open_partition(name, mode=mode, rows=rows)
+
+    def read(self, labeled_only: bool = False, since: Optional[float] = None,
+             until: Optional[float] = None) -> np.ndarray:
+        """
+        All records in time order. A single partition with no filter comes
+        back as its memmap; otherwise filtered slices are concatenated.
+        """
+        parts = []
+        for _, mm in self.iter_partitions():
+            keep = np.ones(len(mm), dtype=bool) if (labeled_only or since is not None or until is not None) else None
+            if keep is not None:
+                if labeled_only:
+                    keep &= ~np.isnan(mm["label"])
+                if since is not None:
+                    keep &= mm["ts"] >= since
+                if until is not None:
+                    keep &= mm["ts"] < until
+                parts.append(mm[keep])
+            else:
+                parts.append(mm)
+        if not parts:
+            return np.empty(0, dtype=SNAP_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+# ----------------------------
+# Readers for training
+# ----------------------------
+def labeled_matrix(store: SnapshotStore) -> Tuple[np.ndarray, np.ndarray]:
+    """X [N, 12] float32 (feats + mask) and y [N] float32 over labeled records."""
+    rec = store.read(labeled_only=True)
+    X = np.concatenate([rec["feats"], rec["mask"].astype(np.float32)], axis=1) if len(rec) else np.empty((0, 12), np.float32)
+    return X.astype(np.float32, copy=False), rec["label"].astype(np.float32)
+
+def sequence_windows(store: SnapshotStore, T: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling windows over each coin's labeled records in ts order:
+    X [M, T, 12] are T consecutive steps, y [M] the label of the step after.
+    """
+    rec = store.read(labeled_only=True)
+    if not len(rec):
+        return np.empty((0, T, 12), np.float32), np.empty(0, np.float32)
+    order = np.lexsort((rec["ts"], rec["coin"]))
+    rec = rec[order]
+    steps = np.concatenate([rec["feats"], rec["mask"].astype(np.float32)], axis=1).astype(np.float32)
+    xs, ys = [], []
+    bounds = np.flatnonzero(np.diff(rec["coin"])) + 1
+    for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(rec)]):
+        if hi - lo <= T:
+            continue
+        win = np.lib.stride_tricks.sliding_window_view(steps[lo:hi - 1], T, axis=0)  # [n-T, 12, T]
+        xs.append(np.moveaxis(win, -1, 1))
+        ys.append(rec["label"][lo + T:hi])
+    if not xs:
+        return np.empty((0, T, 12), np.float32), np.empty(0, np.float32)
+    return np.ascontiguousarray(np.concatenate(xs)), np.concatenate(ys).astype(np.float32)
+
+_STORES: Dict[str, SnapshotStore] = {}
+_STORES_LOCK = threading.Lock()
+
+def get_store(root: str) -> SnapshotStore:
+    """
+    Process-wide store per directory (created on first use). A legacy
+    `<root>.jsonl` next to a store that does not exist yet is imported once.
+    """
+    key = os.path.abspath(root)
+    with _STORES_LOCK:
+        s = _STORES.get(key)
+        if s is None:
+            s = _STORES[key] = SnapshotStore(key)
+            legacy = key + ".jsonl"
+            if not os.path.exists(os.path.join(key, "meta.json")) and os.path.exists(legacy):
+                n = s.import_jsonl(legacy)
+                print(f"Imported {n} snapshot rows from {legacy} into {key}")
+        return s
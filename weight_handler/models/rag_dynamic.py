@@ -1,8 +1,9 @@
 # models/rag_dynamic.py
-import os, json
+import os, json, math
 import torch
 import torch.nn as nn
-from typing import List, Optional, Tuple
+from torch.nn.utils.rnn import pack_padded_sequence, pad_sequence
+from typing import List, Optional, Sequence, Tuple
 
 FEATURE_DIM = 6  # [news, general, focus, flow, mentions, twitter]
 
@@ -37,6 +38,12 @@ class LSTMWeighting(nn.Module):
         last = h[:, -1, :]     # use last step representation
         return self.head(last).squeeze(-1)
 
+    def forward_padded(self, seq, lengths):  # [B, T_max, 12], [B]
+        # pack so each row's final hidden state is taken at its own last step
+        packed = pack_padded_sequence(seq, lengths, batch_first=True, enforce_sorted=False)
+        _, (h_n, _) = self.lstm(packed)
+        return self.head(h_n[-1]).squeeze(-1)
+
 def load_dynamic_model(model_dir: str) -> Optional[nn.Module]:
     """
     Try to load a trained PyTorch model (MLP or LSTM). Returns eval() or None.
@@ -78,3 +85,59 @@ def predict_score(model: nn.Module, feats: List[float], mask: List[int],
         x = torch.tensor([feats + mask], dtype=torch.float32)  # [1, 12]
         y = model(x).item()
         return float(y)
+
+def uses_sequences(model: nn.Module) -> bool:
+    """True if the model scores from a recent-snapshot sequence (LSTM)."""
+    return isinstance(model, LSTMWeighting)
+
+@torch.no_grad()
+def predict_scores(model: nn.Module, feats: Sequence[Sequence[float]], masks: Sequence[Sequence[int]],
+                   recent_seqs: Optional[Sequence[Optional[List[Tuple[List[float], List[int]]]]]] = None,
+                   current_step_fallback: bool = False, batch_size: int = 4096) -> List[Optional[float]]:
+    """
+    Batched predict_score: scores all rows with one forward pass per
+    `batch_size` chunk. Returns one score per row, None where the row could
+    not be scored, so callers can fall back to static weights per coin:
+      - LSTM: rows without a recent sequence (or with a malformed one) are
+        None, unless current_step_fallback scores them on a length-1
+        sequence of their current feats+mask. Variable lengths are padded
+        and packed.
+      - MLP: [N, 12] feats+mask in one pass.
+    Non-finite outputs are None.
+    """
+    n = len(feats)
+    out: List[Optional[float]] = [None] * n
+    if n == 0:
+        return out
+
+    if isinstance(model, LSTMWeighting):
+        rows, seqs = [], []
+        for i in range(n):
+            seq = recent_seqs[i] if recent_seqs else None
+            try:
+                if seq:
+                    t = torch.tensor([list(f) + list(m) for f, m in seq], dtype=torch.float32)
+                elif current_step_fallback:
+                    t = torch.tensor([list(feats[i]) + list(masks[i])], dtype=torch.float32)
+                else:
+                    continue
+            except (TypeError, ValueError):
+                continue
+            if t.dim() != 2 or t.shape[1] != FEATURE_DIM * 2:
+                continue
+            rows.append(i)
+            seqs.append(t)
+        for start in range(0, len(rows), batch_size):
+            chunk = seqs[start:start + batch_size]
+            lengths = torch.tensor([len(t) for t in chunk], dtype=torch.int64)
+            y = model.forward_padded(pad_sequence(chunk, batch_first=True), lengths)
+            for i, v in zip(rows[start:start + batch_size], y.tolist()):
+                out[i] = v
+    else:
+        x = torch.tensor([list(f) + list(m) for f, m in zip(feats, masks)], dtype=torch.float32)  # [N, 12]
+        for start in range(0, n, batch_size):
+            y = model(x[start:start + batch_size])
+            for j, v in enumerate(y.reshape(-1).tolist()):
+                out[start + j] = v
+
+    return [v if v is not None and math.isfinite(v) else None for v in out]
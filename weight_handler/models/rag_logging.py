@@ -2,24 +2,34 @@
 import os, json, time
 from typing import Dict, Any, List
 
+from weight_handler.models.rag_columnar import get_store, snapshot_row
+from weight_handler.models.rag_seqcache import get_history
+
 def append_snapshot(path: str, ts: float, profiles: Dict[str, Dict[str, Any]]):
-    """Append one JSON line per coin: {ts, coin, feats, mask, label?} (label filled later)"""
+    """
+    Log one snapshot row per coin: {ts, coin, feats, mask, label} (label
+    filled later by train/make_labels.py). `path` is a columnar store
+    directory (rag_columnar), or a legacy .jsonl file.
+    """
+    if not path.endswith(".jsonl"):
+        rows = [(coin, *snapshot_row(v)) for coin, v in profiles.items()]
+        if rows:
+            partition, start, end = get_store(path).append(ts, rows)
+            get_history(path).on_append(partition, start, end, rows)
+        return
+
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "a", encoding="utf-8") as f:
-        for coin, v in profiles.items():
-            feats = [
-                v["score_breakdown"].get("news_sent", 0.0),
-                v["score_breakdown"].get("general_sent", 0.0),
-                v["score_breakdown"].get("focus_sent", 0.0),
-                v["score_breakdown"].get("flow_z", 0.0),
-                v["score_breakdown"].get("mentions_z", 0.0),
-                v["score_breakdown"].get("twitter_sent", 0.0),
-            ]
-            mask = [1 if v.get("news_sent") is not None else 0,
-                    1 if v.get("general_sent") is not None else 0,
-                    1 if v.get("focus_sent") is not None else 0,
-                    1 if v["score_breakdown"].get("flow_z") else 0,
-                    1 if v["score_breakdown"].get("mentions_z") else 0,
-                    1 if v.get("twitter_sent") is not None else 0]
-            row = {"ts": ts, "coin": coin, "feats": feats, "mask": mask, "label": None}
-            f.write(json.dumps(row) + "\n")
+    rows = []
+    lines = []
+    for coin, v in profiles.items():
+        feats, mask = snapshot_row(v)
+        row = {"ts": ts, "coin": coin, "feats": feats, "mask": mask, "label": None}
+        lines.append(json.dumps(row) + "\n")
+        rows.append((coin, feats, mask))
+    data = "".join(lines).encode("utf-8")
+    with open(path, "ab") as f:
+        start = f.tell()
+        f.write(data)
+        end = f.tell()
+    # keep the in-memory sequence index current without re-reading the file
+    get_history(path).on_append(start, end, rows)
@@ -0,0 +1,81 @@
+# models/rag_lookup.py
+import bisect
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+# inputs longer than this skip the "key inside input" search (O(len^2) slices)
+MAX_CONTAINED_QUERY = 128
+
+def _trigrams(s: str) -> Set[str]:
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+class CoinLookup:
+    """
+    Resolves user input to indexed coin keys for one index snapshot:
+      1. exact key (upper-cased input)
+      2. canonical alias via `canon` ($BTC / Bitcoin -> BTC)
+      3. fuzzy: keys containing the input (trigram postings, or key prefix
+         for inputs under 3 chars) and keys contained in the input.
+    Fuzzy candidates are ranked: containing before contained, closer length
+    first, then index order (score desc), then key.
+    The trigram postings only depend on the key set, so a snapshot with the
+    same keys reuses them (see derive()).
+    """
+    def __init__(self, keys_in_order: Sequence[str], canon: Callable[[str], Optional[str]],
+                 _grams: Optional[Dict[str, Set[str]]] = None, _sorted: Optional[List[str]] = None):
+        self.rank: Dict[str, int] = {k: i for i, k in enumerate(keys_in_order)}
+        self._canon = canon
+        if _grams is None:
+            _grams = {}
+            for k in self.rank:
+                for g in _trigrams(k):
+                    _grams.setdefault(g, set()).add(k)
+        self._grams = _grams
+        self._sorted = _sorted if _sorted is not None else sorted(self.rank)
+
+    def derive(self, keys_in_order: Sequence[str]) -> "CoinLookup":
+        """Lookup for a new index order; reuses the postings if the key set is unchanged."""
+        if len(keys_in_order) == len(self.rank) and all(k in self.rank for k in keys_in_order):
+            return CoinLookup(keys_in_order, self._canon, self._grams, self._sorted)
+        return CoinLookup(keys_in_order, self._canon)
+
+    def _containing(self, q: str) -> Set[str]:
+        if len(q) < 3:
+            i = bisect.bisect_left(self._sorted, q)
+            out = set()
+            while i < len(self._sorted) and self._sorted[i].startswith(q):
+                out.add(self._sorted[i])
+                i += 1
+            return out
+        postings = sorted((self._grams.get(g, set()) for g in _trigrams(q)), key=len)
+        if not postings or not postings[0]:
+            return set()
+        cand = set(postings[0])
+        for p in postings[1:]:
+            cand &= p
+            if not cand:
+                return cand
+        return {k for k in cand if q in k}
+
+    def _contained(self, q: str) -> Set[str]:
+        n = len(q)
+        if n > MAX_CONTAINED_QUERY:
+            return set()
+        return {q[i:j] for i in range(n) for j in range(i + 1, n + 1) if q[i:j] in self.rank and (i, j) != (0, n)}
+
+    def resolve(self, query: str, limit: int = 5) -> List[Dict[str, object]]:
+        """Ranked candidates [{"coin", "match": exact|canonical|fuzzy}], best first."""
+        raw = query or ""
+        q = raw.upper()
+        if q in self.rank:
+            return [{"coin": q, "match": "exact"}]
+        c = self._canon(raw)
+        if c and c in self.rank:
+            return [{"coin": c, "match": "canonical"}]
+        if not q:
+            return []
+
+        ranked = sorted(
+            [(0, len(k) - len(q), self.rank[k], k) for k in self._containing(q)] +
+            [(1, len(q) - len(k), self.rank[k], k) for k in self._contained(q)]
+        )
+        return [{"coin": k, "match": "fuzzy"} for _, _, _, k in ranked[:max(1, limit)]]
@@ -0,0 +1,150 @@
+# models/rag_scoring.py
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Column order of the feature/mask matrices (same as rag_logging / rag_dynamic)
+FEATURES = ("news_sent", "general_sent", "focus_sent", "flow_z", "mentions_z", "twitter_sent")
+SENT_COLS = [0, 1, 2, 5]   # columns that vote in the agreement count
+WEIGHT_KEYS = ("news_sent", "general_sent", "focus_sent", "flow", "mentions", "twitter_sent")
+
+# ----------------------------
+# Robust scaling
+# ----------------------------
+def robust_params(values: np.ndarray, p: float = 0.02) -> Tuple[np.ndarray, Tuple[float, float, float, float]]:
+    """
+    Vectorized _robust_params: returns (sorted values, (lo, hi, med, mad)).
+    Index positions match the list version exactly, so the params are
+    bit-identical.
+    """
+    xs = np.sort(np.asarray(values, dtype=np.float64))
+    n = len(xs)
+    lo = xs[int(p * n)]
+    hi = xs[int(max(0, (1 - p) * n - 1))]
+    w = np.clip(xs, lo, hi)
+    med = w[n // 2]
+    mad = np.partition(np.abs(w - med), n // 2)[n // 2]
+    mad = mad if mad > 0 else 1.0
+    return xs, (float(lo), float(hi), float(med), float(mad))
+
+def robust_z(values: np.ndarray, params: Tuple[float, float, float, float]) -> np.ndarray:
+    lo, hi, med, mad = params
+    return (np.clip(values, lo, hi) - med) / (1.4826 * mad)
+
+# ----------------------------
+# Columnar profile batch
+# ----------------------------
+class ScoringBatch:
+    """
+    All coins' raw inputs packed into columns:
+      sent    [N,3] news/general/focus sentiment (NaN = missing)
+      flow    [N]   raw flow
+      mentions[N]   raw mention count
+      tw_pos / tw_neg [N] twitter tallies
+    """
+    def __init__(self, coins: List[str], sent: np.ndarray, flow: np.ndarray, mentions: np.ndarray,
+                 tw_pos: np.ndarray, tw_neg: np.ndarray):
+        self.coins = coins
+        self.sent = sent
+        self.flow = flow
+        self.mentions = mentions
+        self.tw_pos = tw_pos
+        self.tw_neg = tw_neg
+
+    def __len__(self) -> int:
+        return len(self.coins)
+
+def pack_profiles(raws: Dict[str, Dict[str, Any]], coins: Optional[Sequence[str]] = None) -> ScoringBatch:
+    coins = list(raws) if coins is None else list(coins)
+    n = len(coins)
+    sent = np.empty((n, 3), dtype=np.float64)
+    flow = np.empty(n, dtype=np.float64)
+    mentions = np.empty(n, dtype=np.float64)
+    tw_pos = np.empty(n, dtype=np.int64)
+    tw_neg = np.empty(n, dtype=np.int64)
+    nan = float("nan")
+    for i, c in enumerate(coins):
+        r = raws[c]
+        ns, gs, fs = r["news_sent"], r["general_sent"], r["focus_sent"]
+        sent[i] = (nan if ns is None else ns, nan if gs is None else gs, nan if fs is None else fs)
+        flow[i] = r["flow"]
+        mentions[i] = r["mentions"]
+        tw_pos[i] = r["twitter_pos"]
+        tw_neg[i] = r["twitter_neg"]
+    return ScoringBatch(coins, sent, flow, mentions, tw_pos, tw_neg)
+
+# ----------------------------
+# Scoring
+# ----------------------------
+def twitter_sentiment(pos: np.ndarray, neg: np.ndarray, prior: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+    """Shrunk ratio 2*p_hat-1 and a has-tallies mask (ratio is 0.0 where missing)."""
+    has = (pos + neg) > 0
+    p_hat = (pos + prior) / (pos + neg + 2 * prior)
+    return np.where(has, 2 * p_hat - 1, 0.0), has
+
+def feature_matrix(batch: ScoringBatch, flow_params, mention_params) -> Tuple[np.ndarray, np.ndarray]:
+    """[N,6] features (missing -> 0.0) and [N,6] int8 mask, columns as FEATURES."""
+    n = len(batch)
+    tws, has_tw = twitter_sentiment(batch.tw_pos, batch.tw_neg)
+    present = ~np.isnan(batch.sent)
+    feats = np.empty((n, 6), dtype=np.float64)
+    feats[:, :3] = np.where(present, batch.sent, 0.0)
+    feats[:, 3] = robust_z(batch.flow, flow_params)
+    feats[:, 4] = robust_z(batch.mentions, mention_params)
+    feats[:, 5] = tws
+    mask = np.ones((n, 6), dtype=np.int8)
+    mask[:, :3] = present
+    mask[:, 5] = has_tw
+    return feats, mask
+
+def static_scores(feats: np.ndarray, weights: Dict[str, float]) -> np.ndarray:
+    # summed left to right in the same order as _static_score
+    out = weights[WEIGHT_KEYS[0]] * feats[:, 0]
+    for j in range(1, 6):
+        out = out + weights[WEIGHT_KEYS[j]] * feats[:, j]
+    return out
+
+def evidence_confidence(feats: np.ndarray, mask: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Evidence = count of present signals (flow/mentions always count);
+    agreement = non-zero sentiment signals sharing the score's sign
+    (math.copysign semantics, so -0.0 counts as negative).
+    Returns (evidence, agree, confidence) with confidence unrounded.
+    """
+    evidence = mask.sum(axis=1, dtype=np.int64)
+    sv = feats[:, SENT_COLS]
+    agree = ((sv != 0) & (np.signbit(sv) == np.signbit(scores)[:, None])).sum(axis=1, dtype=np.int64)
+    confidence = np.minimum(1.0, 0.15 * evidence + 0.05 * agree)
+    return evidence, agree, confidence
+
+def score_batch(batch: ScoringBatch, flow_params, mention_params, weights: Dict[str, float],
+                scorer: Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]] = None) -> Dict[str, np.ndarray]:
+    """
+    Score every coin of a batch. `scorer(feats, mask)` may supply external
+    scores (e.g. a dynamic model) for all rows at once; rows where it returns
+    NaN get static weights and "dynamic" is False.
+    Score, confidence and twitter pct come back unrounded; rounding never
+    flips a sign, so the agreement count equals the scalar path's (which
+    compares against the rounded score). Callers round when materializing
+    profiles.
+    """
+    feats, mask = feature_matrix(batch, flow_params, mention_params)
+    static = static_scores(feats, weights)
+    if scorer is None:
+        final, dynamic = static, np.zeros(len(batch), dtype=bool)
+    else:
+        scores = np.asarray(scorer(feats, mask), dtype=np.float64)
+        dynamic = ~np.isnan(scores)
+        final = np.where(dynamic, scores, static)
+    evidence, agree, confidence = evidence_confidence(feats, mask, final)
+    total = np.maximum(1, batch.tw_pos + batch.tw_neg)  # ignore neutrals for pct
+    return {
+        "feats": feats,
+        "mask": mask,
+        "score": final,
+        "dynamic": dynamic,
+        "evidence": evidence,
+        "agree": agree,
+        "confidence": confidence,
+        "twitter_pos_pct": 100 * batch.tw_pos / total,
+        "twitter_neg_pct": 100 * batch.tw_neg / total,
+    }
@@ -1,13 +1,234 @@
 # models/rag_seqcache.py
-import json, os
-from typing import Dict, List, Tuple
-
-def get_recent_sequence(path: str, coin: str, T: int = 7) -> List[Tuple[List[float], List[int]]]:
-    seq = []
-    if not os.path.exists(path): return seq
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
+import json, os, threading
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from weight_handler.models.rag_columnar import get_store
+
+Step = Tuple[List[float], List[int]]   # (feats, mask) of one snapshot row
+
+# Steps kept per coin in memory; a request for a longer T grows the buffers
+HISTORY_MAXLEN = int(os.getenv("RAG_HISTORY_MAXLEN", "32"))
+
+class SnapshotHistory:
+    """
+    In-memory index over a rag_snapshots.jsonl file: coin -> ring buffer of
+    its last `maxlen` (feats, mask) steps, in file order.
+    The file is scanned once, lazily on the first read; after that only the
+    bytes appended since the last read are parsed (appends made through
+    rag_logging.append_snapshot are pushed in directly and skip even that).
+    A file that shrank or was replaced is re-scanned from the start.
+    """
+    def __init__(self, path: str, maxlen: int = HISTORY_MAXLEN):
+        self.path = path
+        self.maxlen = max(1, int(maxlen))
+        self._lock = threading.Lock()
+        self._by_coin: Dict[str, Deque[Step]] = {}
+        self._offset = 0              # bytes of the file already indexed
+        self._ident: Optional[Tuple[int, int]] = None   # (st_dev, st_ino) of the indexed file
+        self._loaded = False
+
+    # ----------------------------
+    # Indexing
+    # ----------------------------
+    def _reset(self):
+        self._by_coin = {}
+        self._offset = 0
+        self._ident = None
+
+    def _push(self, coin: str, feats: List[float], mask: List[int]):
+        buf = self._by_coin.get(coin)
+        if buf is None:
+            buf = self._by_coin[coin] = deque(maxlen=self.maxlen)
+        buf.append((feats, mask))
+
+    def _push_line(self, line: bytes):
+        try:
             r = json.loads(line)
-            if r.get("coin") == coin and r.get("feats") and r.get("mask"):
-                seq.append((r["feats"], r["mask"]))
-    return seq[-T:]  # last T entries if available
+        except ValueError:
+            return
+        if isinstance(r, dict) and r.get("coin") and r.get("feats") and r.get("mask"):
+            self._push(r["coin"], r["feats"], r["mask"])
+
+    def _sync(self):
+        """Index whatever was appended since the last sync. Caller holds the lock."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._reset()
+            self._loaded = True
+            return
+        ident = (st.st_dev, st.st_ino)
+        if ident != self._ident or st.st_size < self._offset:
+            self._reset()
+            self._ident = ident
+        if st.st_size > self._offset:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read(st.st_size - self._offset)
+            end = data.rfind(b"\n") + 1   # leave a partially written last line for later
+            for line in data[:end].splitlines():
+                if line.strip():
+                    self._push_line(line)
+            self._offset += end
+        self._loaded = True
+
+    def _ensure_maxlen(self, T: int):
+        if T > self.maxlen:
+            self.maxlen = T
+            self._reset()   # re-scan to fill the longer buffers
+
+    def on_append(self, start: int, end: int, rows: Iterable[Tuple[str, List[float], List[int]]]):
+        """
+        Record rows just written to bytes [start, end) of the file. Applied
+        directly only if the index is exactly at `start`; otherwise the next
+        read picks the bytes up from the file.
+        """
+        with self._lock:
+            if not self._loaded or self._offset != start:
+                return
+            for coin, feats, mask in rows:
+                if coin and feats and mask:
+                    self._push(coin, feats, mask)
+            self._offset = end
+
+    # ----------------------------
+    # Reads
+    # ----------------------------
+    def recent(self, coin: str, T: int = 7) -> List[Step]:
+        with self._lock:
+            self._ensure_maxlen(T)
+            self._sync()
+            buf = self._by_coin.get(coin)
+            return list(buf)[-T:] if buf else []
+
+    def recent_many(self, coins: Iterable[str], T: int = 7) -> Dict[str, List[Step]]:
+        """Last T steps for each coin (empty list if it has no history), in one pass."""
+        with self._lock:
+            self._ensure_maxlen(T)
+            self._sync()
+            out: Dict[str, List[Step]] = {}
+            for coin in coins:
+                buf = self._by_coin.get(coin)
+                out[coin] = list(buf)[-T:] if buf else []
+            return out
+
+class ColumnarHistory:
+    """
+    Same index as SnapshotHistory over a columnar snapshot store
+    (rag_columnar). Partitions are memory-mapped; records appended since the
+    last read are indexed incrementally. Compaction rewrites partitions, so
+    it triggers one full (vectorized) re-scan.
+    """
+    def __init__(self, root: str, maxlen: int = HISTORY_MAXLEN):
+        self.store = get_store(root)
+        self.maxlen = max(1, int(maxlen))
+        self._lock = threading.Lock()
+        self._by_coin: Dict[str, Deque[Step]] = {}
+        self._seen: List[Tuple[str, int]] = []   # (partition, records indexed), in order
+        self._loaded = False
+
+    def _push_block(self, rec, names: List[str]):
+        if not len(rec):
+            return
+        # stable grouping by coin keeps each coin's records in file order;
+        # only the last maxlen of each group can survive in the ring buffer
+        order = np.argsort(rec["coin"], kind="stable")
+        coins = rec["coin"][order]
+        if int(coins[-1]) >= len(names):
+            names = self.store.coin_names(refresh=True)
+        bounds = np.flatnonzero(np.diff(coins)) + 1
+        for lo, hi in zip(np.r_[0, bounds].tolist(), np.r_[bounds, len(order)].tolist()):
+            idx = order[max(lo, hi - self.maxlen):hi]
+            name = names[int(coins[lo])]
+            buf = self._by_coin.get(name)
+            if buf is None:
+                buf = self._by_coin[name] = deque(maxlen=self.maxlen)
+            feats = rec["feats"][idx].tolist()
+            masks = rec["mask"][idx].tolist()
+            buf.extend(zip(feats, masks))
+
+    def _sync(self):
+        parts = self.store.partitions()
+        seen = self._seen
+        incremental = (
+            self._loaded
+            and len(parts) >= len(seen)
+            and all(parts[i] == seen[i] for i in range(len(seen) - 1))
+            and (not seen or (parts[len(seen) - 1][0] == seen[-1][0] and parts[len(seen) - 1][1] >= seen[-1][1]))
+        )
+        if not incremental:
+            self._by_coin = {}
+            seen = []
+        names = self.store.coin_names()
+        start_at = max(0, len(seen) - 1)
+        for i in range(start_at, len(parts)):
+            name, rows = parts[i]
+            done = seen[i][1] if i < len(seen) else 0
+            if rows > done:
+                self._push_block(self.store.open_partition(name, rows=rows)[done:rows], names)
+        self._seen = list(parts)
+        self._loaded = True
+
+    def _ensure_maxlen(self, T: int):
+        if T > self.maxlen:
+            self.maxlen = T
+            self._loaded = False
+
+    def on_append(self, partition: str, start: int, end: int, rows: Iterable[Tuple[str, List[float], List[int]]]):
+        """Record rows just appended as records [start, end) of `partition` (see SnapshotHistory.on_append)."""
+        with self._lock:
+            if not self._loaded:
+                return
+            if self._seen and self._seen[-1] == (partition, start):
+                self._seen[-1] = (partition, end)
+            elif start == 0 and (not self._seen or partition > self._seen[-1][0]) and partition.startswith("daily-"):
+                self._seen.append((partition, end))
+            else:
+                return
+            for coin, feats, mask in rows:
+                buf = self._by_coin.get(coin)
+                if buf is None:
+                    buf = self._by_coin[coin] = deque(maxlen=self.maxlen)
+                # stored as float32: keep reads identical to a later re-scan
+                buf.append((np.asarray(feats, dtype=np.float32).tolist(), list(mask)))
+
+    def recent(self, coin: str, T: int = 7) -> List[Step]:
+        with self._lock:
+            self._ensure_maxlen(T)
+            self._sync()
+            buf = self._by_coin.get(coin)
+            return list(buf)[-T:] if buf else []
+
+    def recent_many(self, coins: Iterable[str], T: int = 7) -> Dict[str, List[Step]]:
+        with self._lock:
+            self._ensure_maxlen(T)
+            self._sync()
+            out: Dict[str, List[Step]] = {}
+            for coin in coins:
+                buf = self._by_coin.get(coin)
+                out[coin] = list(buf)[-T:] if buf else []
+            return out
+
+_HISTORIES: Dict[str, object] = {}
+_HISTORIES_LOCK = threading.Lock()
+
+def get_history(path: str):
+    """
+    Process-wide history index for a snapshot log (created on first use):
+    a legacy .jsonl file, or a columnar store directory.
+    """
+    key = os.path.abspath(path)
+    with _HISTORIES_LOCK:
+        h = _HISTORIES.get(key)
+        if h is None:
+            h = _HISTORIES[key] = SnapshotHistory(key) if key.endswith(".jsonl") else ColumnarHistory(key)
+        return h
+
+def get_recent_sequence(path: str, coin: str, T: int = 7) -> List[Step]:
+    return get_history(path).recent(coin, T)
+
+def get_recent_sequences(path: str, coins: Iterable[str], T: int = 7) -> Dict[str, List[Step]]:
+    return get_history(path).recent_many(coins, T)
@@ -0,0 +1,86 @@
+# models/rag_snapshot.py
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional
+
+@dataclass(frozen=True)
+class RagSnapshot:
+    """
+    One published RAG index. Readers take a reference to the current
+    snapshot and work on it without locks; writers never mutate a published
+    snapshot, they build the next one and swap the reference.
+      - version:  1, 2, ... per publish (0 = nothing built yet)
+      - built_at: epoch seconds of the publish
+      - profiles: read-only coin -> profile mapping, sorted by (score, confidence) desc
+      - lookup:   coin-resolution index over the profile keys (rag_lookup.CoinLookup)
+    Derived structures (e.g. sorted orders for ranking) are computed on
+    first use and kept with the snapshot via memo().
+    """
+    version: int
+    built_at: float
+    profiles: Mapping[str, Dict[str, Any]]
+    lookup: Optional[Any] = None
+    _memo: Dict[Hashable, Any] = field(default_factory=dict, compare=False, repr=False)
+
+    def memo(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """compute() once per snapshot and key (racing first calls may both compute; either result is kept)."""
+        try:
+            return self._memo[key]
+        except KeyError:
+            return self._memo.setdefault(key, compute())
+
+    @classmethod
+    def empty(cls) -> "RagSnapshot":
+        return cls(version=0, built_at=0.0, profiles=MappingProxyType({}))
+
+    @classmethod
+    def publish(cls, prev: "RagSnapshot", profiles_sorted: Dict[str, Dict[str, Any]], ts: float,
+                lookup: Optional[Any] = None) -> "RagSnapshot":
+        # the caller hands over ownership of profiles_sorted; it must not be touched afterwards
+        return cls(version=prev.version + 1, built_at=ts, profiles=MappingProxyType(profiles_sorted), lookup=lookup)
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution. The first
+    caller runs fn(); callers arriving while it runs wait and receive the same
+    result (or the same exception). A call arriving after it finished starts
+    a new execution.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
@@ -0,0 +1,142 @@
+# models/rag_twitter_log.py
+import json, os, threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+    _HAS_FLOCK = True
+except ImportError:  # Windows: in-process locking only
+    _HAS_FLOCK = False
+
+# Compact once the log grows past this many bytes
+COMPACT_BYTES = int(os.getenv("RAG_TWITTER_LOG_COMPACT_BYTES", str(1 << 20)))
+
+def normalize_row(one: Dict[str, Any]) -> Dict[str, Any]:
+    q = (one.get("query") or "").strip()
+    pos = int(one.get("positive", 0))
+    neg = int(one.get("negative", 0))
+    tot = int(one.get("total_mentions", pos + neg))
+    return {"query": q, "positive": pos, "negative": neg, "total_mentions": tot}
+
+def merge_rows(snapshot: bytes, log: bytes) -> Optional[List[Dict[str, Any]]]:
+    """
+    Current rows from a compacted snapshot (JSON list) plus the log (one JSON
+    row per line, replayed in order). Per query (case-insensitive) the last
+    row wins and keeps the position of the query's first appearance.
+    Returns None if neither part holds any data.
+    """
+    by_q: Dict[str, Dict[str, Any]] = {}
+    seen = False
+    if snapshot.strip():
+        try:
+            existing = json.loads(snapshot.decode("utf-8"))
+            seen = True
+        except ValueError:
+            existing = []
+        if isinstance(existing, list):
+            for r in existing:
+                if isinstance(r, dict) and r.get("query"):
+                    by_q[r["query"].upper()] = r
+    for line in log.splitlines():
+        if not line.strip():
+            continue
+        try:
+            r = json.loads(line)
+        except ValueError:
+            continue   # torn line from a crashed writer
+        seen = True
+        if isinstance(r, dict) and r.get("query"):
+            by_q[r["query"].upper()] = r
+    return list(by_q.values()) if seen else None
+
+class TwitterSentimentLog:
+    """
+    Available-coin tallies as an append-only log next to the compacted JSON:
+      <path>        compacted rows (JSON list, same shape as before)
+      <path>.log    one normalized row per line, appended per ingest
+      <path>.lock   flock'd by writers (ingest and compaction)
+    An ingest is one O_APPEND write of its rows. Compaction rewrites the JSON
+    atomically (tmp + os.replace) and then truncates the log; replaying a log
+    that survived a crash is harmless because the last row per query wins.
+    """
+    def __init__(self, path: str, compact_bytes: int = COMPACT_BYTES):
+        self.path = path
+        self.log_path = path + ".log"
+        self.lock_path = path + ".lock"
+        self.compact_bytes = compact_bytes
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if not _HAS_FLOCK:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.lock_path, "a") as lf:
+                fcntl.flock(lf, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lf, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read_bytes(path: str) -> bytes:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return b""
+
+    def ingest(self, rows) -> int:
+        """Append rows (dict or list of dicts). Returns the number of rows logged."""
+        if isinstance(rows, dict):
+            rows = [rows]
+        normalized = [normalize_row(r) for r in rows if isinstance(r, dict)]
+        normalized = [r for r in normalized if r["query"]]
+        if not normalized:
+            return 0
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in normalized).encode("utf-8")
+        with self._locked():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            if size >= self.compact_bytes:
+                self._compact_locked()
+        return len(normalized)
+
+    def read(self) -> List[Dict[str, Any]]:
+        return merge_rows(self._read_bytes(self.path), self._read_bytes(self.log_path)) or []
+
+    def compact(self) -> int:
+        """Fold the log into the JSON snapshot. Returns the number of rows written."""
+        with self._locked():
+            return self._compact_locked()
+
+    def _compact_locked(self) -> int:
+        rows = self.read()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        with open(self.log_path, "wb"):
+            pass
+        return len(rows)
+
+_LOGS: Dict[str, TwitterSentimentLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+def get_twitter_log(path: str) -> TwitterSentimentLog:
+    key = os.path.abspath(path)
+    with _LOGS_LOCK:
+        log = _LOGS.get(key)
+        if log is None:
+            log = _LOGS[key] = TwitterSentimentLog(key)
+        return log
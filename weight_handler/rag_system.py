@@ -1,9 +1,18 @@
 # models/rag_system.py
-import os, json, math, time, re, datetime
+import os, json, math, time, re, datetime, bisect, hashlib, heapq, base64
 from typing import Dict, Any, List, Tuple, Optional
-from collections import defaultdict
+from collections import Counter, defaultdict
+from itertools import islice
 from threading import Lock
 
+from services.coin_matcher import CoinMatcher
+from services.executors import run_sync
+from services.flow_series import RESOLUTIONS as FLOW_RESOLUTIONS, get_flow_series
+from weight_handler.models.rag_artifacts import ArtifactWriter, prune_run_dirs
+from weight_handler.models.rag_snapshot import RagSnapshot, SingleFlight
+from weight_handler.models.rag_lookup import CoinLookup
+from weight_handler.models.rag_twitter_log import get_twitter_log, merge_rows as merge_twitter_rows
+
 # ----------------------------
 # Paths & constants
 # ----------------------------
@@ -20,10 +29,26 @@ PATHS = {
     "coin_finder":       os.path.join(DATA_DIR, "coin_keywords_extracted.json"),
     "verified_focus":    os.path.join(DATA_DIR, "verified_sentiment_output_focus_group.json"),
     "twitter_cache":     os.path.join(DATA_DIR, "twitter_sentiment_cache.json"),
-    "snapshots":         os.path.join(DATA_DIR, "rag_snapshots.jsonl"),
+    "snapshots":         os.path.join(DATA_DIR, "rag_snapshots"),   # columnar store (models/rag_columnar.py)
     "ml_models":         os.path.abspath(os.path.join(BASE_DIR, "..", "ml_models")),
 }
 
+# Recent flow window for the "flow" feature, "<1m|1h|1d>:<buckets>" (e.g. "1h:24");
+# empty = lifetime totals from the coin flow analysis output
+FLOW_WINDOW = os.getenv("RAG_FLOW_WINDOW", "").strip()
+
+# Artifact rendering: at most one render per interval; keep the newest N run dirs
+ARTIFACT_MIN_INTERVAL = float(os.getenv("RAG_ARTIFACT_MIN_INTERVAL", "60"))
+VIS_KEEP_RUNS = int(os.getenv("RAG_VIS_KEEP_RUNS", "20"))
+
+# Vectorized scoring (numpy); the per-coin scalar path is kept as fallback
+try:
+    import numpy as np
+    from weight_handler.models import rag_scoring
+    _HAS_NP = True
+except Exception:
+    _HAS_NP = False
+
 # Best-effort plotting
 try:
     import matplotlib
@@ -55,7 +80,7 @@ NAME_TOKENS = sorted(
     {n for toks in CANON.values() for n in toks if not n.startswith("$") and n.isalpha()},
     key=len, reverse=True
 )
-R_NAMES = re.compile(r'(?<!\w)(' + "|".join(map(re.escape, NAME_TOKENS)) + r')(?!\w)', flags=re.IGNORECASE)
+NAME_MATCHER = CoinMatcher(NAME_TOKENS)
 
 def canon_coin(token: Optional[str]) -> Optional[str]:
     if not token:
@@ -77,7 +102,7 @@ def extract_coins(text: str) -> set:
         c = canon_coin(m)
         if c:
             coins.add(c)
-    for m in R_NAMES.findall(text):
+    for m in NAME_MATCHER.find(text):
         c = canon_coin(m)
         if c:
             coins.add(c)
@@ -88,30 +113,51 @@ def extract_coins(text: str) -> set:
 # ----------------------------
 LABEL_MAP = {"POSITIVE": 1, "NEGATIVE": -1, "NEUTRAL": 0}
 
-def _safe_load(path: str):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return None
-
-def _winsorize(values: Dict[str, float], p: float = 0.02) -> Dict[str, float]:
-    if not values:
-        return {}
-    xs = sorted(values.values())
-    lo = xs[int(p * len(xs))]
-    hi = xs[int(max(0, (1 - p) * len(xs) - 1))]
-    return {k: min(max(v, lo), hi) for k, v in values.items()}
-
-def _robust_scale(values: Dict[str, float]) -> Dict[str, float]:
-    if not values:
-        return {}
-    xs = sorted(values.values())
+def _robust_params(xs: List[float], p: float = 0.02) -> Tuple[float, float, float, float]:
+    """
+    Winsorize bounds and median/MAD of the winsorized values, from an
+    already sorted list. Returns (lo, hi, med, mad); mad falls back to 1.0.
+    """
     n = len(xs)
-    med = xs[n // 2]
-    mad = sorted(abs(x - med) for x in xs)[n // 2]
+    lo = xs[int(p * n)]
+    hi = xs[int(max(0, (1 - p) * n - 1))]
+    w = [min(max(x, lo), hi) for x in xs]  # still sorted
+    med = w[n // 2]
+    mad = sorted(abs(x - med) for x in w)[n // 2]
     mad = mad if mad > 0 else 1.0
-    return {k: (v - med) / (1.4826 * mad) for k, v in values.items()}
+    return lo, hi, med, mad
+
+class _RobustStats:
+    """
+    Sorted values of one numeric feature across all coins plus the
+    winsorize + robust-scale parameters derived from them. Values can be
+    inserted/replaced one at a time; `changed` tells whether the scaling of
+    the other coins moved.
+    """
+    def __init__(self, values: Dict[str, float], p: float = 0.02):
+        self.p = p
+        if _HAS_NP and values:
+            xs, self.params = rag_scoring.robust_params(np.fromiter(values.values(), float, len(values)), p)
+            self.xs = xs.tolist()
+        else:
+            self.xs = sorted(values.values())
+            self.params = _robust_params(self.xs, p) if self.xs else None
+
+    def replace(self, old: Optional[float], new: float) -> bool:
+        """Swap one coin's value (old=None inserts). Returns True if the params changed."""
+        if old is not None:
+            i = bisect.bisect_left(self.xs, old)
+            if i < len(self.xs) and self.xs[i] == old:
+                self.xs.pop(i)
+        bisect.insort(self.xs, new)
+        params = _robust_params(self.xs, self.p)
+        changed = params != self.params
+        self.params = params
+        return changed
+
+    def z(self, v: float) -> float:
+        lo, hi, med, mad = self.params
+        return (min(max(v, lo), hi) - med) / (1.4826 * mad)
 
 def _shrinkage_ratio(pos: int, neg: int, prior: int = 2) -> Optional[float]:
     total = pos + neg
@@ -145,40 +191,26 @@ def ingest_twitter_sentiment_cache(rows):
     """
     Accept a dict (single available-coin result) or list of dicts:
       {"query": "...", "positive": int, "negative": int, "total_mentions": int, ...}
-    Merge into test data/twitter_sentiment_cache.json.
+    Append them to the twitter cache log (test data/twitter_sentiment_cache.json.log);
+    the log is folded into twitter_sentiment_cache.json when it grows large.
+    Per query (case-insensitive) the latest row wins.
     """
-    cache_path = PATHS["twitter_cache"]
-    _ensure_dir(os.path.dirname(cache_path))
-    try:
-        existing = json.load(open(cache_path, "r", encoding="utf-8"))
-        if not isinstance(existing, list):
-            existing = []
-    except Exception:
-        existing = []
-
-    def normalize(one):
-        q = (one.get("query") or "").strip()
-        pos = int(one.get("positive", 0))
-        neg = int(one.get("negative", 0))
-        tot = int(one.get("total_mentions", pos + neg))
-        return {"query": q, "positive": pos, "negative": neg, "total_mentions": tot}
-
-    if isinstance(rows, dict):
-        rows = [rows]
-    normalized = [normalize(r) for r in rows if isinstance(r, dict)]
-
-    by_q = {(r.get("query") or "").upper(): r for r in existing if isinstance(r, dict) and r.get("query")}
-    for r in normalized:
-        by_q[(r["query"] or "").upper()] = r
-
-    with open(cache_path, "w", encoding="utf-8") as f:
-        json.dump(list(by_q.values()), f, ensure_ascii=False, indent=2)
+    return get_twitter_log(PATHS["twitter_cache"]).ingest(rows)
 
 # ----------------------------
 # Dynamic model loading (optional)
 # ----------------------------
+# Coins the model cannot score (LSTM without history, non-finite output) use
+# static weights; with "current" an LSTM scores them on a length-1 sequence
+# of their current features instead.
+DYN_FALLBACK = os.getenv("RAG_DYN_FALLBACK", "static").lower()
+DYN_BATCH_SIZE = int(os.getenv("RAG_DYN_BATCH_SIZE", "4096"))
+
 try:
-    from models.rag_dynamic import load_dynamic_model, predict_score  # type: ignore
+    try:
+        from weight_handler.models.rag_dynamic import load_dynamic_model, predict_score, predict_scores, uses_sequences
+    except ImportError:
+        from models.rag_dynamic import load_dynamic_model, predict_score, predict_scores, uses_sequences  # type: ignore
     _DYN_MODEL = None
     _DYN_MODEL_TRIED = False
 except Exception:
@@ -187,14 +219,23 @@ except Exception:
 
 # Optional recent-sequence provider for LSTM
 try:
-    from models.rag_seqcache import get_recent_sequence  # type: ignore
+    try:
+        from weight_handler.models.rag_seqcache import get_recent_sequence, get_recent_sequences
+    except ImportError:
+        from models.rag_seqcache import get_recent_sequence, get_recent_sequences  # type: ignore
 except Exception:
     def get_recent_sequence(path: str, coin: str, T: int = 7):
         return []
 
+    def get_recent_sequences(path: str, coins, T: int = 7):
+        return {c: [] for c in coins}
+
 # Optional snapshot appender for training
 try:
-    from models.rag_logging import append_snapshot  # type: ignore
+    try:
+        from weight_handler.models.rag_logging import append_snapshot
+    except ImportError:
+        from models.rag_logging import append_snapshot  # type: ignore
 except Exception:
     def append_snapshot(path: str, ts: float, profiles: Dict[str, Dict[str, Any]]):
         pass
@@ -383,9 +424,498 @@ def _save_evaluation(eval_dir: str, profiles_sorted: Dict[str, Dict[str, Any]]):
 # ----------------------------
 # In-memory index & lock
 # ----------------------------
-_RAG_INDEX: Dict[str, Dict[str, Any]] = {}
-_RAG_TS: float = 0.0
+# Readers take the current snapshot reference (one atomic read) and never
+# lock; writers build a new sorted dict and publish it under _BUILD_LOCK.
+_SNAPSHOT: RagSnapshot = RagSnapshot.empty()
 _BUILD_LOCK: Lock = Lock()
+_BUILD_FLIGHT = SingleFlight()
+
+# State kept from the last full build so single-coin updates can be applied
+# without reloading every source (see update_rag_twitter)
+_BUILT: bool = False
+_RAW_PROFILES: Dict[str, Dict[str, Any]] = {}        # coin -> unscored inputs
+_TW_ROWS: Dict[str, Tuple[str, int, int, int]] = {}  # QUERY -> (coin, pos, neg, total)
+_FLOW_STATS: Optional[_RobustStats] = None
+_MENTION_STATS: Optional[_RobustStats] = None
+_WEIGHTS: Dict[str, float] = {}
+
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "news_sent": 0.25,
+    "general_sent": 0.15,
+    "focus_sent": 0.20,
+    "flow": 0.25,
+    "mentions": 0.10,
+    "twitter_sent": 0.05,
+}
+
+def _new_raw_profile() -> Dict[str, Any]:
+    return {
+        "news_sent": None,
+        "general_sent": None,
+        "focus_sent": None,
+        "flow": 0.0,
+        "mentions": 0.0,
+        "twitter_pos": 0,
+        "twitter_neg": 0,
+        "twitter_total": 0,
+        "twitter_pos_pct": 0.0,
+        "twitter_neg_pct": 0.0,
+        "twitter_sent": None,
+        "sources": [],
+    }
+
+def _twitter_row_coin(q_raw: str) -> Optional[str]:
+    # Try canonical first (BTC/ETH/…)
+    coin = canon_coin(q_raw)
+    if not coin:
+        # Try extracting $TICKER from the query text
+        ex = extract_coins(q_raw)
+        coin = next(iter(ex)) if ex else None
+    # If still unknown, index under the raw query key
+    if not coin:
+        coin = _norm_query_key(q_raw)
+    return coin
+
+def _twitter_row_tallies(row: Dict[str, Any]) -> Tuple[int, int, int]:
+    pos = int(row.get("positive", 0))
+    neg = int(row.get("negative", 0))
+    total = int(row.get("total")) if "total" in row else int(row.get("total_mentions", pos + neg))
+    return pos, neg, total
+
+def _load_dynamic_model_once():
+    global _DYN_MODEL, _DYN_MODEL_TRIED
+    if not _DYN_MODEL_TRIED:
+        try:
+            _DYN_MODEL = load_dynamic_model(PATHS["ml_models"])  # may be None
+        except Exception:
+            _DYN_MODEL = None
+        _DYN_MODEL_TRIED = True
+
+def _static_score(weights: Dict[str, float], ns, gs, fs, fl, mn, tws) -> float:
+    return (weights["news_sent"] * ns +
+            weights["general_sent"] * gs +
+            weights["focus_sent"] * fs +
+            weights["flow"] * fl +
+            weights["mentions"] * mn +
+            weights["twitter_sent"] * tws)
+
+def _score_profile(coin: str, raw: Dict[str, Any], fl: float, mn: float,
+                   weights: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Derive twitter pct/ratio, score, evidence and confidence for one coin from
+    its raw inputs and robust-scaled flow/mentions. Returns a new profile dict.
+    """
+    v = dict(raw)
+    v["sources"] = list(raw["sources"])
+
+    # Twitter pct + shrunk ratio
+    pos, neg = int(v["twitter_pos"]), int(v["twitter_neg"])
+    pos_pct, neg_pct = _to_pct(pos, neg)
+    v["twitter_pos_pct"] = pos_pct
+    v["twitter_neg_pct"] = neg_pct
+    v["twitter_sent"] = _shrinkage_ratio(pos, neg, prior=2)
+
+    detail: Dict[str, Any] = {}
+    ns = v["news_sent"] if v["news_sent"] is not None else 0.0
+    gs = v["general_sent"] if v["general_sent"] is not None else 0.0
+    fs = v["focus_sent"] if v["focus_sent"] is not None else 0.0
+    tws = v["twitter_sent"] if v["twitter_sent"] is not None else 0.0
+
+    detail["news_sent"] = ns
+    detail["general_sent"] = gs
+    detail["focus_sent"] = fs
+    detail["flow_z"] = fl
+    detail["mentions_z"] = mn
+    detail["twitter_sent"] = tws
+
+    # flow/mentions are scaled over every indexed coin, so they always count
+    evidence = 2
+    evidence += 1 if v["news_sent"] is not None else 0
+    evidence += 1 if v["general_sent"] is not None else 0
+    evidence += 1 if v["focus_sent"] is not None else 0
+    evidence += 1 if v["twitter_sent"] is not None else 0
+
+    feats = [ns, gs, fs, fl, mn, tws]
+    mask = [
+        int(v["news_sent"] is not None),
+        int(v["general_sent"] is not None),
+        int(v["focus_sent"] is not None),
+        1,
+        1,
+        int(v["twitter_sent"] is not None),
+    ]
+
+    if _DYN_MODEL is not None:
+        try:
+            recent_seq = get_recent_sequence(PATHS["snapshots"], coin, T=7)
+        except Exception:
+            recent_seq = []
+        if not recent_seq and DYN_FALLBACK == "current" and uses_sequences(_DYN_MODEL):
+            recent_seq = [(feats, mask)]
+        try:
+            dyn_score = predict_score(_DYN_MODEL, feats, mask, recent_seq=recent_seq)
+            if not math.isfinite(dyn_score):
+                raise ValueError("non-finite dynamic score")
+            v["score"] = round(float(dyn_score), 4)
+            detail["_mode"] = "dynamic-model"
+        except Exception:
+            v["score"] = round(_static_score(weights, ns, gs, fs, fl, mn, tws), 4)
+            detail["_mode"] = "static-weights"
+    else:
+        v["score"] = round(_static_score(weights, ns, gs, fs, fl, mn, tws), 4)
+        detail["_mode"] = "static-weights"
+
+    agree = 0
+    for k in ["news_sent", "general_sent", "focus_sent", "twitter_sent"]:
+        val = detail.get(k, 0.0)
+        if val and math.copysign(1, val) == math.copysign(1, v["score"]):
+            agree += 1
+    v["evidence"] = evidence
+    v["confidence"] = round(min(1.0, 0.15 * evidence + 0.05 * agree), 3)
+    v["score_breakdown"] = detail
+    return v
+
+def _dynamic_scorer(coins: List[str]):
+    """
+    Batched dynamic-model scorer for rag_scoring.score_batch: one
+    predict_scores() call for all coins; NaN marks coins that fall back to
+    static weights.
+    """
+    def scorer(feats, mask):
+        seqs = None
+        if uses_sequences(_DYN_MODEL):
+            try:
+                by_coin = get_recent_sequences(PATHS["snapshots"], coins, T=7)
+            except Exception:
+                by_coin = {}
+            seqs = [by_coin.get(coin) or [] for coin in coins]
+        try:
+            ys = predict_scores(_DYN_MODEL, feats.tolist(), mask.tolist(), recent_seqs=seqs,
+                                current_step_fallback=DYN_FALLBACK == "current", batch_size=DYN_BATCH_SIZE)
+        except Exception as e:
+            print(f"Batched dynamic scoring failed, using static weights: {type(e).__name__}: {e}")
+            ys = [None] * len(coins)
+        return np.array([np.nan if y is None else y for y in ys], dtype=np.float64)
+    return scorer
+
+def _score_all(raws: Dict[str, Dict[str, Any]], flow_stats: _RobustStats, mention_stats: _RobustStats,
+               weights: Dict[str, float]) -> Dict[str, Dict[str, Any]]:
+    """
+    Score every coin. Scaling and scoring run column-wise in numpy
+    (rag_scoring), with a loaded dynamic model evaluated in one batched
+    call; only materializing the profile dicts is per coin. Static output
+    is identical to _score_profile, which remains the path for environments
+    without numpy.
+    """
+    if not raws:
+        return {}
+    if not _HAS_NP:
+        return {
+            coin: _score_profile(coin, v, flow_stats.z(v["flow"]), mention_stats.z(v["mentions"]), weights)
+            for coin, v in raws.items()
+        }
+
+    batch = rag_scoring.pack_profiles(raws)
+    scorer = _dynamic_scorer(batch.coins) if _DYN_MODEL is not None else None
+    res = rag_scoring.score_batch(batch, flow_stats.params, mention_stats.params, weights, scorer=scorer)
+    feats = res["feats"].tolist()
+    has_tw = res["mask"][:, 5].tolist()
+    dynamic = res["dynamic"].tolist()
+    scores = res["score"].tolist()
+    evidence = res["evidence"].tolist()
+    confidence = res["confidence"].tolist()
+    pos_pct = res["twitter_pos_pct"].tolist()
+    neg_pct = res["twitter_neg_pct"].tolist()
+
+    out: Dict[str, Dict[str, Any]] = {}
+    for i, coin in enumerate(batch.coins):
+        raw = raws[coin]
+        ns, gs, fs, fl, mn, tws = feats[i]
+        v = dict(raw)
+        v["sources"] = list(raw["sources"])
+        v["twitter_pos_pct"] = round(pos_pct[i], 2)
+        v["twitter_neg_pct"] = round(neg_pct[i], 2)
+        v["twitter_sent"] = tws if has_tw[i] else None
+        v["score"] = round(scores[i], 4)
+        v["evidence"] = evidence[i]
+        v["confidence"] = round(confidence[i], 3)
+        v["score_breakdown"] = {
+            "news_sent": ns,
+            "general_sent": gs,
+            "focus_sent": fs,
+            "flow_z": fl,
+            "mentions_z": mn,
+            "twitter_sent": tws,
+            "_mode": "dynamic-model" if dynamic[i] else "static-weights",
+        }
+        out[coin] = v
+    return out
+
+def _sort_index(profiles: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return dict(sorted(
+        profiles.items(),
+        key=lambda kv: (kv[1]["score"], kv[1].get("confidence", 0.0)),
+        reverse=True
+    ))
+
+def _write_artifacts(index: Dict[str, Dict[str, Any]], ts: float):
+    """Run artifacts, visualizations and evaluation files for one index (slow: matplotlib)."""
+    try:
+        _ensure_dir(VIS_DIR)
+        run_dir = os.path.join(VIS_DIR, _ts_str(ts))
+        _ensure_dir(run_dir)
+        _save_run_artifacts(run_dir, index)
+        _save_visualizations(run_dir, index, top_n=10)
+    except Exception:
+        pass
+
+    try:
+        _ensure_dir(EVAL_DIR)
+        _save_evaluation(EVAL_DIR, index)
+    except Exception:
+        pass
+
+def _render_artifacts(index: Dict[str, Dict[str, Any]], ts: float):
+    # pyplot is not thread-safe: render on the shared plot worker
+    run_sync("plot", _write_artifacts, dict(index), ts)
+    prune_run_dirs(VIS_DIR, VIS_KEEP_RUNS)
+
+_ARTIFACT_WRITER = ArtifactWriter(_render_artifacts, min_interval=ARTIFACT_MIN_INTERVAL)
+
+def flush_rag_artifacts(timeout: Optional[float] = None) -> bool:
+    """Render the latest pending artifacts now and wait for them. False on timeout."""
+    return _ARTIFACT_WRITER.flush(timeout)
+
+# ----------------------------
+# Source aggregation & change-detection cache
+# ----------------------------
+# Each aggregator turns one parsed source into per-coin contributions:
+#   {"coins": {coin: {"add": {field: v}, "set": {field: v}, "hits": n}}, ...}
+# "hits" is how many times the source label is appended to the coin's sources.
+def _contrib(coins: Dict[str, Dict[str, Any]], coin: str) -> Dict[str, Any]:
+    return coins.setdefault(coin, {"add": {}, "set": {}, "hits": 0})
+
+def _agg_coin_flow(data) -> Dict[str, Any]:
+    coins: Dict[str, Dict[str, Any]] = {}
+    if isinstance(data, dict):
+        for coin_raw, val in data.get("aggregated_flows", {}).items():
+            coin = canon_coin(coin_raw)
+            if not coin:
+                continue
+            c = _contrib(coins, coin)
+            c["add"]["flow"] = c["add"].get("flow", 0.0) + float(val)
+            c["hits"] += 1
+    return {"coins": coins}
+
+def _agg_focus_sentiment(data) -> Dict[str, Any]:
+    coins: Dict[str, Dict[str, Any]] = {}
+    if isinstance(data, dict):
+        for coin_raw, s in data.get("average_sentiment", {}).items():
+            coin = canon_coin(coin_raw)
+            if not coin:
+                continue
+            c = _contrib(coins, coin)
+            c["set"]["focus_sent"] = float(s)
+            c["hits"] += 1
+    return {"coins": coins}
+
+def _agg_coin_finder(data) -> Dict[str, Any]:
+    coins: Dict[str, Dict[str, Any]] = {}
+    if isinstance(data, dict):
+        mention_scores: Dict[str, float] = defaultdict(float)
+        for _, kw_counts in data.get("coin_keywords_filtered", {}).items():
+            if not isinstance(kw_counts, dict):
+                continue
+            for word, cnt in kw_counts.items():
+                coin = canon_coin((word or "").strip())
+                if coin:
+                    mention_scores[coin] += float(cnt)
+        for coin, m in mention_scores.items():
+            c = _contrib(coins, coin)
+            c["add"]["mentions"] = m
+            c["hits"] += 1
+    return {"coins": coins}
+
+def _agg_labelled_texts(data, label_key: str, field: str) -> Dict[str, Any]:
+    coins: Dict[str, Dict[str, Any]] = {}
+    if isinstance(data, list):
+        per_coin_scores = defaultdict(list)
+        for item in data:
+            text = item.get("text") or ""
+            label = (item.get(label_key) or "NEUTRAL").upper()
+            score = LABEL_MAP.get(label, 0)
+            for coin in extract_coins(text):
+                per_coin_scores[coin].append(score)
+        for coin, ss in per_coin_scores.items():
+            if ss:
+                c = _contrib(coins, coin)
+                c["set"][field] = sum(ss) / len(ss)
+                c["hits"] += 1
+    return {"coins": coins}
+
+def _agg_general_sentiment(data) -> Dict[str, Any]:
+    return _agg_labelled_texts(data, "sentiment", "general_sent")
+
+def _agg_news_sentiment(data) -> Dict[str, Any]:
+    return _agg_labelled_texts(data, "dominant_sentiment", "news_sent")
+
+def _agg_twitter_cache(data) -> Dict[str, Any]:
+    coins: Dict[str, Dict[str, Any]] = {}
+    tw_rows: Dict[str, Tuple[str, int, int, int]] = {}
+    if isinstance(data, list):
+        for row in data:
+            q_raw = row.get("query") or ""
+            coin = _twitter_row_coin(q_raw)
+            if not coin:
+                continue
+            pos, neg, total = _twitter_row_tallies(row)
+            c = _contrib(coins, coin)
+            for f, x in (("twitter_pos", pos), ("twitter_neg", neg), ("twitter_total", total)):
+                c["add"][f] = c["add"].get(f, 0) + x
+            c["hits"] += 1
+
+            key = q_raw.strip().upper()
+            _, p0, n0, t0 = tw_rows.get(key, (coin, 0, 0, 0))
+            tw_rows[key] = (coin, p0 + pos, n0 + neg, t0 + total)
+    return {"coins": coins, "tw_rows": tw_rows}
+
+# (PATHS key, label appended to a coin's sources, aggregator) in merge order
+_SOURCES = [
+    ("coin_flow", "coin_flow", _agg_coin_flow),
+    ("focus_sentiment", "focus_sentiment", _agg_focus_sentiment),
+    ("coin_finder", "coin_finder", _agg_coin_finder),
+    ("general_sentiment", "general_sentiment", _agg_general_sentiment),
+    ("news_sentiment", "news_sentiment", _agg_news_sentiment),
+    ("twitter_cache", "twitter_sentiment", _agg_twitter_cache),
+]
+
+def _parse_json_source(raws: List[bytes]):
+    try:
+        return json.loads(raws[0].decode("utf-8"))
+    except Exception:
+        return None
+
+def _parse_twitter_source(raws: List[bytes]):
+    # compacted JSON + append-only log, merged with ingest semantics
+    return merge_twitter_rows(raws[0], raws[1])
+
+def _source_files(name: str) -> Tuple[Tuple[str, ...], Any]:
+    """Files backing a source and the parser that turns their bytes into data."""
+    if name == "twitter_cache":
+        log = get_twitter_log(PATHS["twitter_cache"])
+        return (log.path, log.log_path), _parse_twitter_source
+    return (PATHS[name],), _parse_json_source
+
+class _SourceCache:
+    """
+    Parsed + aggregated sources keyed on (paths, mtimes, sizes, content hash).
+    A source is only re-hashed when an mtime/size changes, and only
+    re-parsed and re-aggregated when its content hash changes.
+    """
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, name: str, paths: Tuple[str, ...], aggregator, parse=_parse_json_source) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Returns (aggregate, timing) where timing = {"status", "ms"}."""
+        t0 = time.perf_counter()
+        entry = self._entries.get(name)
+        stats = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                stats.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stats.append((path, None, None))
+        if all(st[1] is None for st in stats):
+            self._entries.pop(name, None)
+            return aggregator(None), {"status": "missing", "ms": round((time.perf_counter() - t0) * 1000, 3)}
+
+        sig = tuple(stats)
+        if entry and entry["sig"] == sig:
+            status = "cached"
+        else:
+            raws = []
+            h = hashlib.sha1()
+            for path, mtime, _ in stats:
+                raw = b""
+                if mtime is not None:
+                    try:
+                        with open(path, "rb") as f:
+                            raw = f.read()
+                    except OSError:
+                        pass
+                raws.append(raw)
+                h.update(hashlib.sha1(raw).digest())
+            digest = h.hexdigest()
+            if entry and entry["sha1"] == digest:
+                entry["sig"] = sig
+                status = "unchanged"
+            else:
+                entry = {"sig": sig, "sha1": digest, "agg": aggregator(parse(raws))}
+                self._entries[name] = entry
+                status = "parsed"
+        return entry["agg"], {"status": status, "ms": round((time.perf_counter() - t0) * 1000, 3)}
+
+_SOURCE_CACHE = _SourceCache()
+
+def _apply_flow_window(profiles: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Replace lifetime flow totals with sums over the recent FLOW_WINDOW from
+    the in-memory flow series. No-op (None) when unset, malformed, or the
+    series holds no data yet (e.g. right after a restart).
+    """
+    res, _, n = FLOW_WINDOW.partition(":")
+    if res not in FLOW_RESOLUTIONS or not n.isdigit():
+        return None
+    totals = get_flow_series().window_totals(res, int(n))
+    if not totals:
+        return None
+    windowed: Dict[str, float] = defaultdict(float)
+    for coin_raw, w in totals.items():
+        coin = canon_coin(coin_raw)
+        if coin and w["count"]:
+            windowed[coin] += w["sum"]
+    for p in profiles.values():
+        p["flow"] = 0.0
+    for coin, total in windowed.items():
+        p = profiles[coin]
+        p["flow"] = total
+        p["sources"].append("coin_flow_window")
+    return {"window": FLOW_WINDOW, "coins": len(windowed)}
+
+def _merge_source(profiles: Dict[str, Dict[str, Any]], label: str, agg: Dict[str, Any]):
+    for coin, c in agg["coins"].items():
+        p = profiles[coin]
+        for f, x in c["add"].items():
+            p[f] += x
+        for f, x in c["set"].items():
+            p[f] = x
+        p["sources"].extend([label] * c["hits"])
+
+# ----------------------------
+# Snapshot publishing
+# ----------------------------
+def _publish(profiles: Dict[str, Dict[str, Any]]) -> RagSnapshot:
+    """Sort, wrap and swap in a new snapshot. Caller holds _BUILD_LOCK."""
+    global _SNAPSHOT
+    ordered = _sort_index(profiles)
+    prev = _SNAPSHOT.lookup
+    lookup = prev.derive(list(ordered)) if prev is not None else CoinLookup(list(ordered), canon_coin)
+    snap = RagSnapshot.publish(_SNAPSHOT, ordered, time.time(), lookup=lookup)
+    _SNAPSHOT = snap
+    return snap
+
+def rag_snapshot() -> RagSnapshot:
+    """Current index snapshot (version 0 until the first build)."""
+    return _SNAPSHOT
+
+def ensure_rag_index() -> RagSnapshot:
+    """Current snapshot, building the index first if nothing was published yet."""
+    snap = _SNAPSHOT
+    if snap.version == 0:
+        build_rag_index()
+        snap = _SNAPSHOT
+    return snap
 
 # ----------------------------
 # Core builder
@@ -393,281 +923,263 @@ _BUILD_LOCK: Lock = Lock()
 def build_rag_index(weights: Dict[str, float] = None) -> Dict[str, Any]:
     """
     Build per-coin profiles from pipeline outputs, normalize, score
-    (optionally with a dynamic model), cache, and write artifacts.
+    (optionally with a dynamic model), publish a new snapshot, and write
+    artifacts. Concurrent calls with the same weights share one build and
+    all receive its result.
     """
-    global _RAG_INDEX, _RAG_TS, _DYN_MODEL, _DYN_MODEL_TRIED
-    with _BUILD_LOCK:
-        weights = weights or {
-            "news_sent": 0.25,
-            "general_sent": 0.15,
-            "focus_sent": 0.20,
-            "flow": 0.25,
-            "mentions": 0.10,
-            "twitter_sent": 0.05,
-        }
+    weights = weights or DEFAULT_WEIGHTS
+    return _BUILD_FLIGHT.do(tuple(sorted(weights.items())), lambda: _build_rag_index(weights))
 
+def _build_rag_index(weights: Dict[str, float]) -> Dict[str, Any]:
+    global _BUILT, _RAW_PROFILES, _TW_ROWS
+    global _FLOW_STATS, _MENTION_STATS, _WEIGHTS
+    with _BUILD_LOCK:
         # load dynamic model once
-        if not _DYN_MODEL_TRIED:
-            try:
-                _DYN_MODEL = load_dynamic_model(PATHS["ml_models"])  # may be None
-            except Exception:
-                _DYN_MODEL = None
-            _DYN_MODEL_TRIED = True
-
-        profiles: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
-            "news_sent": None,
-            "general_sent": None,
-            "focus_sent": None,
-            "flow": 0.0,
-            "mentions": 0.0,
-            "twitter_pos": 0,
-            "twitter_neg": 0,
-            "twitter_total": 0,
-            "twitter_pos_pct": 0.0,
-            "twitter_neg_pct": 0.0,
-            "twitter_sent": None,
-            "sources": [],
-        })
-
-        # 1) Coin Flow
-        coin_flow = _safe_load(PATHS["coin_flow"])
-        if isinstance(coin_flow, dict):
-            agg = coin_flow.get("aggregated_flows", {})
-            for coin_raw, val in agg.items():
-                coin = canon_coin(coin_raw)
-                if not coin:
-                    continue
-                profiles[coin]["flow"] = profiles[coin].get("flow", 0.0) + float(val)
-                profiles[coin]["sources"].append("coin_flow")
-
-        # 2) Focus Sentiment
-        focus_sent = _safe_load(PATHS["focus_sentiment"])
-        if isinstance(focus_sent, dict):
-            avg = focus_sent.get("average_sentiment", {})
-            for coin_raw, s in avg.items():
-                coin = canon_coin(coin_raw)
-                if not coin:
-                    continue
-                profiles[coin]["focus_sent"] = float(s)
-                profiles[coin]["sources"].append("focus_sentiment")
-
-        # 3) Coin Finder Mentions
-        cf = _safe_load(PATHS["coin_finder"])
-        if isinstance(cf, dict):
-            ckf = cf.get("coin_keywords_filtered", {})
-            mention_scores: Dict[str, float] = defaultdict(float)
-            for _, kw_counts in ckf.items():
-                if not isinstance(kw_counts, dict):
-                    continue
-                for word, cnt in kw_counts.items():
-                    coin = canon_coin((word or "").strip())
-                    if coin:
-                        mention_scores[coin] += float(cnt)
-            for coin, m in mention_scores.items():
-                profiles[coin]["mentions"] = profiles[coin].get("mentions", 0.0) + m
-                profiles[coin]["sources"].append("coin_finder")
-
-        # 4) General Sentiment
-        gen = _safe_load(PATHS["general_sentiment"])
-        if isinstance(gen, list):
-            per_coin_scores = defaultdict(list)
-            for item in gen:
-                text = item.get("text") or ""
-                label = (item.get("sentiment") or "NEUTRAL").upper()
-                score = LABEL_MAP.get(label, 0)
-                for coin in extract_coins(text):
-                    per_coin_scores[coin].append(score)
-            for coin, ss in per_coin_scores.items():
-                if ss:
-                    profiles[coin]["general_sent"] = sum(ss) / len(ss)
-                    profiles[coin]["sources"].append("general_sentiment")
-
-        # 5) News Sentiment
-        news = _safe_load(PATHS["news_sentiment"])
-        if isinstance(news, list):
-            per_coin_scores = defaultdict(list)
-            for item in news:
-                text = item.get("text") or ""
-                label = (item.get("dominant_sentiment") or "NEUTRAL").upper()
-                score = LABEL_MAP.get(label, 0)
-                for coin in extract_coins(text):
-                    per_coin_scores[coin].append(score)
-            for coin, ss in per_coin_scores.items():
-                if ss:
-                    profiles[coin]["news_sent"] = sum(ss) / len(ss)
-                    profiles[coin]["sources"].append("news_sentiment")
-
-        # 6) Twitter cache (from Available-coin runs)
-        tw = _safe_load(PATHS["twitter_cache"])
-        if isinstance(tw, list):
-            for row in tw:
-                q_raw = row.get("query") or ""
-                # Try canonical first (BTC/ETH/…)
-                coin = canon_coin(q_raw)
-                if not coin:
-                    # Try extracting $TICKER from the query text
-                    ex = extract_coins(q_raw)
-                    coin = next(iter(ex)) if ex else None
-                # If still unknown, index under the raw query key
-                if not coin:
-                    coin = _norm_query_key(q_raw)
-                if not coin:
-                    continue
-
-                pos = int(row.get("positive", 0))
-                neg = int(row.get("negative", 0))
-                total = int(row.get("total")) if "total" in row else int(row.get("total_mentions", pos + neg))
-                profiles[coin]["twitter_pos"] += pos
-                profiles[coin]["twitter_neg"] += neg
-                profiles[coin]["twitter_total"] += total
-                profiles[coin]["sources"].append("twitter_sentiment")
-
-        # Normalize numeric
-        flow_map = {c: v["flow"] for c, v in profiles.items()}
-        mentions_map = {c: v["mentions"] for c, v in profiles.items()}
-        flow_z = _robust_scale(_winsorize(flow_map))
-        mentions_z = _robust_scale(_winsorize(mentions_map))
-
-        # Twitter pct + shrunk ratio
-        for coin, v in profiles.items():
-            pos, neg = int(v["twitter_pos"]), int(v["twitter_neg"])
-            pos_pct, neg_pct = _to_pct(pos, neg)
-            v["twitter_pos_pct"] = pos_pct
-            v["twitter_neg_pct"] = neg_pct
-            v["twitter_sent"] = _shrinkage_ratio(pos, neg, prior=2)
+        _load_dynamic_model_once()
+
+        build_t0 = time.perf_counter()
+        profiles: Dict[str, Dict[str, Any]] = defaultdict(_new_raw_profile)
+        tw_rows: Dict[str, Tuple[str, int, int, int]] = {}
+
+        # Sources: coin flow, focus sentiment, coin finder mentions, general and
+        # news sentiment, twitter cache (from Available-coin runs). Unchanged
+        # files are served from the source cache.
+        source_timings: Dict[str, Dict[str, Any]] = {}
+        for name, label, aggregator in _SOURCES:
+            paths, parse = _source_files(name)
+            agg, timing = _SOURCE_CACHE.get(name, paths, aggregator, parse)
+            t0 = time.perf_counter()
+            _merge_source(profiles, label, agg)
+            timing["merge_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+            source_timings[name] = timing
+            if name == "twitter_cache":
+                tw_rows = dict(agg["tw_rows"])
+        flow_window = _apply_flow_window(profiles) if FLOW_WINDOW else None
+
+        # Normalize numeric (winsorize + robust scale over all coins)
+        flow_stats = _RobustStats({c: v["flow"] for c, v in profiles.items()})
+        mention_stats = _RobustStats({c: v["mentions"] for c, v in profiles.items()})
 
         # Final scoring
-        for coin, v in profiles.items():
-            detail: Dict[str, Any] = {}
-            ns = v["news_sent"] if v["news_sent"] is not None else 0.0
-            gs = v["general_sent"] if v["general_sent"] is not None else 0.0
-            fs = v["focus_sent"] if v["focus_sent"] is not None else 0.0
-            tws = v["twitter_sent"] if v["twitter_sent"] is not None else 0.0
-            fl = flow_z.get(coin, 0.0)
-            mn = mentions_z.get(coin, 0.0)
-
-            detail["news_sent"] = ns
-            detail["general_sent"] = gs
-            detail["focus_sent"] = fs
-            detail["flow_z"] = fl
-            detail["mentions_z"] = mn
-            detail["twitter_sent"] = tws
-
-            evidence = 0
-            evidence += 1 if v["news_sent"] is not None else 0
-            evidence += 1 if v["general_sent"] is not None else 0
-            evidence += 1 if v["focus_sent"] is not None else 0
-            evidence += 1 if coin in flow_z else 0
-            evidence += 1 if coin in mentions_z else 0
-            evidence += 1 if v["twitter_sent"] is not None else 0
-
-            feats = [ns, gs, fs, fl, mn, tws]
-            mask = [
-                int(v["news_sent"] is not None),
-                int(v["general_sent"] is not None),
-                int(v["focus_sent"] is not None),
-                int(coin in flow_z),
-                int(coin in mentions_z),
-                int(v["twitter_sent"] is not None),
-            ]
-
-            if '_DYN_MODEL' in globals() and _DYN_MODEL is not None:
-                try:
-                    recent_seq = get_recent_sequence(PATHS["snapshots"], coin, T=7)
-                except Exception:
-                    recent_seq = []
-                try:
-                    dyn_score = predict_score(_DYN_MODEL, feats, mask, recent_seq=recent_seq)
-                    v["score"] = round(float(dyn_score), 4)
-                    detail["_mode"] = "dynamic-model"
-                except Exception:
-                    score = (weights["news_sent"] * ns +
-                             weights["general_sent"] * gs +
-                             weights["focus_sent"] * fs +
-                             weights["flow"] * fl +
-                             weights["mentions"] * mn +
-                             weights["twitter_sent"] * tws)
-                    v["score"] = round(score, 4)
-                    detail["_mode"] = "static-weights"
-            else:
-                score = (weights["news_sent"] * ns +
-                         weights["general_sent"] * gs +
-                         weights["focus_sent"] * fs +
-                         weights["flow"] * fl +
-                         weights["mentions"] * mn +
-                         weights["twitter_sent"] * tws)
-                v["score"] = round(score, 4)
-                detail["_mode"] = "static-weights"
-
-            agree = 0
-            for k in ["news_sent", "general_sent", "focus_sent", "twitter_sent"]:
-                val = detail.get(k, 0.0)
-                if val and math.copysign(1, val) == math.copysign(1, v["score"]):
-                    agree += 1
-            v["evidence"] = evidence
-            v["confidence"] = round(min(1.0, 0.15 * evidence + 0.05 * agree), 3)
-            v["score_breakdown"] = detail
-
-        _RAG_INDEX = dict(sorted(
-            profiles.items(),
-            key=lambda kv: (kv[1]["score"], kv[1].get("confidence", 0.0)),
-            reverse=True
-        ))
-        _RAG_TS = time.time()
+        scored = _score_all(profiles, flow_stats, mention_stats, weights)
 
-        try:
-            append_snapshot(PATHS["snapshots"], _RAG_TS, _RAG_INDEX)
-        except Exception:
-            pass
+        snap = _publish(scored)
 
-        try:
-            _ensure_dir(VIS_DIR)
-            run_dir = os.path.join(VIS_DIR, _ts_str(_RAG_TS))
-            _ensure_dir(run_dir)
-            _save_run_artifacts(run_dir, _RAG_INDEX)
-            _save_visualizations(run_dir, _RAG_INDEX, top_n=10)
-        except Exception:
-            pass
+        _BUILT = True
+        _RAW_PROFILES = dict(profiles)
+        _TW_ROWS = tw_rows
+        _FLOW_STATS, _MENTION_STATS = flow_stats, mention_stats
+        _WEIGHTS = dict(weights)
 
         try:
-            _ensure_dir(EVAL_DIR)
-            _save_evaluation(EVAL_DIR, _RAG_INDEX)
+            append_snapshot(PATHS["snapshots"], snap.built_at, snap.profiles)
         except Exception:
             pass
 
-        return {"coins_indexed": len(_RAG_INDEX), "updated_at": _RAG_TS}
+        index_ms = round((time.perf_counter() - build_t0) * 1000, 3)
+        # artifacts/plots are written in the background (coalesced)
+        _ARTIFACT_WRITER.submit(snap.profiles, snap.built_at)
+
+        return {
+            "coins_indexed": len(snap.profiles),
+            "version": snap.version,
+            "updated_at": snap.built_at,
+            "flow_window": flow_window,
+            "timings": {
+                "sources": source_timings,
+                "index_ms": index_ms,
+                "total_ms": round((time.perf_counter() - build_t0) * 1000, 3),
+            },
+        }
+
+# ----------------------------
+# Incremental updates
+# ----------------------------
+def update_rag_twitter(rows) -> Dict[str, Any]:
+    """
+    Apply new Available-coin tallies (same row shape as
+    ingest_twitter_sentiment_cache) to the in-memory index without a full
+    rebuild: the coin's twitter counts are replaced, flow/mentions scaling
+    is recomputed only when a new coin joins, and only affected coins are
+    re-scored into a new snapshot (unchanged profiles are shared with the
+    previous one). Artifacts go through the coalescing background writer.
+    Falls back to build_rag_index() before the first build.
+    """
+    if not _BUILT:
+        return build_rag_index()
+    if isinstance(rows, dict):
+        rows = [rows]
+
+    with _BUILD_LOCK:
+        touched = set()
+        rescale = False
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            q_raw = (row.get("query") or "").strip()
+            key = q_raw.upper()
+            coin = _twitter_row_coin(q_raw) if key else None
+            if not coin:
+                continue
+            pos, neg, total = _twitter_row_tallies(row)
+
+            old = _TW_ROWS.get(key)
+            if old:
+                ocoin, opos, oneg, otot = old
+                r = _RAW_PROFILES[ocoin]
+                r["twitter_pos"] -= opos
+                r["twitter_neg"] -= oneg
+                r["twitter_total"] -= otot
+                touched.add(ocoin)
+
+            if coin not in _RAW_PROFILES:
+                _RAW_PROFILES[coin] = _new_raw_profile()
+                # a new coin enters flow/mentions scaling with 0.0
+                rescale |= _FLOW_STATS.replace(None, 0.0)
+                rescale |= _MENTION_STATS.replace(None, 0.0)
+
+            r = _RAW_PROFILES[coin]
+            r["twitter_pos"] += pos
+            r["twitter_neg"] += neg
+            r["twitter_total"] += total
+            if not old:
+                r["sources"].append("twitter_sentiment")
+            _TW_ROWS[key] = (coin, pos, neg, total)
+            touched.add(coin)
+
+        if not touched:
+            snap = _SNAPSHOT
+            return {"coins_indexed": len(snap.profiles), "version": snap.version,
+                    "updated_at": snap.built_at, "rescored": 0}
+
+        # copy-on-write: published profile dicts are never modified
+        if rescale:
+            index = _score_all(_RAW_PROFILES, _FLOW_STATS, _MENTION_STATS, _WEIGHTS)
+        else:
+            index = dict(_SNAPSHOT.profiles)
+            for coin in touched:
+                r = _RAW_PROFILES[coin]
+                index[coin] = _score_profile(coin, r, _FLOW_STATS.z(r["flow"]), _MENTION_STATS.z(r["mentions"]), _WEIGHTS)
+
+        snap = _publish(index)
+        _ARTIFACT_WRITER.submit(snap.profiles, snap.built_at)
+        return {
+            "coins_indexed": len(snap.profiles),
+            "version": snap.version,
+            "updated_at": snap.built_at,
+            "rescored": len(_RAW_PROFILES) if rescale else len(touched),
+        }
 
 # ----------------------------
 # Query helpers
 # ----------------------------
-def rag_top(top_k: int = 10) -> List[Dict[str, Any]]:
-    items = list(_RAG_INDEX.items())[:max(1, top_k)]
+def rag_top(top_k: int = 10, snapshot: Optional[RagSnapshot] = None) -> List[Dict[str, Any]]:
+    index = (snapshot or _SNAPSHOT).profiles
     out = []
-    for coin, v in items:
+    for coin, v in islice(index.items(), max(1, top_k)):
         out.append({"coin": coin, "score": v["score"], **v})
     return out
 
-def rag_explain(coin: str) -> Dict[str, Any]:
-    c_input = (coin or "")
-    c = c_input.upper()
+# Sort keys whose order is precomputed once per snapshot; any other numeric
+# profile / score_breakdown field is ranked ad hoc with a heap.
+RANK_KEYS: Dict[str, Any] = {
+    "score": lambda v: v["score"],
+    "confidence": lambda v: v.get("confidence", 0.0),
+    "flow_z": lambda v: v["score_breakdown"].get("flow_z", 0.0),
+    "twitter_sent": lambda v: v["score_breakdown"].get("twitter_sent", 0.0),
+}
+RANK_DEFAULT_FIELDS = ("score", "confidence", "evidence")
+
+def _rank_value(field: str):
+    if field in RANK_KEYS:
+        return RANK_KEYS[field]
+    numeric = {k for k, x in _new_raw_profile().items() if isinstance(x, (int, float)) and not isinstance(x, bool)}
+    numeric |= {"evidence", "news_sent", "general_sent", "focus_sent", "twitter_sent"}
+    breakdown = {"news_sent", "general_sent", "focus_sent", "flow_z", "mentions_z"}
+    if field not in numeric and field not in breakdown:
+        raise ValueError(f"Unknown sort field '{field}'")
+
+    def value(v):
+        x = v.get(field) if field in numeric else None
+        if x is None:
+            x = v["score_breakdown"].get(field)
+        return float(x) if isinstance(x, (int, float)) else float("-inf")   # missing sorts last
+    return value
+
+def _encode_cursor(key: Tuple[float, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        neg, coin = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+        return float(neg), str(coin)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _project(coin: str, v: Dict[str, Any], fields) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"coin": coin}
+    for f in fields:
+        head, _, sub = f.partition(".")
+        x = v.get(head)
+        if sub:
+            x = x.get(sub) if isinstance(x, dict) else None
+        # copies keep the published snapshot immutable
+        out[f] = dict(x) if isinstance(x, dict) else list(x) if isinstance(x, list) else x
+    return out
 
-    v = _RAG_INDEX.get(c)
-    if not v:
-        # try canonical mapping ($BTC -> BTC, 'Bitcoin' -> BTC)
-        c_can = canon_coin(c_input)
-        if c_can and c_can in _RAG_INDEX:
-            c, v = c_can, _RAG_INDEX[c_can]
+def rag_rank(sort_by: str = "score", limit: int = 50, cursor: Optional[str] = None,
+             fields: Optional[List[str]] = None, min_evidence: int = 0,
+             snapshot: Optional[RagSnapshot] = None) -> Dict[str, Any]:
+    """
+    Page through the index ordered by `sort_by` (desc, ties by coin).
+    `cursor` is the opaque next_cursor of the previous page; it encodes the
+    last (value, coin) seen, so paging stays consistent across index
+    updates. `fields` projects each item (dotted names reach into nested
+    dicts, e.g. score_breakdown.mentions_z). Raises ValueError on an
+    unknown sort field or a malformed cursor.
+    """
+    snap = snapshot or _SNAPSHOT
+    index = snap.profiles
+    value = _rank_value(sort_by)
+    limit = max(1, int(limit))
+    after = _decode_cursor(cursor) if cursor else None
+    fields = list(fields) if fields else list(RANK_DEFAULT_FIELDS)
+
+    def admitted(coin):
+        return min_evidence <= 0 or index[coin].get("evidence", 0) >= min_evidence
+
+    if sort_by in RANK_KEYS:
+        keys = snap.memo(("rank", sort_by), lambda: sorted((-value(v), c) for c, v in index.items()))
+        start = bisect.bisect_right(keys, after) if after else 0
+        page = list(islice((k for k in islice(keys, start, None) if admitted(k[1])), limit + 1))
+    else:
+        page = heapq.nsmallest(limit + 1, (
+            (-value(v), c) for c, v in index.items()
+            if (after is None or (-value(v), c) > after) and admitted(c)
+        ))
 
-    if not v:
-        # fuzzy fallback: substring match
-        for k in _RAG_INDEX.keys():
-            if c in k or k in c:
-                c = k
-                v = _RAG_INDEX[k]
-                break
+    more = len(page) > limit
+    page = page[:limit]
+    evidence_hist = snap.memo("evidence_hist", lambda: Counter(v.get("evidence", 0) for v in index.values()))
+    return {
+        "items": [_project(c, index[c], fields) for _, c in page],
+        "next_cursor": _encode_cursor(page[-1]) if more else None,
+        "sort_by": sort_by,
+        "total": sum(n for e, n in evidence_hist.items() if e >= min_evidence),
+        "version": snap.version,
+        "updated_at": snap.built_at,
+    }
 
-    if not v:
-        return {"coin": coin, "found": False}
+def rag_explain(coin: str, snapshot: Optional[RagSnapshot] = None) -> Dict[str, Any]:
+    snap = snapshot or _SNAPSHOT
+    index = snap.profiles
+    # exact key, canonical alias ($BTC / Bitcoin -> BTC), then ranked fuzzy
+    candidates = snap.lookup.resolve(coin or "") if snap.lookup is not None else []
+    if not candidates:
+        return {"coin": coin, "found": False,
+                "index_version": snap.version, "index_updated_at": snap.built_at}
+    c = candidates[0]["coin"]
+    v = index[c]
 
     sb = v.get("score_breakdown", {})
     ns = sb.get("news_sent", 0.0)
@@ -715,5 +1227,9 @@ def rag_explain(coin: str) -> Dict[str, Any]:
             "neg_pct": neg_pct,
             "shrunk_sentiment": twf
         },
-        "raw": v
+        "raw": dict(v),
+        "matched_by": candidates[0]["match"],
+        "alternatives": [x["coin"] for x in candidates[1:]],
+        "index_version": snap.version,
+        "index_updated_at": snap.built_at,
     }
@@ -1,47 +1,56 @@
 # train/make_labels.py
 import json, os
-from collections import defaultdict
+import numpy as np
 
-SNAP_IN   = "test_data/rag_snapshots.jsonl"
-SNAP_OUT  = "test_data/rag_snapshots_labeled.jsonl"
+from weight_handler.models.rag_columnar import get_store
+
+SNAP_STORE = os.getenv("RAG_SNAPSHOT_STORE", "test data/rag_snapshots")  # columnar store written by rag_system
 PRICES    = "test_data/ohlc.json"  # {"BTC": [{"ts":unix, "close":...}, ...], ...}
 
-def nearest_future(ts_list, ts):
-    # find next timestamp > ts; assume ts_list sorted
-    import bisect
-    i = bisect.bisect_right(ts_list, ts)
-    return ts_list[i] if i < len(ts_list) else None
+def label_records(ts: np.ndarray, coin: np.ndarray, coin_names, pmap) -> np.ndarray:
+    """
+    Next-step simple return per record: close at the first price ts after
+    the snapshot vs the close just before it. NaN where no price follows.
+    """
+    labels = np.full(len(ts), np.nan, dtype=np.float32)
+    sec = np.floor(ts)
+    for cid in np.unique(coin):
+        c = coin_names[int(cid)]
+        if c not in pmap:
+            continue
+        ts_arr, closes = pmap[c]
+        rows = np.flatnonzero(coin == cid)
+        idx = np.searchsorted(ts_arr, sec[rows], side="right")
+        ok = idx < len(ts_arr)
+        rows, idx = rows[ok], idx[ok]
+        p0 = closes[np.maximum(idx - 1, 0)]
+        p1 = closes[idx]
+        good = p0 > 0
+        labels[rows[good]] = (p1[good] - p0[good]) / p0[good]  # simple return; or log-return
+    return labels
 
 def run():
     with open(PRICES, "r", encoding="utf-8") as f:
         ohlc = json.load(f)
-    # build per-coin ts->price map
+    # build per-coin sorted ts + close arrays
     pmap = {}
     for c, rows in ohlc.items():
-        rows.sort(key=lambda r: r["ts"])
-        pmap[c] = ( [r["ts"] for r in rows], {r["ts"]: r["close"] for r in rows} )
+        price_map = {r["ts"]: r["close"] for r in rows}
+        ts_list = sorted(price_map)
+        pmap[c] = (np.array(ts_list, dtype=np.float64), np.array([price_map[t] for t in ts_list], dtype=np.float64))
 
-    out = open(SNAP_OUT, "w", encoding="utf-8")
-    with open(SNAP_IN, "r", encoding="utf-8") as f:
-        for line in f:
-            r = json.loads(line)
-            coin = r["coin"]; ts = int(r["ts"])
-            if coin not in pmap:
-                r["label"] = None
-            else:
-                ts_list, price_map = pmap[coin]
-                nxt = nearest_future(ts_list, ts)
-                if nxt is None:
-                    r["label"] = None
-                else:
-                    p0 = price_map.get(ts_list[max(0, ts_list.index(nxt)-1)], None)
-                    p1 = price_map[nxt]
-                    if p0 is None or p0 <= 0:
-                        r["label"] = None
-                    else:
-                        r["label"] = float((p1 - p0) / p0)  # simple return; or log-return
-            out.write(json.dumps(r) + "\n")
-    out.close()
+    # labels are written in place into each memory-mapped partition
+    store = get_store(SNAP_STORE)
+    names = store.coin_names(refresh=True)
+    labeled = total = 0
+    for name, mm in store.iter_partitions(mode="r+"):
+        if not len(mm):
+            continue
+        mm["label"] = label_records(mm["ts"], mm["coin"], names, pmap)
+        mm.flush()
+        labeled += int((~np.isnan(mm["label"])).sum())
+        total += len(mm)
+    print(f"labeled {labeled}/{total} snapshot rows in {SNAP_STORE}")
 
 if __name__ == "__main__":
     run()
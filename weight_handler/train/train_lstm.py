@@ -1,43 +1,28 @@
 # train/train_lstm.py
-import os, json, math, collections
+import os, math
 import torch, torch.nn as nn
 from torch.utils.data import Dataset, DataLoader
-from models.rag_dynamic import LSTMWeighting, FEATURE_DIM
+from weight_handler.models.rag_dynamic import LSTMWeighting, FEATURE_DIM
+from weight_handler.models.rag_columnar import get_store, sequence_windows
 
-SNAP_PATH = "test_data/rag_snapshots_labeled.jsonl"
+SNAP_STORE = os.getenv("RAG_SNAPSHOT_STORE", "test data/rag_snapshots")  # labels filled by make_labels.py
 SAVE_DIR  = "ml_models"; os.makedirs(SAVE_DIR, exist_ok=True)
 T = 7  # sequence length
 
 class SeqDS(Dataset):
-    def __init__(self, path, T):
-        by_coin = collections.defaultdict(list)
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                r = json.loads(line)
-                if r.get("label") is None: continue
-                by_coin[r["coin"]].append(r)
-        # sort by ts
-        for c in by_coin:
-            by_coin[c].sort(key=lambda r: r["ts"])
-
-        self.samples = []
-        for c, rows in by_coin.items():
-            if len(rows) <= T: continue
-            # build rolling windows
-            for i in range(len(rows) - T):
-                seq = rows[i:i+T]
-                y   = rows[i+T]["label"]  # predict next-step return
-                x = [s["feats"] + s["mask"] for s in seq]  # [T, 12]
-                self.samples.append((x, y))
-
-    def __len__(self): return len(self.samples)
+    def __init__(self, root, T):
+        # rolling windows of T labeled steps per coin (ts order);
+        # target is the next step's return
+        X, y = sequence_windows(get_store(root), T)
+        self.x = torch.from_numpy(X)             # [M, T, 12]
+        self.y = torch.from_numpy(y).unsqueeze(-1)
+
+    def __len__(self): return len(self.x)
     def __getitem__(self, i):
-        x, y = self.samples[i]
-        x = torch.tensor(x, dtype=torch.float32)  # [T, 12]
-        return x, torch.tensor([y], dtype=torch.float32)
+        return self.x[i], self.y[i]
 
 def train():
-    ds = SeqDS(SNAP_PATH, T=T)
+    ds = SeqDS(SNAP_STORE, T=T)
     dl = DataLoader(ds, batch_size=64, shuffle=True, drop_last=True)
 
     model = LSTMWeighting(feat_dim=FEATURE_DIM*2, hidden=48)
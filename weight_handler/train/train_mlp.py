@@ -1,34 +1,28 @@
 # train/train_mlp.py
-import os, json, math, random
+import os, math, random
 import torch, torch.nn as nn
 from torch.utils.data import Dataset, DataLoader
 from datetime import datetime
 
 from weight_handler.models.rag_dynamic import SimpleWeightMLP, FEATURE_DIM
+from weight_handler.models.rag_columnar import get_store, labeled_matrix
 
 #from models.rag_dynamic import SimpleWeightMLP, FEATURE_DIM
 
-SNAP_PATH = "test_data/rag_snapshots_labeled.jsonl"  # same rows but 'label' filled
+SNAP_STORE = os.getenv("RAG_SNAPSHOT_STORE", "test data/rag_snapshots")  # labels filled by make_labels.py
 SAVE_DIR  = "ml_models"; os.makedirs(SAVE_DIR, exist_ok=True)
 
 class SnapDS(Dataset):
-    def __init__(self, path):
-        self.rows = []
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                row = json.loads(line)
-                if row.get("label") is None:  # skip unlabeled
-                    continue
-                feats = row["feats"]; mask = row["mask"]; y = float(row["label"])
-                self.rows.append((feats, mask, y))
-    def __len__(self): return len(self.rows)
+    def __init__(self, root):
+        X, y = labeled_matrix(get_store(root))   # unlabeled rows are skipped
+        self.x = torch.from_numpy(X)             # [N, 12] feats + mask
+        self.y = torch.from_numpy(y).unsqueeze(-1)
+    def __len__(self): return len(self.x)
     def __getitem__(self, i):
-        f, m, y = self.rows[i]
-        x = torch.tensor(f + m, dtype=torch.float32)  # [12]
-        return x, torch.tensor([y], dtype=torch.float32)
+        return self.x[i], self.y[i]
 
 def train():
-    ds = SnapDS(SNAP_PATH)
+    ds = SnapDS(SNAP_STORE)
     n = len(ds); assert n > 100, "Not enough labeled samples"
     dl = DataLoader(ds, batch_size=64, shuffle=True, drop_last=True)
 